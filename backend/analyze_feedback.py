@@ -1,10 +1,14 @@
+import numpy as np
 import pandas as pd
 from textblob import TextBlob
 from bertopic import BERTopic
-from sentence_transformers import SentenceTransformer
 from transformers import pipeline
 from tqdm import tqdm
 
+from services.feedback_embeddings import normalize_comment
+from services.feedback_ingest import embed_comments
+from services.model_registry import get_model
+
 tqdm.pandas()  # enable progress_apply
 
 # ------------------------
@@ -54,10 +58,14 @@ print("✅ Emotion detection complete.\n")
 # 4. Topic Modeling with BERTopic
 # ------------------------
 print("🔎 Extracting topics with BERTopic...")
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-topic_model = BERTopic(embedding_model=embedding_model, verbose=True)
+# Reuse the vectors the API stored for these comments (services/feedback_embeddings.py);
+# only comments it has never seen are encoded, and they are stored for next time.
+norm = [normalize_comment(c) for c in df['Comments'].tolist()]
+vectors = embed_comments(list(dict.fromkeys(norm)))
+embeddings = np.vstack([vectors[t] for t in norm])
 
-topics, probs = topic_model.fit_transform(df['Comments'].tolist())
+topic_model = BERTopic(embedding_model=get_model("minilm"), verbose=True)
+topics, probs = topic_model.fit_transform(df['Comments'].tolist(), embeddings=embeddings)
 df['Topic'] = topics
 
 # Save topic info separately
@@ -11,6 +11,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from routers import completeness
 from core.schema_guard import ensure_all_tables_once
+from services.model_registry import preload_models
 from routers import assessments
 from routers import (
     auth,
@@ -32,6 +33,7 @@ from routers import (
     suggestions,
     course_lead,
     execution_zip,
+    jobs,
 )
 
 app = FastAPI(title="Air QA Backend")
@@ -82,6 +84,7 @@ app.include_router(suggestions.router)
 
 app.include_router(admin.router)
 app.include_router(course_lead.router)
+app.include_router(jobs.router)
 app.include_router(assessments.router, prefix="/api")
 
 # (Optional backwards compatibility)
@@ -89,6 +92,11 @@ app.include_router(assessments.router, prefix="/api")
 # app.include_router(execution_zip.router)
 
 
+# Models load lazily on first use. MODEL_PRELOAD=sentiment,emotion,minilm loads
+# them here instead, at import time, so `gunicorn --preload` workers share them.
+preload_models()
+
+
 @app.on_event("startup")
 def _startup_schema():
     ensure_all_tables_once()
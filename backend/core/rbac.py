@@ -19,3 +19,6 @@ def require_roles(*roles: str):
 
 def is_admin(role: str | None) -> bool:
     return (role or "").lower() in {"admin", "administrator", "superadmin"}
+
+def is_qa(role: str | None) -> bool:
+    return (role or "").lower() in {"qec", "qa"}
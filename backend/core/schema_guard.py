@@ -8,6 +8,7 @@ from models import completeness  # noqa: F401
 from models import user, course, uploads, course_execution  # noqa: F401
 from models import assessment, student, student_submission  # noqa: F401
 from models import student_feedback  # noqa: F401  ✅ ADD THIS
+from models import job, llm_cache, embedding_cache, storage_blob, feedback_rollup  # noqa: F401
 
 _initialized = False
 
@@ -36,6 +36,7 @@ class CourseCLO(Base):
     parsed_text = Column(Text, nullable=True)
     clos_text = Column(Text, nullable=True)  # newline-separated CLOs
     file_path = Column(Text, nullable=True)
+    blob_sha256 = Column(String(64), nullable=True, index=True)
 
     assessments = relationship(
         "Assessment",
@@ -0,0 +1,25 @@
+# backend/models/embedding_cache.py
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, DateTime, LargeBinary
+
+from core.base import Base
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class EmbeddingCache(Base):
+    """DB backend for services/embedding_cache.py (EMBED_CACHE_BACKEND=postgres)."""
+
+    __tablename__ = "embedding_cache"
+
+    model = Column(String(128), primary_key=True)
+    text_hash = Column(String(64), primary_key=True)  # sha256 of the stripped text
+
+    dim = Column(Integer, nullable=False)
+    dtype = Column(String(8), nullable=False, default="float16")
+    vector = Column(LargeBinary, nullable=False)  # raw little-endian bytes, not JSON
+
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
@@ -0,0 +1,28 @@
+# backend/models/feedback_rollup.py
+from sqlalchemy import Column, Integer, String, Text, Index
+
+from core.base import Base
+
+
+class FeedbackRollup(Base):
+    """
+    Row counts of student_feedback per (batch, department, course, instructor,
+    sentiment), kept up to date on ingest when FEEDBACK_ROLLUP=1
+    (see services/feedback_summary.py). Read by GET /feedback/summary.
+    """
+
+    __tablename__ = "student_feedback_rollup"
+
+    id = Column(Integer, primary_key=True)
+
+    batch = Column(Integer, nullable=True)
+    department = Column(String(20), nullable=True)
+    course_name = Column(Text, nullable=True)
+    instructor_name = Column(Text, nullable=True)
+    sentiment = Column(String(20), nullable=True)
+
+    n = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_student_feedback_rollup_group", "batch", "department", "course_name", "instructor_name", "sentiment"),
+    )
@@ -1,5 +1,6 @@
 from datetime import datetime, timezone
 import uuid
+from typing import Optional
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import String, Integer, Text, DateTime
 from core.base import Base
@@ -17,4 +18,6 @@ class FileUpload(Base):
     file_size: Mapped[int] = mapped_column(Integer)
     validation_status: Mapped[str] = mapped_column(String(255))
     validation_details: Mapped[str] = mapped_column(Text)  # JSON string
+    storage_key: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    blob_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
     upload_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,53 @@
+# backend/models/job.py
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, DateTime, Text, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+from core.base import Base
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def gen_id() -> str:
+    return str(uuid.uuid4())
+
+
+# JSONB on Postgres, plain JSON on SQLite (local stand-in for the queue)
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+class BackgroundJob(Base):
+    """Durable queue row for long-running pipelines (see services/job_queue.py)."""
+
+    __tablename__ = "background_jobs"
+
+    id = Column(String(36), primary_key=True, default=gen_id)
+
+    # grade_all | weekly_zip | feedback_csv
+    kind = Column(String(32), nullable=False, index=True)
+
+    # queued | running | succeeded | failed
+    status = Column(String(16), nullable=False, default="queued", index=True)
+
+    payload = Column(JSONType, nullable=False, default=dict)
+    result = Column(JSONType, nullable=True)
+    error = Column(Text, nullable=True)
+
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+    progress_note = Column(Text, nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=1)
+
+    created_by = Column(String(36), nullable=True, index=True)
+    locked_by = Column(String(128), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False, index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,31 @@
+# backend/models/llm_cache.py
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, DateTime, Text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from core.base import Base
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class LLMResponseCache(Base):
+    """Postgres backend for services/llm_cache.py (LLM_CACHE_BACKEND=postgres)."""
+
+    __tablename__ = "llm_response_cache"
+
+    # sha256 over (system, user, schema_hint, model, temperature, prompt_version)
+    cache_key = Column(String(64), primary_key=True)
+
+    model = Column(String, nullable=True)
+    prompt_version = Column(String(32), nullable=True)
+
+    parsed_json = Column(JSONB, nullable=False)
+    raw_response = Column(Text, nullable=True)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    hits = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False, index=True)
+    last_access_at = Column(DateTime(timezone=True), default=utcnow, nullable=False, index=True)
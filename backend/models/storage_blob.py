@@ -0,0 +1,25 @@
+# backend/models/storage_blob.py
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime
+
+from core.base import Base
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class StorageBlob(Base):
+    """One content-addressed file under LOCAL_STORAGE_ROOT/blobs (see services/storage.py)."""
+
+    __tablename__ = "storage_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False, default=0)
+
+    # number of saves that point at this blob; 0 = eligible for tools/storage_gc.py
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+    last_ref_at = Column(DateTime(timezone=True), default=utcnow, nullable=False, index=True)
@@ -13,6 +13,8 @@ class StudentFeedback(Base):
     instructor_name = Column(Text, index=True)
     course_name = Column(Text, index=True)
     comments = Column(Text)
+    # sha256 of the normalized comment; key into services/feedback_embeddings.py
+    comment_key = Column(String(64), index=True)
     sentiment = Column(String(20), index=True)
     emotion = Column(String(50))
     topic = Column(Integer)
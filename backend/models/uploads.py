@@ -20,8 +20,15 @@ class Upload(Base):
     storage_backend = Column(String(16), nullable=False, default="local")
     storage_key = Column(Text, nullable=True)
     storage_url = Column(Text, nullable=True)
+    # content hash of the stored bytes (storage_blobs.sha256) for local blobs
+    blob_sha256 = Column(String(64), nullable=True, index=True)
 
     parse_log = Column(JSONB, default=list)
+
+    # REQUIRED_SECTIONS check, computed once at upload time (routers/uploads.py)
+    validation_status = Column(String(16), nullable=True)
+    validation_details = Column(JSONB, nullable=True)
+
     created_at = Column(DateTime, default=datetime.utcnow)
 
     text = relationship(
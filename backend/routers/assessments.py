@@ -1,5 +1,5 @@
 # backend/routers/assessments.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from sqlalchemy.orm import Session, joinedload
 
 from typing import List
@@ -22,6 +22,7 @@ from services.assessment_service import (
     ai_clo_alignment,
 )
 from services.grading_service import upload_submissions_zip, grade_all
+from services.job_queue import enqueue_job, job_to_dict
 
 
 router = APIRouter(tags=["Assessments"])
@@ -143,6 +144,7 @@ async def upload_questions_file(
 @router.post("/assessments/{assessment_id}/generate-expected-answers")
 def generate_expected_answers(
     assessment_id: str,
+    force: bool = Query(False),  # ✅ skip the LLM response cache
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
@@ -156,8 +158,8 @@ def generate_expected_answers(
         raise HTTPException(status_code=404, detail="Assessment not found")
 
     try:
-        exp = ai_generate_expected_answers(db, a)
-        clo = ai_clo_alignment(db, a)
+        exp = ai_generate_expected_answers(db, a, force=force)
+        clo = ai_clo_alignment(db, a, force=force)
         return {
             "ok": True,
             "expected_answers_created": True,
@@ -199,6 +201,8 @@ async def upload_submissions(
 @router.post("/assessments/{assessment_id}/grade-all")
 def grade_all_api(
     assessment_id: str,
+    background: bool = Query(False),
+    force: bool = Query(False),  # ✅ forced regrade: skip the LLM response cache
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
@@ -211,8 +215,18 @@ def grade_all_api(
     if not a:
         raise HTTPException(status_code=404, detail="Assessment not found")
 
+    if background:
+        # ✅ returns immediately; poll GET /jobs/{job_id}
+        job = enqueue_job(
+            db,
+            kind="grade_all",
+            payload={"assessment_id": str(a.id), "created_by": _uid(current), "force": force},
+            created_by=_uid(current),
+        )
+        return {"ok": True, "job_id": job.id, "job": job_to_dict(job, include_result=False)}
+
     try:
-        out = grade_all(db, a, created_by=_uid(current))
+        out = grade_all(db, a, created_by=_uid(current), force=force)
         return {"ok": True, **out}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -3,8 +3,6 @@ from sqlalchemy.orm import Session
 from core.db import SessionLocal
 
 from datetime import datetime, timezone
-import tempfile, zipfile, os, shutil
-from pathlib import Path
 from typing import List, Dict, Any, Optional
 import json
 
@@ -17,8 +15,9 @@ from models.assessment import Assessment, AssessmentFile
 
 from services.clo_extractor import extract_clos_and_assessments
 from services.clo_parser import extract_clos_from_text
-from services.text_processing import extract_text_from_path_or_bytes, parse_bytes
-from services.upload_adapter import parse_document
+from services.text_processing import extract_text_from_path_or_bytes
+from services.zip_ingest import ingest_zip, ZipIngestError
+from services.upload_service import set_validation
 
 from services.clo_alignment_service import run_clo_alignment
 
@@ -104,6 +103,7 @@ def _create_upload_row(
     file_type_guess: str,
     bytes_len: int,
     parse_log: Optional[list],
+    texts: Optional[List[str]] = None,
 ) -> Upload:
     """
     Safe Upload creator (supports your mixed Upload model variants).
@@ -133,6 +133,8 @@ def _create_upload_row(
     if hasattr(u, "filename") and not getattr(u, "filename", None):
         u.filename = filename_original
 
+    set_validation(u, texts or [])
+
     db.add(u)
     db.flush()
     return u
@@ -362,89 +364,64 @@ async def align_from_zip(
     db.add(clo_entry)
     db.commit()
 
-    tmp_dir = tempfile.mkdtemp()
     aggregated_text = ""
     parse_manifest: List[Dict[str, Any]] = []
 
+    zip_bytes = await materials_zip.read()
     try:
-        zip_bytes = await materials_zip.read()
-        zip_path = os.path.join(tmp_dir, "upload.zip")
-        with open(zip_path, "wb") as f:
-            f.write(zip_bytes)
-
-        with zipfile.ZipFile(zip_path, "r") as z:
-            z.extractall(tmp_dir)
-
-        for root, _, files in os.walk(tmp_dir):
-            for fname in files:
-                fpath = os.path.join(root, fname)
-                if fpath == zip_path:
-                    continue
-
-                parsed = {}
-                try:
-                    parsed = parse_document(fpath) or {}
-                except Exception as e:
-                    parsed = {"text": "", "error": str(e)}
-
-                if not (parsed.get("text") or "").strip():
-                    try:
-                        with open(fpath, "rb") as fh:
-                            parsed2 = parse_bytes(fh.read(), fname) or {}
-                        if parsed2.get("text"):
-                            parsed = parsed2
-                    except Exception:
-                        pass
-
-                text = (parsed.get("text") or "").strip()
-                if text:
-                    aggregated_text += text + "\n\n"
-
-                parse_manifest.append({
-                    "path": fpath,
-                    "ext": Path(fpath).suffix.lower(),
-                    "chars": len(text),
-                    "error": parsed.get("error"),
-                })
-
-        if not aggregated_text.strip():
-            raise HTTPException(400, "No text extracted from ZIP")
-
-        upload_entry = _create_upload_row(
-            db=db,
-            course_id=course_id,
-            filename_original=materials_zip.filename or "materials.zip",
-            filename_stored="upload.zip",
-            ext="zip",
-            file_type_guess="clo_materials_zip",
-            bytes_len=len(zip_bytes),
-            parse_log=parse_manifest,
-        )
-        db.commit()
+        ingested = ingest_zip(zip_bytes, max_files=None)
+    except ZipIngestError as e:
+        raise HTTPException(400, str(e))
+
+    for f in ingested["files"]:
+        parsed = f["parsed"]
+        text = (parsed.get("text") or "").strip()
+        if text:
+            aggregated_text += text + "\n\n"
+
+        parse_manifest.append({
+            "path": f["name"],
+            "ext": f["ext"],
+            "chars": len(text),
+            "pages": parsed.get("pages"),
+            "pages_read": parsed.get("pages_read"),
+            "error": parsed.get("error"),
+        })
+
+    if not aggregated_text.strip():
+        raise HTTPException(400, "No text extracted from ZIP")
+
+    upload_entry = _create_upload_row(
+        db=db,
+        course_id=course_id,
+        filename_original=materials_zip.filename or "materials.zip",
+        filename_stored="upload.zip",
+        ext="zip",
+        file_type_guess="clo_materials_zip",
+        bytes_len=len(zip_bytes),
+        parse_log=parse_manifest,
+        texts=[aggregated_text],
+    )
+    db.commit()
 
-        db.add(UploadText(upload_id=upload_entry.id, text=aggregated_text))
-        db.commit()
+    db.add(UploadText(upload_id=upload_entry.id, text=aggregated_text))
+    db.commit()
 
-        _, assessments = extract_clos_and_assessments(aggregated_text)
-        if not assessments:
-            raise HTTPException(400, "No assessments found in materials")
+    _, assessments = extract_clos_and_assessments(aggregated_text)
+    if not assessments:
+        raise HTTPException(400, "No assessments found in materials")
 
-        result = run_clo_alignment(
-            clos=clos,
-            assessments=[{"name": a} for a in assessments],
-        )
+    result = run_clo_alignment(
+        clos=clos,
+        assessments=[{"name": a} for a in assessments],
+    )
 
-        if hasattr(clo_entry, "alignment_json"):
-            clo_entry.alignment_json = _safe_json(result)
-        if hasattr(clo_entry, "materials_upload_id"):
-            clo_entry.materials_upload_id = str(upload_entry.id)
-        db.add(clo_entry)
-        db.commit()
+    if hasattr(clo_entry, "alignment_json"):
+        clo_entry.alignment_json = _safe_json(result)
+    if hasattr(clo_entry, "materials_upload_id"):
+        clo_entry.materials_upload_id = str(upload_entry.id)
+    db.add(clo_entry)
+    db.commit()
 
-        return CLOAlignmentResponse(**result)
+    return CLOAlignmentResponse(**result)
 
-    finally:
-        try:
-            shutil.rmtree(tmp_dir)
-        except Exception:
-            pass
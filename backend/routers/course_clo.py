@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
 from sqlalchemy.orm import Session
-from pathlib import Path
 from datetime import datetime, timezone
 
 from core.db import SessionLocal
@@ -10,6 +9,7 @@ from models.course_clo import CourseCLO
 from schemas.clo import CLOUploadResponse, CLOItem
 from services.upload_adapter import parse_document
 from services.clo_parser import extract_clos_from_text
+from services.storage import save_fileobj
 
 router = APIRouter(prefix="/courses", tags=["Courses (CLOs)"])
 
@@ -20,9 +20,6 @@ def get_db():
     finally:
         db.close()
 
-STORAGE_DIR = Path("storage") / "course_clos"
-STORAGE_DIR.mkdir(parents=True, exist_ok=True)
-
 @router.post("/{course_id}/upload-clo", response_model=CLOUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_course_clo(
     course_id: str,
@@ -34,20 +31,11 @@ async def upload_course_clo(
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
 
-    # Save file
-    course_dir = STORAGE_DIR / course_id
-    course_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    dest = course_dir / f"{ts}_{file.filename}"
-
-    total_bytes = 0
-    with dest.open("wb") as out:
-        while chunk := await file.read(1024 * 1024):
-            total_bytes += len(chunk)
-            out.write(chunk)
+    # Save file (content-addressed; re-uploads reuse the stored blob)
+    saved = save_fileobj(file.filename or "clos", file.file, db=db)
 
     # Parse and extract CLOs
-    parsed = parse_document(str(dest)) or {}
+    parsed = parse_document(saved["local_path"]) or {}
     parsed_text = parsed.get("text")
     clos_list = extract_clos_from_text(parsed_text or "")
     clos_text = "\n".join(clos_list) if clos_list else None
@@ -57,11 +45,12 @@ async def upload_course_clo(
         user_id=getattr(current, "id", None),
         filename=file.filename,
         file_type=file.content_type,
-        file_size=total_bytes,
+        file_size=saved["bytes"],
         upload_date=datetime.now(timezone.utc),
         parsed_text=parsed_text,
         clos_text=clos_text,
-        file_path=str(dest)
+        file_path=saved["local_path"],
+        blob_sha256=saved["sha256"],
     )
     db.add(rec)
     db.commit()
@@ -1,17 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.responses import FileResponse, Response
 from sqlalchemy.orm import Session
 from typing import List
 from pathlib import Path
 import mimetypes
-from collections import Counter
+from urllib.parse import quote
 from services.weekly_zip_upload_service import handle_weekly_zip_upload
-from services.completeness_service import run_completeness
+from services.completeness_service import evaluate_completeness
+from services.job_queue import enqueue_job, spool_upload, job_to_dict
+from services.zip_ingest import read_member, ZipIngestError
+from services.storage import local_path
 
 from core.db import SessionLocal
 from .auth import get_current_user
 from models.course import Course
-from models.course_execution import WeeklyPlan, WeeklyExecution, DeviationLog
+from models.course_execution import WeeklyPlan, WeeklyExecution, DeviationLog, gen_id
 from models.uploads import Upload, UploadFileItem
 from schemas.course_execution import (
     WeeklyPlanOut,
@@ -23,7 +26,11 @@ from schemas.course_execution import (
     DeviationOut,
     DeviationResolve,
 )
-from services.course_execution import generate_weekly_plan_from_guide, update_deviations_for_course
+from services.course_execution import (
+    generate_weekly_plan_from_guide,
+    update_deviations_for_course,
+    weekly_progress_summary,
+)
 
 
 router = APIRouter(prefix="/courses", tags=["Course Execution"])
@@ -236,6 +243,7 @@ async def upload_weekly_zip(
     course_id: str,
     week_no: int,
     file: UploadFile = File(...),
+    background: bool = Query(False),
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
@@ -254,6 +262,25 @@ async def upload_weekly_zip(
 
     user_id = current["id"] if isinstance(current, dict) else str(current.id)
 
+    if background:
+        # ✅ parsing/embedding runs in the worker; poll GET /jobs/{job_id}
+        job_id = gen_id()
+        filename = file.filename or f"week_{week_no}.zip"
+        job = enqueue_job(
+            db,
+            kind="weekly_zip",
+            payload={
+                "course_id": course_id,
+                "week_no": week_no,
+                "user_id": user_id,
+                "filename": filename,
+                "file_path": spool_upload(job_id, filename, data),
+            },
+            created_by=user_id,
+            job_id=job_id,
+        )
+        return {"job_id": job.id, "job": job_to_dict(job, include_result=False)}
+
     out = handle_weekly_zip_upload(
         db=db,
         course_id=course_id,
@@ -262,19 +289,7 @@ async def upload_weekly_zip(
         zip_file_bytes=data,
         zip_filename=file.filename or f"week_{week_no}.zip",
     )
-
-    # ✅ AUTO-RUN completeness for weekly uploads
-    try:
-        comp = run_completeness(
-            db=db,
-            course_id=out.get("course_id") or course_id,
-            upload_id=out.get("upload_id"),
-            week_no=week_no,
-        )
-    except Exception as e:
-        comp = {"error": str(e)}
-
-    out["completeness"] = comp
+    # out["completeness"] was recorded once by handle_weekly_zip_upload
     return out
 
 
@@ -333,7 +348,7 @@ def weekly_latest_bundle(
     comp = None
     if up:
         try:
-            comp = run_completeness(db=db, course_id=course_id, upload_id=str(up.id), week_no=week_no)
+            comp = evaluate_completeness(db, up.id, week_no)
         except Exception as e:
             comp = {"error": str(e)}
 
@@ -392,8 +407,9 @@ def download_upload_file(
     current=Depends(get_current_user),
 ):
     """
-    Streams a file out of the extracted folder.
-    We do NOT store extracted paths in DB, so we locate via Upload.parse_log safely.
+    Streams a file belonging to an upload, located via Upload.parse_log.
+    Newer ZIP uploads keep only the archive, so the member is read from it;
+    older ones point at files in the extracted folder.
     """
     up = db.get(Upload, upload_id)
     if not up:
@@ -402,23 +418,38 @@ def download_upload_file(
     manifest = up.parse_log or []
     filename = Path(filename).name  # sanitize
 
-    candidate = None
+    entry = None
     for m in manifest:
-        p = m.get("path")
+        p = m.get("member") or m.get("path")
         if not p:
             continue
         if Path(p).name == filename:
-            candidate = p
+            entry = m
             break
 
-    if not candidate:
+    if not entry:
         raise HTTPException(status_code=404, detail="File not found in this upload")
 
-    fpath = Path(candidate)
+    ctype, _ = mimetypes.guess_type(filename)
+
+    if entry.get("member"):
+        zip_path = local_path(up.storage_key) if up.storage_key else None
+        if not zip_path or not zip_path.exists():
+            raise HTTPException(status_code=404, detail="File is missing on server storage")
+        try:
+            data = read_member(zip_path, entry["member"])
+        except (FileNotFoundError, ZipIngestError):
+            raise HTTPException(status_code=404, detail="File is missing on server storage")
+        return Response(
+            content=data,
+            media_type=ctype or "application/octet-stream",
+            headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"},
+        )
+
+    fpath = Path(entry["path"])
     if not fpath.exists():
         raise HTTPException(status_code=404, detail="File is missing on server storage")
 
-    ctype, _ = mimetypes.guess_type(str(fpath))
     return FileResponse(
         path=str(fpath),
         media_type=ctype or "application/octet-stream",
@@ -433,60 +464,5 @@ def weekly_progress(
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
 ):
-    weeks = []
-    weeks_behind = []
-    missing_counter = Counter()
-
-    for w in range(1, 17):
-        # latest upload for this week
-        up = (
-            db.query(Upload)
-            .filter(Upload.course_id == course_id, Upload.week_no == w)
-            .order_by(Upload.created_at.desc())
-            .first()
-        )
-
-        exe = (
-            db.query(WeeklyExecution)
-            .filter(WeeklyExecution.course_id == course_id, WeeklyExecution.week_number == w)
-            .first()
-        )
-
-        coverage_percent = float(exe.coverage_percent or 0) if exe else 0.0
-        coverage_status = exe.coverage_status if exe else ("skipped" if not up else "behind")
-
-        completeness_percent = None
-        if up:
-            try:
-                comp = run_completeness(db=db, course_id=course_id, upload_id=str(up.id), week_no=w)
-                completeness_percent = float(comp.get("score_percent")) if isinstance(comp, dict) and comp.get("score_percent") is not None else None
-            except Exception:
-                completeness_percent = None
-
-        if coverage_status == "behind":
-            weeks_behind.append(w)
-
-        # aggregate missing topics
-        if exe and exe.missing_topics:
-            for line in (exe.missing_topics or "").split("\n"):
-                t = line.strip().lower()
-                if t:
-                    missing_counter[t] += 1
-
-        weeks.append({
-            "week_no": w,
-            "has_upload": bool(up),
-            "upload_id": str(up.id) if up else None,
-            "coverage_percent": round(coverage_percent, 2),
-            "coverage_status": coverage_status,
-            "completeness_percent": round(completeness_percent, 2) if completeness_percent is not None else None,
-        })
-
-    top_missing = [{"topic": k, "count": v} for k, v in missing_counter.most_common(20)]
-
-    return {
-        "course_id": course_id,
-        "weeks": weeks,
-        "weeks_behind": weeks_behind,
-        "top_missing_topics": top_missing,
-    }
+    # constant number of read-only queries (see tools/check_weekly_progress_queries.py)
+    return weekly_progress_summary(db, course_id)
@@ -11,6 +11,7 @@ from models.course_execution import WeeklyPlan
 from routers.auth import get_current_user
 
 from services.course_guide_service import save_upload, extract_text_best_effort, ensure_weekly_plans
+from services.storage import blob_sha_of, release_blob
 
 router = APIRouter(prefix="/course-lead", tags=["Course Lead"])
 
@@ -59,14 +60,15 @@ def upload_course_guide(
 
     _ensure_course_lead_access(db, course_id, me)
 
-    saved_path = save_upload(course_id, file)
+    saved_path = save_upload(course_id, file, db=db)
     text = extract_text_best_effort(saved_path)
 
     # create weekly plans
     ensure_weekly_plans(db, course_id, text or "(No text extracted — upload a text-based PDF/DOCX)")
 
-    # store metadata on course (optional)
+    # store metadata on course (optional); the course owns one reference to its guide blob
     if hasattr(course, "course_guide_path"):
+        release_blob(db, blob_sha_of(course.course_guide_path))
         course.course_guide_path = saved_path
     if hasattr(course, "course_guide_text"):
         course.course_guide_text = (text or "")[:20000]
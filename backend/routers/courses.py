@@ -21,6 +21,7 @@ from models.course import Course
 from models.file_upload import FileUpload
 from models.material import CourseMaterial, CourseMaterialFile  # NEW
 from schemas.course import CourseCreate, CourseOut
+from services.storage import save_fileobj
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
@@ -41,17 +42,8 @@ async def _save_course_upload(course_id: str, file: UploadFile, db: Session, cur
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
 
-    base_dir = Path("storage") / "course_uploads" / course_id
-    base_dir.mkdir(parents=True, exist_ok=True)
-
-    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    dest = base_dir / f"{ts}_{file.filename}"
-
-    total_bytes = 0
-    with dest.open("wb") as f_out:
-        while chunk := await file.read(1024 * 1024):
-            total_bytes += len(chunk)
-            f_out.write(chunk)
+    # content-addressed: an identical re-upload only adds the FileUpload row
+    saved = save_fileobj(file.filename or "upload", file.file, db=db)
 
     rec = FileUpload(
         id=str(uuid4()),
@@ -59,7 +51,9 @@ async def _save_course_upload(course_id: str, file: UploadFile, db: Session, cur
         user_id=current.id,
         filename=file.filename,
         file_type=file.content_type,
-        file_size=total_bytes,
+        file_size=saved["bytes"],
+        storage_key=saved["key"],
+        blob_sha256=saved["sha256"],
         upload_date=datetime.now(timezone.utc),
         validation_status="pending",
         validation_details="Not validated yet",
@@ -2,9 +2,7 @@
 
 import uuid
 import json
-import zipfile
 from datetime import datetime, timezone
-from pathlib import Path
 from typing import List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
@@ -16,14 +14,17 @@ from routers.auth import get_current_user
 from models.course import Course
 from models.course_execution import WeeklyPlan, WeeklyExecution, DeviationLog
 
-from services.upload_adapter import parse_document
+from services.zip_ingest import ingest_zip, ZipIngestError
+from services.storage import blob_sha_of, release_blob, save_blob
 from services.execution_compare import compare_week
+from services.text_sanitize import clean_text, sanitize_text
 
 
 router = APIRouter(prefix="/courses", tags=["Execution ZIP"])
 
 ALLOWED_EXTS = {".pdf", ".docx", ".pptx", ".txt", ".md"}
 MAX_FILES = 200
+DELIVERED_MAX_CHARS = 20000
 
 
 def get_db():
@@ -34,65 +35,15 @@ def get_db():
         db.close()
 
 
-def clean_text(val: Optional[str]) -> Optional[str]:
-    """
-    PostgreSQL TEXT/VARCHAR cannot store NUL bytes (\x00).
-    Also removes other control chars while keeping \n, \r, \t.
-    """
-    if val is None:
-        return None
-    if not isinstance(val, str):
-        val = str(val)
-
-    # remove NUL bytes (root cause of your crash)
-    val = val.replace("\x00", "")
-
-    # remove other low ASCII control chars except newline/tab/cr
-    out = []
-    for ch in val:
-        o = ord(ch)
-        if ch in ("\n", "\r", "\t"):
-            out.append(ch)
-        elif o >= 32:
-            out.append(ch)
-        # else skip
-    return "".join(out).strip()
-
-
-def _safe_extract_zip(zip_path: str, dest_dir: str) -> List[str]:
-    dest = Path(dest_dir)
-    dest.mkdir(parents=True, exist_ok=True)
-
-    extracted_files: List[str] = []
-    with zipfile.ZipFile(zip_path, "r") as z:
-        names = z.namelist()
-
-        if len(names) > MAX_FILES:
-            names = names[:MAX_FILES]
-
-        for member in names:
-            # skip directories
-            if member.endswith("/"):
-                continue
-
-            # ✅ skip macOS junk files
-            if member.startswith("__MACOSX/"):
-                continue
-            if Path(member).name.startswith("._"):
-                continue
-
-            # prevent zip slip
-            target = (dest / member).resolve()
-            if not str(target).startswith(str(dest.resolve())):
-                continue
-
-            target.parent.mkdir(parents=True, exist_ok=True)
-            with z.open(member) as src, open(target, "wb") as out:
-                out.write(src.read())
-
-            extracted_files.append(str(target))
-
-    return extracted_files
+def _evidence_blob_shas(links: Optional[str]) -> List[str]:
+    """Blob hashes referenced from WeeklyExecution.evidence_links (a JSON list)."""
+    try:
+        items = json.loads(links or "[]")
+    except ValueError:
+        return []
+    if not isinstance(items, list):
+        return []
+    return [sha for sha in (blob_sha_of(x) for x in items if isinstance(x, str)) if sha]
 
 
 def _normalize_coverage(coverage_raw: float) -> Tuple[float, float]:
@@ -147,42 +98,32 @@ async def upload_weekly_zip(
         raise HTTPException(status_code=400, detail="Empty file uploaded")
 
     now = datetime.now(timezone.utc)
-    upload_id = str(uuid.uuid4())
-
-    storage_root = Path("uploads/weekly") / course_id / f"week_{week_no}" / upload_id
-    storage_root.mkdir(parents=True, exist_ok=True)
 
-    zip_name = file.filename or f"week_{week_no}.zip"
-    zip_path = storage_root / zip_name
-    zip_path.write_bytes(zip_bytes)
+    # ---- parse members straight from the archive ----
+    try:
+        ingested = ingest_zip(zip_bytes, exts=ALLOWED_EXTS, max_files=MAX_FILES, max_chars=DELIVERED_MAX_CHARS)
+    except ZipIngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    extracted_dir = storage_root / "extracted"
-    files = _safe_extract_zip(str(zip_path), str(extracted_dir))
+    # keep the archive (content-addressed: identical re-uploads store nothing new);
+    # the execution row below owns the reference via evidence_links
+    saved = save_blob(file.filename or f"week_{week_no}.zip", zip_bytes, db=db)
+    files = ingested["files"]
 
-    # ---- parse files ----
     texts: List[str] = []
     manifest = []
 
-    for fp in files:
-        ext = Path(fp).suffix.lower()
-        if ext not in ALLOWED_EXTS:
-            continue
-
-        try:
-            parsed = parse_document(fp) or {}
-        except Exception as e:
-            parsed = {"text": "", "error": f"parse failed: {e}"}
-
-        t = clean_text(parsed.get("text") or "") or ""
+    for f in files:
+        parsed = f["parsed"]
+        t = clean_text(parsed.get("text"))
         if t:
             texts.append(t)
 
         manifest.append(
-            {"path": fp, "ext": ext, "chars": len(t), "error": parsed.get("error")}
+            {"path": f["name"], "ext": f["ext"], "chars": len(t), "error": parsed.get("error")}
         )
 
-    delivered_topics_text = clean_text("\n\n".join(texts)) or ""
-    delivered_topics_text = delivered_topics_text[:20000]  # cap
+    delivered_topics_text = sanitize_text("\n\n".join(texts), max_chars=DELIVERED_MAX_CHARS)
 
     # ---- planned topics for this week ----
     plan = (
@@ -190,7 +131,7 @@ async def upload_weekly_zip(
         .filter(WeeklyPlan.course_id == course_id, WeeklyPlan.week_number == week_no)
         .first()
     )
-    plan_text = clean_text((plan.planned_topics if plan else "") or "") or ""
+    plan_text = clean_text(plan.planned_topics if plan else "")
 
     # ---- compare ----
     coverage_raw, missing_terms, plan_terms = compare_week(plan_text, delivered_topics_text)
@@ -201,11 +142,8 @@ async def upload_weekly_zip(
     plan_terms = plan_terms or []
     matched_terms = [t for t in plan_terms if t not in set(missing_terms)]
 
-    missing_topics_str = clean_text("\n".join(missing_terms)) or ""
-    matched_topics_str = clean_text("\n".join(matched_terms)) or ""
-
-    missing_topics_str = missing_topics_str[:20000]
-    matched_topics_str = matched_topics_str[:20000]
+    missing_topics_str = sanitize_text("\n".join(missing_terms), max_chars=20000)
+    matched_topics_str = sanitize_text("\n".join(matched_terms), max_chars=20000)
 
     coverage_status = "on_track" if coverage_percent >= 80.0 else "behind"
 
@@ -223,6 +161,11 @@ async def upload_weekly_zip(
         )
         db.add(ex)
 
+    # the previous archive's reference goes with the link it is replaced by
+    for sha in _evidence_blob_shas(ex.evidence_links):
+        release_blob(db, sha)
+    ex.evidence_links = json.dumps([saved["key"]])
+
     ex.coverage_percent = coverage_percent
     ex.coverage_status = coverage_status
     ex.delivered_topics = clean_text(delivered_topics_text)
@@ -263,6 +206,6 @@ async def upload_weekly_zip(
         "missing_terms": missing_terms[:200],
         "matched_terms": matched_terms[:200],
         "deviation_flag": bool(coverage_percent < 80.0),
-        "files_seen": len(files),
+        "files_seen": ingested["seen"],
         "files_used": len([m for m in manifest if m["ext"] in ALLOWED_EXTS]),
     }
@@ -13,7 +13,12 @@ from services.assessment_service import ai_extract_questions
 router = APIRouter(tags=["Grading Audit"])
 
 @router.post("/assessments/{assessment_id}/run-grading-audit")
-def run_grading_audit(assessment_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def run_grading_audit(
+    assessment_id: str,
+    force: bool = False,  # ✅ re-extract questions even if the LLM response is cached
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
     try:
         aid = uuid.UUID(assessment_id)
     except Exception:
@@ -72,7 +77,7 @@ def run_grading_audit(assessment_id: str, db: Session = Depends(get_db), user=De
                 q_to_clo[qno] = clo
 
     # Get question max marks (best effort: re-extract questions from latest file)
-    qpack = ai_extract_questions(db, assessment)
+    qpack = ai_extract_questions(db, assessment, force=force)
     q_json = qpack.get("questions_json") or {}
     q_max = {}
     for q in (q_json.get("questions") or []):
@@ -1,6 +1,10 @@
 from fastapi import APIRouter
 from sqlalchemy import text
 from core.db import engine
+from services.comment_cache import cache_stats as comment_cache_stats
+from services.llm_cache import cache_stats as llm_cache_stats
+from services.parse_cache import cache_stats as parse_cache_stats
+from services.model_registry import model_stats
 
 router = APIRouter(prefix="/health", tags=["Health"])
 
@@ -9,3 +13,14 @@ def db_health():
     with engine.connect() as conn:
         version = conn.execute(text("select version()")).scalar_one()
     return {"ok": True, "version": version}
+
+
+@router.get("/cache")
+def cache_health():
+    return {"llm": llm_cache_stats(), "parse": parse_cache_stats(), "comments": comment_cache_stats()}
+
+
+@router.get("/models")
+def models_health():
+    # does not load anything; unloaded models show loaded=False
+    return model_stats()
@@ -0,0 +1,68 @@
+# backend/routers/jobs.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from core.db import get_db
+from core.rbac import is_admin, is_qa
+from routers.auth import get_current_user
+from models.job import BackgroundJob
+from services.job_queue import job_to_dict
+
+router = APIRouter(prefix="/jobs", tags=["Background Jobs"])
+
+
+def _uid(current) -> str:
+    return (current.get("id") if isinstance(current, dict) else str(getattr(current, "id", ""))) or ""
+
+
+def _sees_all_jobs(current) -> bool:
+    role = (current.get("role") if isinstance(current, dict) else getattr(current, "role", "")) or ""
+    return is_admin(role) or is_qa(role)
+
+
+def _get_visible_job(db: Session, job_id: str, current) -> BackgroundJob:
+    """The job if it exists and `current` may see it (its creator, admin or QA); 404 otherwise."""
+    job = db.get(BackgroundJob, job_id)
+    if not job or not (_sees_all_jobs(current) or (job.created_by and job.created_by == _uid(current))):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str, db: Session = Depends(get_db), current=Depends(get_current_user)):
+    """Status + progress, and the handler result once status == 'succeeded'."""
+    return job_to_dict(_get_visible_job(db, job_id, current))
+
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str, db: Session = Depends(get_db), current=Depends(get_current_user)):
+    job = _get_visible_job(db, job_id, current)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result
+
+
+@router.get("")
+def list_jobs(
+    kind: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current=Depends(get_current_user),
+):
+    q = db.query(BackgroundJob)
+    if not _sees_all_jobs(current):
+        uid = _uid(current)
+        if not uid:
+            return []
+        q = q.filter(BackgroundJob.created_by == uid)
+    if kind:
+        q = q.filter(BackgroundJob.kind == kind)
+    if status:
+        q = q.filter(BackgroundJob.status == status)
+    rows = q.order_by(BackgroundJob.created_at.desc()).limit(limit).all()
+    return [job_to_dict(j, include_result=False) for j in rows]
@@ -1,57 +1,22 @@
-import io
-from typing import Optional, Dict, Any, List
+from typing import Optional
 
-import pandas as pd
 from fastapi import APIRouter, UploadFile, File, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 
 from core.db import get_db
 from models.student_feedback import StudentFeedback
+from routers.auth import get_current_user
 
-from transformers import pipeline
-from sentence_transformers import SentenceTransformer
-from sklearn.cluster import KMeans
+from services.feedback_ingest import ingest_feedback_csv, ingest_feedback_csv_file, FeedbackCSVError
+from services.feedback_summary import feedback_summary as summarize_feedback
+from services.topic_model import topic_keywords
+from services.feedback_embeddings import similar_feedback
+from services.feedback_query import count_feedback, feedback_facets, feedback_page
+from services.job_queue import enqueue_job, spool_upload_file, drop_spool, job_to_dict
+from models.job import gen_id
 
 router = APIRouter(prefix="/feedback", tags=["Student Feedback"])
 
-# -----------------------------
-# NLP Models (loaded once)
-# -----------------------------
-sentiment_pipe = pipeline(
-    "sentiment-analysis",
-    model="distilbert-base-uncased-finetuned-sst-2-english"
-)
-
-# ✅ return_all_scores deprecated -> use top_k=1
-emotion_pipe = pipeline(
-    "text-classification",
-    model="j-hartmann/emotion-english-distilroberta-base",
-    top_k=1
-)
-
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
-
-
-def _get_emotion_label(text: str) -> str:
-    """
-    Handles transformers returning either:
-      - [{"label":..., "score":...}]
-      - [[{"label":..., "score":...}]]
-    """
-    res = emotion_pipe(text[:512])
-    item = res[0][0] if isinstance(res[0], list) else res[0]
-    return item.get("label", "unknown")
-
-
-def _normalize_sentiment(label: str, score: float) -> str:
-    """
-    distilbert SST2 returns POSITIVE/NEGATIVE.
-    We add Neutral if confidence is low.
-    """
-    if score < 0.60:
-        return "neutral"
-    return "positive" if label.upper().startswith("POS") else "negative"
-
 
 # -----------------------------
 # Upload CSV + Analyze
@@ -60,139 +25,56 @@ def _normalize_sentiment(label: str, score: float) -> str:
 async def upload_feedback_csv(
     file: UploadFile = File(...),
     replace: bool = Query(False),  # ✅ SAFE: default False (append)
+    background: bool = Query(False),  # enqueue for the worker instead of analyzing in-request
+    stream: bool = Query(False),  # chunked ingestion from disk for very large exports
     db: Session = Depends(get_db),
+    current=Depends(get_current_user),
 ):
     """
     Upload CSV, analyze sentiment/emotion/topics, store results.
 
     SAFE behavior:
-      - replace=False (default): append rows (doesn't wipe existing DB)
-      - replace=True: delete all rows then insert (explicit)
+      - replace=False (default): append rows (doesn't wipe existing DB);
+        rows commit in chunks, so a failure keeps the chunks already stored
+      - replace=True: delete all rows then insert (explicit); the wipe and
+        inserts are one transaction (with or without stream), so a failure
+        leaves the previous rows in place
+
+    background=True returns {"job_id": ...} immediately; poll /jobs/{job_id}
+    (the job belongs to the uploader, so they can see it there).
+    stream=True spools the upload to disk and analyzes/stores it chunk by
+    chunk (FEEDBACK_CSV_CHUNK_ROWS rows), so memory does not grow with the
+    file; combine with background=True for progress via /jobs/{job_id}.
+    With stream=True, replace=True wipes once the first chunk has been
+    analyzed and commits once after the last chunk.
     """
-    try:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid CSV file: {e}")
-
-    # Normalize column names (supports multiple casing)
-    rename_map = {
-        "CourseName": "course_name",
-        "course_name": "course_name",
-        "course": "course_name",
-
-        "InstructorName": "instructor_name",
-        "instructor_name": "instructor_name",
-        "teacher": "instructor_name",
-
-        "Comments": "comments",
-        "Comment": "comments",
-        "comments": "comments",
-
-        "StudentID": "student_id",
-        "student_id": "student_id",
-
-        "Name": "name",
-        "name": "name",
-
-        "FormType": "form_type",
-        "form_type": "form_type",
-
-        "MCQ_Number": "mcq_number",
-        "mcq_number": "mcq_number",
-
-        "Answer": "answer",
-        "answer": "answer",
-
-        "Batch": "batch",
-        "batch": "batch",
-
-        "Department": "department",
-        "department": "department",
-    }
-    df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns}, inplace=True)
-
-    # Required columns for analysis + aggregation
-    required = ["comments", "course_name", "instructor_name", "batch"]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise HTTPException(status_code=400, detail=f"Missing required columns: {missing}")
-
-    # Defaults for optional columns (keeps system stable even if CSV lacks them)
-    if "department" not in df.columns:
-        df["department"] = None
-    if "student_id" not in df.columns:
-        df["student_id"] = None
-    if "name" not in df.columns:
-        df["name"] = None
-    if "form_type" not in df.columns:
-        df["form_type"] = "Course Evaluation"
-    if "mcq_number" not in df.columns:
-        df["mcq_number"] = 0
-    if "answer" not in df.columns:
-        df["answer"] = None
-
-    # Clean comments
-    df["comments"] = df["comments"].astype(str).str.strip()
-    df = df[df["comments"].str.len() > 0].copy()
-
-    # Ensure numeric types
-    df["batch"] = pd.to_numeric(df["batch"], errors="coerce").fillna(0).astype(int)
-    df["mcq_number"] = pd.to_numeric(df["mcq_number"], errors="coerce").fillna(0).astype(int)
-
-    # Run NLP analysis
-    sentiments: List[str] = []
-    emotions: List[str] = []
-
-    comment_list = df["comments"].tolist()
-    for c in comment_list:
-        s = sentiment_pipe(c[:512])[0]
-        sentiments.append(_normalize_sentiment(str(s["label"]), float(s["score"])))
-        emotions.append(_get_emotion_label(c))
-
-    df["sentiment"] = sentiments
-    df["emotion"] = emotions
-
-    # Topic clustering (safe fallback for small datasets)
-    if len(comment_list) >= 5:
-        embeddings = embedder.encode(comment_list, show_progress_bar=False)
-        k = min(8, max(2, len(comment_list) // 25))
-        km = KMeans(n_clusters=k, random_state=42, n_init="auto")
-        df["topic"] = km.fit_predict(embeddings)
-    else:
-        df["topic"] = 0
-
-    # ✅ SAFE: only wipe if replace=true
-    if replace:
-        db.query(StudentFeedback).delete()
-        db.commit()
-
-    # Insert rows
-    inserted = 0
-    for _, row in df.iterrows():
-        entry = StudentFeedback(
-            student_id=str(row.get("student_id")) if pd.notna(row.get("student_id")) else None,
-            name=str(row.get("name")) if pd.notna(row.get("name")) else None,
-            form_type=str(row.get("form_type")) if pd.notna(row.get("form_type")) else "Course Evaluation",
-            mcq_number=int(row.get("mcq_number", 0)) if pd.notna(row.get("mcq_number")) else 0,
-            answer=str(row.get("answer")) if pd.notna(row.get("answer")) else None,
-            instructor_name=str(row.get("instructor_name")),
-            course_name=str(row.get("course_name")),
-            comments=str(row.get("comments")),
-            sentiment=str(row.get("sentiment")),
-            emotion=str(row.get("emotion")),
-            topic=int(row.get("topic", 0)) if pd.notna(row.get("topic")) else 0,
-            batch=int(row.get("batch", 0)) if pd.notna(row.get("batch")) else 0,
-            department=str(row.get("department")) if pd.notna(row.get("department")) else None,
+    if background:
+        job_id = gen_id()
+        path = spool_upload_file(job_id, file.filename or "feedback.csv", file.file)
+        job = enqueue_job(
+            db,
+            kind="feedback_csv",
+            payload={"file_path": path, "replace": replace, "stream": stream},
+            created_by=current["id"] if isinstance(current, dict) else str(current.id),
+            job_id=job_id,
         )
-        db.add(entry)
-        inserted += 1
-
-    db.commit()
-    return {
-        "message": f"✅ {inserted} feedback records analyzed and stored successfully!",
-        "replace": replace,
-    }
+        return {"job_id": job.id, "job": job_to_dict(job, include_result=False)}
+
+    if stream:
+        spool_id = gen_id()
+        path = spool_upload_file(spool_id, file.filename or "feedback.csv", file.file)
+        try:
+            return ingest_feedback_csv_file(db, path, replace=replace)
+        except FeedbackCSVError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            drop_spool(spool_id)
+
+    contents = await file.read()
+    try:
+        return ingest_feedback_csv(db, contents, replace=replace)
+    except FeedbackCSVError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # -----------------------------
@@ -205,42 +87,10 @@ def feedback_summary(
     db: Session = Depends(get_db)
 ):
     """
-    Aggregate feedback summary for charts.
+    Aggregate feedback summary for charts (SQL GROUP BY, or the rollup
+    table when FEEDBACK_ROLLUP=1; see services/feedback_summary.py).
     """
-    q = db.query(StudentFeedback)
-
-    if batch is not None:
-        q = q.filter(StudentFeedback.batch == batch)
-    if department:
-        q = q.filter(StudentFeedback.department == department)
-
-    data = q.all()
-
-    summary = {"positive": 0, "neutral": 0, "negative": 0}
-    by_course: Dict[str, Dict[str, int]] = {}
-    by_instructor: Dict[str, int] = {}
-
-    for f in data:
-        s = f.sentiment or "neutral"
-        summary[s] = summary.get(s, 0) + 1
-
-        by_course.setdefault(f.course_name, {"pos": 0, "neu": 0, "neg": 0})
-        if s == "positive":
-            by_course[f.course_name]["pos"] += 1
-        elif s == "neutral":
-            by_course[f.course_name]["neu"] += 1
-        else:
-            by_course[f.course_name]["neg"] += 1
-
-        by_instructor.setdefault(f.instructor_name, 0)
-        by_instructor[f.instructor_name] += 1
-
-    return {
-        "sentiment": summary,
-        "courses": by_course,
-        "instructors": by_instructor,
-        "total": len(data),
-    }
+    return summarize_feedback(db, batch=batch, department=department)
 
 
 # -----------------------------
@@ -288,28 +138,26 @@ def feedback_details_v2(
     topic: Optional[int] = Query(None),
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[int] = Query(None),  # next_cursor of the previous page (keyset paging)
+    count: str = Query("exact", pattern="^(exact|estimate|none)$"),
     db: Session = Depends(get_db),
 ):
-    q = db.query(StudentFeedback)
-
-    if batch is not None:
-        q = q.filter(StudentFeedback.batch == batch)
-    if department:
-        q = q.filter(StudentFeedback.department == department)
-    if course:
-        q = q.filter(StudentFeedback.course_name == course)
-    if instructor:
-        q = q.filter(StudentFeedback.instructor_name == instructor)
-    if sentiment:
-        q = q.filter(StudentFeedback.sentiment == sentiment)
-    if topic is not None:
-        q = q.filter(StudentFeedback.topic == topic)
-
-    total = q.count()
-    rows = q.order_by(StudentFeedback.id.desc()).offset(offset).limit(limit).all()
+    """
+    Newest first. Pass `cursor` (the previous page's next_cursor) instead of
+    `offset` for deep paging; count=estimate|none skips the per-request
+    COUNT(*) (see services/feedback_query.py).
+    """
+    filters = {
+        "batch": batch, "department": department, "course": course,
+        "instructor": instructor, "sentiment": sentiment, "topic": topic,
+    }
+    total, estimated = count_feedback(db, filters, mode=count)
+    rows, next_cursor = feedback_page(db, filters, limit=limit, offset=offset, cursor=cursor)
 
     return {
         "total": total,
+        "total_estimated": estimated,
+        "next_cursor": next_cursor,
         "items": [
             {
                 "id": r.id,
@@ -335,18 +183,32 @@ def feedback_details_v2(
 # -----------------------------
 # Filter helper endpoints (for dropdowns)
 # -----------------------------
+@router.get("/facets")
+def get_facets(
+    batch: Optional[int] = None,
+    department: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    All dropdown values with row counts in one call:
+    {"batches": [{"value", "count"}], "departments", "courses", "instructors", "topics", "total"}.
+    Cached in-process; refreshed after feedback uploads (services/feedback_query.py).
+    """
+    return feedback_facets(db, batch=batch, department=department)
+
+
+def _facet_values(db: Session, name: str, batch: Optional[int] = None, department: Optional[str] = None):
+    return [f["value"] for f in feedback_facets(db, batch=batch, department=department)[name]]
+
+
 @router.get("/batches")
 def get_batches(db: Session = Depends(get_db)):
-    rows = db.query(StudentFeedback.batch).distinct().all()
-    vals = sorted([r[0] for r in rows if r[0] is not None])
-    return vals
+    return _facet_values(db, "batches")
 
 
 @router.get("/departments")
 def get_departments(db: Session = Depends(get_db)):
-    rows = db.query(StudentFeedback.department).distinct().all()
-    vals = sorted([r[0] for r in rows if r[0]])
-    return vals
+    return _facet_values(db, "departments")
 
 
 @router.get("/courses")
@@ -355,13 +217,7 @@ def get_courses(
     department: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    q = db.query(StudentFeedback.course_name).distinct()
-    if batch is not None:
-        q = q.filter(StudentFeedback.batch == batch)
-    if department:
-        q = q.filter(StudentFeedback.department == department)
-    rows = q.all()
-    return sorted([r[0] for r in rows if r[0]])
+    return _facet_values(db, "courses", batch, department)
 
 
 @router.get("/instructors")
@@ -370,13 +226,7 @@ def get_instructors(
     department: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    q = db.query(StudentFeedback.instructor_name).distinct()
-    if batch is not None:
-        q = q.filter(StudentFeedback.batch == batch)
-    if department:
-        q = q.filter(StudentFeedback.department == department)
-    rows = q.all()
-    return sorted([r[0] for r in rows if r[0]])
+    return _facet_values(db, "instructors", batch, department)
 
 
 @router.get("/topics")
@@ -385,10 +235,25 @@ def get_topics(
     department: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    q = db.query(StudentFeedback.topic).distinct()
-    if batch is not None:
-        q = q.filter(StudentFeedback.batch == batch)
-    if department:
-        q = q.filter(StudentFeedback.department == department)
-    rows = q.all()
-    return sorted([r[0] for r in rows if r[0] is not None])
+    return _facet_values(db, "topics", batch, department)
+
+
+@router.get("/topic-keywords")
+def get_topic_keywords(
+    top_n: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """c-TF-IDF keywords per topic id (cached per topic model version)."""
+    return topic_keywords(db, top_n=top_n)
+
+
+@router.get("/similar")
+def get_similar_feedback(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    batch: Optional[int] = None,
+    department: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Feedback comments most similar to `q` (stored MiniLM embeddings, cosine)."""
+    return similar_feedback(db, q, limit=limit, batch=batch, department=department)
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from pathlib import Path
 from datetime import datetime, timezone
-import os, zipfile, tempfile
+import os
+import uuid
 from typing import Optional, Tuple
 
 from core.db import SessionLocal
@@ -10,8 +10,10 @@ from .auth import get_current_user
 from models.course import Course
 from models.uploads import Upload, UploadText, UploadFileItem
 from schemas.upload import UploadItem, UploadResponse
-from services.upload_adapter import parse_document
+from services.upload_adapter import parse_bytes
+from services.zip_ingest import ingest_zip
 from services.storage import save_bytes
+from services.upload_service import VALIDATION_MAX_CHARS, compute_validation, delete_upload, set_validation
 
 
 router = APIRouter(prefix="/upload", tags=["Uploads"])
@@ -29,47 +31,14 @@ def _ext_of(filename: str) -> str:
     return os.path.splitext(filename)[1].lower().lstrip(".") or "bin"
 
 
-# --- validation spec (simple heuristic you can tune)
-REQUIRED_SECTIONS = [
-    ("course objectives", "course_objectives"),
-    ("clo", "clos"),
-    ("lecture", "lecture_notes"),
-    ("quiz", "quizzes"),
-    ("assignment", "assignments"),
-    ("midterm", "midterm"),
-    ("final exam", "final_exam"),
-    ("attendance", "attendance"),
-    ("grading", "grading_rubric"),
-]
-
-
 def _sanitize_text(s: str | None) -> str | None:
     if s is None:
         return None
     return s.replace("\x00", "")
 
 
-def _compute_validation(texts: list[str]) -> tuple[str, dict]:
-    big = "\n".join(t or "" for t in texts)[:2_000_000].lower()
-    present = {key: False for _, key in REQUIRED_SECTIONS}
-    for needle, key in REQUIRED_SECTIONS:
-        present[key] = (needle in big)
-
-    total = len(present)
-    found = sum(1 for v in present.values() if v)
-    pct = round(found / total * 100) if total else 0
-    missing = [k for k, v in present.items() if not v]
-    status_str = "complete" if pct >= 80 else ("incomplete" if found else "invalid")
-
-    return status_str, {
-        "completeness_percentage": pct,
-        "missing_items": missing,
-        "found": [k for k, v in present.items() if v],
-    }
-
-
-def _parse_path_to_text(path: Path) -> Tuple[Optional[str], Optional[int]]:
-    out = parse_document(str(path)) or {}
+def _text_and_pages(out: dict) -> Tuple[Optional[str], Optional[int]]:
+    out = out or {}
     text = _sanitize_text(out.get("text"))
     pages = out.get("pages")
     try:
@@ -79,14 +48,6 @@ def _parse_path_to_text(path: Path) -> Tuple[Optional[str], Optional[int]]:
     return text, pages
 
 
-def _parse_bytes_temp(filename: str, data: bytes) -> Tuple[Optional[str], Optional[int]]:
-    suffix = Path(filename).suffix.lower() or ".bin"
-    with tempfile.NamedTemporaryFile(delete=True, suffix=suffix) as tf:
-        tf.write(data)
-        tf.flush()
-        return _parse_path_to_text(Path(tf.name))
-
-
 @router.post("/{course_id}", response_model=UploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_course_folder(
     course_id: str,
@@ -110,7 +71,7 @@ async def upload_course_folder(
         ext = _ext_of(f.filename)
 
         # Save the top-level file (local by default; can be switched to gdrive)
-        saved = save_bytes(namespace=f"uploads/{course_id}", filename=f.filename, data=raw_bytes)
+        saved = save_bytes(namespace=f"uploads/{course_id}", filename=f.filename, data=raw_bytes, db=db)
 
         now = datetime.utcnow()
         up = Upload(
@@ -126,6 +87,7 @@ async def upload_course_folder(
             storage_backend=saved["backend"],
             storage_key=saved["key"],
             storage_url=saved.get("url"),
+            blob_sha256=saved.get("sha256"),
         )
         db.add(up)
         db.flush()
@@ -146,39 +108,32 @@ async def upload_course_folder(
             )
 
         if ext == "zip":
-            # Expand in memory; parse each supported member
+            # Parse supported members straight from the archive in the worker pool
             try:
-                with tempfile.NamedTemporaryFile(delete=True, suffix=".zip") as ztf:
-                    ztf.write(raw_bytes)
-                    ztf.flush()
-                    with zipfile.ZipFile(ztf.name, "r") as zf:
-                        for zi in zf.infolist():
-                            if zi.is_dir():
-                                continue
-                            name = zi.filename
-                            low = name.lower()
-                            if not low.endswith((".pdf", ".docx", ".doc", ".txt")):
-                                continue
-
-                            member_bytes = zf.read(zi)
-                            mem_ext = _ext_of(name)
-                            t, p = _parse_bytes_temp(name, member_bytes)
-                            if t:
-                                texts.append(t)
-                            if p:
-                                pages_total += p
-
-                            add_file_item(
-                                name=Path(name).name,
-                                ext_=mem_ext,
-                                b=len(member_bytes),
-                                pages=p,
-                                text_chars=(len(t) if t else None),
-                            )
+                ingested = ingest_zip(
+                    raw_bytes,
+                    exts={".pdf", ".docx", ".doc", ".txt"},
+                    max_files=None,
+                    max_chars=VALIDATION_MAX_CHARS,
+                )
+                for m in ingested["files"]:
+                    t, p = _text_and_pages(m["parsed"])
+                    if t:
+                        texts.append(t)
+                    if p:
+                        pages_total += p
+
+                    add_file_item(
+                        name=m["filename"],
+                        ext_=_ext_of(m["name"]),
+                        b=m["bytes"],
+                        pages=p,
+                        text_chars=(len(t) if t else None),
+                    )
             except Exception as e:
                 up.parse_log = [{"zip_error": str(e)}]
         else:
-            t, p = _parse_bytes_temp(f.filename, raw_bytes)
+            t, p = _text_and_pages(parse_bytes(raw_bytes, f.filename, max_chars=VALIDATION_MAX_CHARS))
             if t:
                 texts.append(t)
             if p:
@@ -192,7 +147,7 @@ async def upload_course_folder(
                 text_chars=(len(t) if t else None),
             )
 
-        status_str, details = _compute_validation(texts)
+        status_str, details = set_validation(up, texts)
 
         joined = _sanitize_text("\n\n".join(texts) if texts else None)
         ut = UploadText(
@@ -247,16 +202,24 @@ def list_uploads(course_id: str, db: Session = Depends(get_db), current=Depends(
     if not rows:
         return []
 
-    text_map = {
-        t.upload_id: t
-        for t in db.query(UploadText).filter(UploadText.upload_id.in_([r.id for r in rows])).all()
-    }
+    # validation is stored at upload time; rows from before that are scored
+    # here (read-only) until tools/backfill_upload_validation.py has run
+    legacy_ids = [r.id for r in rows if r.validation_status is None]
+    text_map = {}
+    if legacy_ids:
+        text_map = dict(
+            db.query(UploadText.upload_id, UploadText.text)
+            .filter(UploadText.upload_id.in_(legacy_ids))
+            .all()
+        )
 
     out = []
     for r in rows:
-        txt = text_map.get(r.id)
-        texts = [txt.text] if (txt and txt.text) else []
-        status_str, details = _compute_validation(texts)
+        if r.validation_status is None:
+            txt = text_map.get(r.id)
+            status_str, details = compute_validation([txt] if txt else [])
+        else:
+            status_str, details = r.validation_status, r.validation_details
         out.append(
             {
                 "id": str(r.id),
@@ -271,3 +234,26 @@ def list_uploads(course_id: str, db: Session = Depends(get_db), current=Depends(
             }
         )
     return out
+
+
+@router.delete("/{course_id}/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def remove_upload(
+    course_id: str,
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current=Depends(get_current_user),
+):
+    role = (current.get("role") if isinstance(current, dict) else getattr(current, "role", "")) or ""
+    if not any(k in role.lower() for k in ["instructor", "faculty", "admin"]):
+        raise HTTPException(status_code=403, detail="Only instructor/faculty/admin can delete uploads.")
+
+    try:
+        up = db.get(Upload, uuid.UUID(upload_id))
+    except ValueError:
+        up = None
+    if not up or up.course_id != course_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    # releases the blob reference; tools/storage_gc.py reclaims the file
+    delete_upload(db, up)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
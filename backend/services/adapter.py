@@ -44,3 +44,8 @@ def parse_document(path: str) -> Dict[str, Any]:
 
     # Fallback
     return {"ext": os.path.splitext(path)[1].lstrip(".").lower()}
+
+
+def parse_bytes(data: bytes, filename: str, **kwargs) -> Dict[str, Any]:
+    """Parse in-memory file bytes; `filename` supplies the type. No temp file."""
+    return parser.parse_bytes(data, filename, **kwargs)
@@ -1,10 +1,8 @@
 # services/alignment.py
 from typing import List, Dict
-from sentence_transformers import SentenceTransformer, util
 import numpy as np
 
-# Load once (will download model on first run)
-_MODEL = SentenceTransformer("all-MiniLM-L6-v2")
+from services.model_registry import get_model
 
 def align_clos_to_assessments(clos: List[str], assessments: List[Dict[str, str]]) -> Dict:
     """
@@ -25,9 +23,12 @@ def align_clos_to_assessments(clos: List[str], assessments: List[Dict[str, str]]
             "alignment": {}
         }
 
-    # embeddings
-    clo_emb = _MODEL.encode(clos, convert_to_tensor=True)
-    ass_emb = _MODEL.encode(ass_names, convert_to_tensor=True)
+    # embeddings (shared model, loaded on first use)
+    from sentence_transformers import util
+
+    model = get_model("minilm")
+    clo_emb = model.encode(clos, convert_to_tensor=True)
+    ass_emb = model.encode(ass_names, convert_to_tensor=True)
 
     pairs = []
     top_scores = []
@@ -1,7 +1,7 @@
 import json
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple
 from models.course_clo import CourseCLO
 from sqlalchemy.orm import Session
 
@@ -9,7 +9,10 @@ from models.course import Course
 from models.uploads import Upload, UploadText
 from models.assessment import Assessment, AssessmentFile, AssessmentExpectedAnswers, AssessmentCLOAlignment
 from services.upload_adapter import parse_document
+from services.storage import save_blob
 from services.openrouter_client import call_openrouter_json
+from services.text_sanitize import sanitize_text
+from services.upload_service import set_validation
 from datetime import datetime, timezone, date as dt_date
 
 
@@ -21,22 +24,6 @@ def utcnow():
     return datetime.now(timezone.utc)
 
 
-def clean_text(val: Optional[str]) -> str:
-    if not val:
-        return ""
-    if not isinstance(val, str):
-        val = str(val)
-    val = val.replace("\x00", "")
-    out = []
-    for ch in val:
-        o = ord(ch)
-        if ch in ("\n", "\r", "\t"):
-            out.append(ch)
-        elif o >= 32:
-            out.append(ch)
-    return "".join(out).strip()
-
-
 def _read_prompt(rel_path: str) -> str:
     p = Path(__file__).resolve().parent / "ai_prompts" / rel_path
     return p.read_text(encoding="utf-8")
@@ -75,22 +62,17 @@ def save_questions_file_and_extract_text(
     course_id: str,
     file_bytes: bytes,
     filename: str,
-    storage_root: str = "uploads/assessments",
 ) -> AssessmentFile:
     ext = (Path(filename).suffix or "").lower()
     if ext not in ALLOWED_Q_EXTS:
         raise ValueError("Only PDF/DOCX allowed for questions file")
 
     now = utcnow()
-    base_dir = Path(storage_root) / str(course_id) / str(assessment_id)
-    base_dir.mkdir(parents=True, exist_ok=True)
-
     stored_name = f"questions_{int(now.timestamp()*1000)}{ext}"
-    stored_path = base_dir / stored_name
-    stored_path.write_bytes(file_bytes)
+    saved = save_blob(stored_name, file_bytes, db=db)
 
-    parsed = parse_document(str(stored_path)) or {}
-    extracted = clean_text(parsed.get("text") or "")[:MAX_TEXT]
+    parsed = parse_document(saved["local_path"], max_chars=MAX_TEXT) or {}
+    extracted = sanitize_text(parsed.get("text"), max_chars=MAX_TEXT)
 
     # Save Upload (matches your Upload model fields)
     up = Upload(
@@ -101,9 +83,13 @@ def save_questions_file_and_extract_text(
         file_type_guess="assessment_questions",
         week_no=None,
         bytes=len(file_bytes),
+        storage_backend="local",
+        storage_key=saved["key"],
+        blob_sha256=saved["sha256"],
         parse_log=[],
         created_at=datetime.utcnow(),
     )
+    set_validation(up, [extracted])
     db.add(up)
     db.flush()
 
@@ -132,7 +118,7 @@ def save_questions_file_and_extract_text(
     return af
 
 
-def ai_extract_questions(db: Session, assessment: Assessment) -> Dict[str, Any]:
+def ai_extract_questions(db: Session, assessment: Assessment, force: bool = False) -> Dict[str, Any]:
     # pick latest questions file text
     af = (
         db.query(AssessmentFile)
@@ -147,22 +133,26 @@ def ai_extract_questions(db: Session, assessment: Assessment) -> Dict[str, Any]:
     schema_hint = '{"questions":[{"question_no":1,"question_text":"...","marks":5}],"total_questions":10}'
     user = f"ASSESSMENT_TEXT:\n{af.extracted_text[:MAX_TEXT]}"
 
-    parsed, meta = call_openrouter_json(system=system, user=user, schema_hint=schema_hint, temperature=0.2)
+    parsed, meta = call_openrouter_json(
+        system=system, user=user, schema_hint=schema_hint, temperature=0.2, use_cache=not force
+    )
     # store on file record for convenience
     # (optional: you can store parsed questions in another table later)
     return {"questions_json": parsed, "meta": meta}
 
 
-def ai_generate_expected_answers(db: Session, assessment: Assessment) -> AssessmentExpectedAnswers:
+def ai_generate_expected_answers(db: Session, assessment: Assessment, force: bool = False) -> AssessmentExpectedAnswers:
     # Step 1: extract questions via AI
-    qpack = ai_extract_questions(db, assessment)
+    qpack = ai_extract_questions(db, assessment, force=force)
     questions_json = qpack["questions_json"]
 
     system = _read_prompt("expected_answers_v1.txt")
     schema_hint = '{"total_questions":10,"answers":[{"question_no":1,"expected_answer":"...","key_points":["a"],"marks_split":[{"point":"a","marks":2}]}]}'
     user = f"ASSESSMENT_TITLE: {assessment.title}\nMAX_MARKS: {assessment.max_marks}\nQUESTIONS_JSON:\n{json.dumps(questions_json, ensure_ascii=False)}"
 
-    parsed, meta = call_openrouter_json(system=system, user=user, schema_hint=schema_hint, temperature=0.25)
+    parsed, meta = call_openrouter_json(
+        system=system, user=user, schema_hint=schema_hint, temperature=0.25, use_cache=not force
+    )
 
     # upsert expected
     exp = (
@@ -186,7 +176,7 @@ def ai_generate_expected_answers(db: Session, assessment: Assessment) -> Assessm
     return exp
 
 
-def ai_clo_alignment(db: Session, assessment: Assessment) -> AssessmentCLOAlignment:
+def ai_clo_alignment(db: Session, assessment: Assessment, force: bool = False) -> AssessmentCLOAlignment:
     """Align assessment questions against course CLOs.
 
     ✅ Preferred source: latest `course_clos` upload record (CourseCLO.clos_text)
@@ -241,14 +231,16 @@ def ai_clo_alignment(db: Session, assessment: Assessment) -> AssessmentCLOAlignm
         db.refresh(align)
         return align
 
-    qpack = ai_extract_questions(db, assessment)
+    qpack = ai_extract_questions(db, assessment, force=force)
     questions_json = qpack["questions_json"]
 
     system = _read_prompt("clo_align_v1.txt")
     schema_hint = '{"per_question":[{"question_no":1,"clo":"CLO-1","confidence":0.8}],"per_clo":{"CLO-1":50},"coverage_percent":100}'
     user = f"CLO_LIST:\n{json.dumps(clos_list, ensure_ascii=False)}\n\nQUESTIONS_JSON:\n{json.dumps(questions_json, ensure_ascii=False)}"
 
-    parsed, meta = call_openrouter_json(system=system, user=user, schema_hint=schema_hint, temperature=0.2)
+    parsed, meta = call_openrouter_json(
+        system=system, user=user, schema_hint=schema_hint, temperature=0.2, use_cache=not force
+    )
 
     align = (
         db.query(AssessmentCLOAlignment)
@@ -1,8 +1,8 @@
-import math
 import re
 from typing import List, Dict, Any
 
 from services.openrouter_embeddings import embed_texts
+from services.similarity import best_match
 
 
 # ------------------------- helpers -------------------------
@@ -27,16 +27,6 @@ def _tokens(text: str):
         if w not in STOPWORDS and not w.isdigit()
     ]
 
-def _cos(a, b) -> float:
-    dot = na = nb = 0.0
-    for x, y in zip(a, b):
-        dot += x * y
-        na += x * x
-        nb += y * y
-    if na <= 0 or nb <= 0:
-        return 0.0
-    return dot / (math.sqrt(na) * math.sqrt(nb))
-
 def _clean_items(items: List[str]) -> List[str]:
     out, seen = [], set()
     for x in items:
@@ -75,22 +65,15 @@ def run_clo_alignment(
     clo_emb = embed_texts(clos)
     ass_emb = embed_texts(assessment_names)
 
-    clo_vecs = clo_emb["vectors"]
-    ass_vecs = ass_emb["vectors"]
+    best_idx, best_scores = best_match(clo_emb["vectors"], ass_emb["vectors"])
 
     pairs = []
     alignment = {}
     top_scores = []
 
     for i, clo in enumerate(clos):
-        best_score = -1.0
-        best_j = -1
-
-        for j, ass in enumerate(assessment_names):
-            s = _cos(clo_vecs[i], ass_vecs[j])
-            if s > best_score:
-                best_score = s
-                best_j = j
+        best_score = float(best_scores[i])
+        best_j = int(best_idx[i])
 
         best_ass = assessment_names[best_j] if best_j >= 0 else ""
 
@@ -0,0 +1,142 @@
+"""
+Per-comment classifier cache for feedback ingestion, keyed by
+sha256(model ids + token limit + normalized comment).
+
+Holds the raw sentiment label/score and emotion label that
+`feedback_ingest.analyze_frame` computes for a distinct comment; the
+sentence embeddings live in services/feedback_embeddings.py (the legacy
+`embedding` column is no longer written). Re-uploading a survey, or
+`replace=true` reloads, only run the models on comments never seen before.
+Changing a model id or the token limit changes every key, so stale results
+are never served.
+
+Backends (COMMENT_CACHE_BACKEND):
+  sqlite   (default) local file at COMMENT_CACHE_PATH
+  off      no caching
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+
+COMMENT_CACHE_BACKEND = os.getenv("COMMENT_CACHE_BACKEND", "sqlite").lower()
+COMMENT_CACHE_PATH = Path(os.getenv("COMMENT_CACHE_PATH", "storage/cache/comment_cache.sqlite3"))
+
+_LOOKUP_CHUNK = 500
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] = _stats.get(name, 0) + n
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        out: Dict[str, Any] = dict(_stats)
+    lookups = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else None
+    out["backend"] = COMMENT_CACHE_BACKEND
+    return out
+
+
+def comment_key(model_tag: str, text: str) -> str:
+    return hashlib.sha256(f"{model_tag}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class SQLiteCommentCache:
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as c:
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS comment_cache ("
+                " key TEXT PRIMARY KEY, sentiment_label TEXT NOT NULL, sentiment_score REAL NOT NULL,"
+                " emotion TEXT NOT NULL, embedding BLOB, created_at REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        c = self._conn()
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            part = keys[i:i + _LOOKUP_CHUNK]
+            rows = c.execute(
+                "SELECT key, sentiment_label, sentiment_score, emotion FROM comment_cache"
+                f" WHERE key IN ({','.join('?' * len(part))})",
+                part,
+            ).fetchall()
+            for key, label, score, emotion in rows:
+                out[key] = {"sentiment_label": label, "sentiment_score": score, "emotion": emotion}
+        return out
+
+    def set_many(self, items: Dict[str, Dict[str, Any]]) -> None:
+        now = time.time()
+        rows = [
+            (key, v["sentiment_label"], float(v["sentiment_score"]), v["emotion"], now)
+            for key, v in items.items()
+        ]
+        c = self._conn()
+        with c:
+            c.executemany(
+                "INSERT OR REPLACE INTO comment_cache"
+                " (key, sentiment_label, sentiment_score, emotion, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _get_backend():
+    global _backend
+    if COMMENT_CACHE_BACKEND == "off":
+        return None
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = SQLiteCommentCache(COMMENT_CACHE_PATH)
+    return _backend
+
+
+def lookup_many(keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    keys = list(keys)
+    try:
+        backend = _get_backend()
+        found = backend.get_many(keys) if backend else {}
+    except Exception:
+        _count("errors")
+        found = {}
+    _count("hits", len(found))
+    _count("misses", len(keys) - len(found))
+    return found
+
+
+def store_many(items: Dict[str, Dict[str, Any]]) -> None:
+    if not items:
+        return
+    try:
+        backend = _get_backend()
+        if backend:
+            backend.set_many(items)
+            _count("stores", len(items))
+    except Exception:
+        _count("errors")
@@ -1,8 +1,23 @@
 from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
 from sqlalchemy.orm import Session
 from models.uploads import UploadText, Upload, UploadFileItem
 from models.completeness import RequiredArtifact, CompletenessRun
+from services.text_matcher import KeywordMatcher
 from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Completeness is split into:
+#   evaluate_completeness  read-only; memoized by (upload_id, rule-set version)
+#   record_completeness    evaluate + insert a CompletenessRun (explicit history)
+# Uploads never change after ingestion, so the result for an upload only
+# changes when the rules for its scope do; the version is a hash of them.
+
+COMPLETENESS_MEMO_SIZE = int(os.getenv("COMPLETENESS_MEMO_SIZE", "1024"))
 
 def utcnow():
     return datetime.now(timezone.utc)
@@ -31,7 +46,7 @@ DEFAULT_RULES = [
      "patterns": ["quiz", "activity", "class test"], "keywords": ["quiz"], "weight": 1},
 ]
 
-def ensure_default_rules(db: Session):
+def ensure_default_rules(db: Session, commit: bool = True):
     existing = db.query(RequiredArtifact).all()
     keyset = {(r.scope, r.name) for r in existing}
 
@@ -52,58 +67,168 @@ def ensure_default_rules(db: Session):
         added += 1
 
     if added:
-        db.commit()
+        db.commit() if commit else db.flush()
 
-def run_completeness(db: Session, course_id: str, upload_id, week_no: int | None):
-    ensure_default_rules(db)
 
-    upload = db.get(Upload, upload_id) if upload_id else None
-    if not upload:
-        raise ValueError("upload_id not found")
+def _load_rules(db: Session, scope: str) -> List[Dict[str, Any]]:
+    """Rules for a scope; DEFAULT_RULES when none are seeded yet (read-only, no insert)."""
+    rows = db.query(RequiredArtifact).filter(RequiredArtifact.scope == scope).all()
+    src = (
+        [{"name": r.name, "patterns": r.patterns, "keywords": r.keywords, "weight": r.weight} for r in rows]
+        if rows
+        else [r for r in DEFAULT_RULES if r["scope"] == scope]
+    )
+    rules = [
+        {
+            "name": r["name"],
+            "patterns": [p.lower() for p in (r.get("patterns") or [])],
+            "keywords": [k.lower() for k in (r.get("keywords") or [])],
+            "weight": float(r.get("weight") or 1),
+        }
+        for r in src
+    ]
+    rules.sort(key=lambda r: r["name"])
+    return rules
+
 
-    scope = "weekly" if (week_no is not None or (upload.file_type_guess or "") == "weekly_zip") else "course_folder"
+def rules_version(scope: str, rules: List[Dict[str, Any]]) -> str:
+    blob = json.dumps({"scope": scope, "rules": rules}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
 
-    files = db.query(UploadFileItem).filter(UploadFileItem.upload_id == upload.id).all()
-    filenames = [f.filename.lower() for f in files] if files else [upload.filename_original.lower()]
 
-    txt = db.query(UploadText).filter(UploadText.upload_id == upload.id).first()
-    big = (txt.text or "").lower() if txt else ""
+_matchers: Dict[str, Tuple[KeywordMatcher, KeywordMatcher]] = {}
+_matchers_lock = threading.Lock()
 
-    rules = db.query(RequiredArtifact).filter(RequiredArtifact.scope == scope).all()
 
-    total_w = sum(float(r.weight) for r in rules) or 1.0
+def _matchers_for(version: str, rules: List[Dict[str, Any]]) -> Tuple[KeywordMatcher, KeywordMatcher]:
+    """(filename matcher, text matcher), compiled once per rule-set version."""
+    m = _matchers.get(version)
+    if m is None:
+        m = (
+            KeywordMatcher(p for r in rules for p in r["patterns"]),
+            KeywordMatcher(k for r in rules for k in r["keywords"]),
+        )
+        with _matchers_lock:
+            _matchers[version] = m
+    return m
+
+
+def _score(scope: str, rules: List[Dict[str, Any]], filenames: List[str], big: str, version: str) -> Dict[str, Any]:
+    name_matcher, text_matcher = _matchers_for(version, rules)
+    # one scan over all file names and one over the text, for every rule at once
+    name_hits = name_matcher.found("\n".join(filenames)) if filenames else set()
+    text_hits = text_matcher.found(big)
+
+    total_w = sum(r["weight"] for r in rules) or 1.0
     found = {}
     missing = []
     score_w = 0.0
 
     for r in rules:
-        pats = [p.lower() for p in (r.patterns or [])]
-        keys = [k.lower() for k in (r.keywords or [])]
+        pats = r["patterns"]
+        keys = r["keywords"]
 
-        by_name = any(p in fn for fn in filenames for p in pats) if pats else False
-        by_text = any(k in big for k in keys) if keys else False
+        by_name = any(p in name_hits for p in pats) if pats else False
+        by_text = any(k in text_hits for k in keys) if keys else False
 
         ok = bool(by_name or by_text)
-        found[r.name] = {
+        found[r["name"]] = {
             "ok": ok,
             "by_name": by_name,
             "by_text": by_text,
-            "weight": float(r.weight),
+            "weight": r["weight"],
         }
         if ok:
-            score_w += float(r.weight)
+            score_w += r["weight"]
         else:
-            missing.append(r.name)
+            missing.append(r["name"])
 
     score_percent = round((score_w / total_w) * 100.0, 2)
 
-    result = {
+    return {
         "scope": scope,
         "score_percent": score_percent,
         "missing": missing,
         "details": found,
     }
 
+
+_memo: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _memo_get(key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    with _memo_lock:
+        val = _memo.get(key)
+        if val is not None:
+            _memo.move_to_end(key)
+        return val
+
+
+def _memo_put(key: Tuple[str, str], val: Dict[str, Any]) -> None:
+    with _memo_lock:
+        _memo[key] = val
+        _memo.move_to_end(key)
+        while len(_memo) > COMPLETENESS_MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
+def _scope_for(upload: Upload, week_no: Optional[int]) -> str:
+    return "weekly" if (week_no is not None or (upload.file_type_guess or "") == "weekly_zip") else "course_folder"
+
+
+def evaluate_completeness(db: Session, upload_id, week_no: int | None = None) -> Dict[str, Any]:
+    """
+    Read-only completeness for an upload. Served from the in-process memo,
+    else from the latest stored run with the same rule-set version, else
+    evaluated (and memoized) without writing anything.
+    """
+    upload = db.get(Upload, upload_id) if upload_id else None
+    if not upload:
+        raise ValueError("upload_id not found")
+
+    scope = _scope_for(upload, week_no)
+    rules = _load_rules(db, scope)
+    version = rules_version(scope, rules)
+    key = (str(upload.id), version)
+
+    hit = _memo_get(key)
+    if hit is not None:
+        return dict(hit)
+
+    stored = (
+        db.query(CompletenessRun.result_json)
+        .filter(CompletenessRun.upload_id == upload.id)
+        .order_by(CompletenessRun.created_at.desc())
+        .first()
+    )
+    if stored and isinstance(stored[0], dict) and stored[0].get("rules_version") == version:
+        result = stored[0]
+    else:
+        files = db.query(UploadFileItem.filename).filter(UploadFileItem.upload_id == upload.id).all()
+        filenames = [f.lower() for (f,) in files] if files else [upload.filename_original.lower()]
+
+        txt = db.query(UploadText.text).filter(UploadText.upload_id == upload.id).first()
+        big = (txt[0] or "").lower() if txt else ""
+
+        result = _score(scope, rules, filenames, big, version)
+        result["rules_version"] = version
+
+    _memo_put(key, result)
+    return dict(result)
+
+
+def record_completeness(
+    db: Session, course_id: str, upload_id, week_no: int | None, commit: bool = True
+) -> Dict[str, Any]:
+    """Evaluate and store a CompletenessRun (history). Use on upload / explicit runs only."""
+    ensure_default_rules(db, commit=commit)
+    # SessionLocal has autoflush off: make the caller's pending UploadFileItem /
+    # UploadText rows visible, or a fresh upload is scored (and memoized) as empty
+    db.flush()
+    result = evaluate_completeness(db, upload_id, week_no)
+    upload = db.get(Upload, upload_id)
+
     run = CompletenessRun(
         course_id=course_id,
         upload_id=upload.id,
@@ -112,6 +237,13 @@ def run_completeness(db: Session, course_id: str, upload_id, week_no: int | None
         created_at=utcnow(),
     )
     db.add(run)
-    db.commit()
-    db.refresh(run)
+    if commit:
+        db.commit()
+    else:
+        db.flush()
     return result
+
+
+def run_completeness(db: Session, course_id: str, upload_id, week_no: int | None):
+    """Explicit run: evaluate and record (POST /courses/{id}/completeness/run)."""
+    return record_completeness(db, course_id, upload_id, week_no)
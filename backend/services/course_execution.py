@@ -1,12 +1,16 @@
 # backend/services/course_execution.py
 from __future__ import annotations
+from collections import Counter
 from datetime import datetime, timezone, timedelta
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from models.course import Course
 from models.course_execution import WeeklyPlan, WeeklyExecution, DeviationLog
+from models.completeness import CompletenessRun
+from models.uploads import Upload
 
 
 def generate_weekly_plan_from_guide(
@@ -164,3 +168,85 @@ def update_deviations_for_course(
                 )
 
     db.commit()
+
+
+def weekly_progress_summary(db: Session, course_id: str, weeks: int = 16) -> Dict[str, Any]:
+    """
+    Per-week dashboard rows for a course in three read-only queries:
+    latest upload per week, every execution row, and the latest stored
+    completeness run per upload. Nothing is evaluated or written here.
+    """
+    rn = func.row_number().over(
+        partition_by=Upload.week_no, order_by=Upload.created_at.desc()
+    ).label("rn")
+    ranked = (
+        select(Upload.id, Upload.week_no, rn)
+        .where(Upload.course_id == course_id, Upload.week_no.between(1, weeks))
+        .subquery()
+    )
+    latest_upload = {
+        w: uid for uid, w in db.execute(select(ranked.c.id, ranked.c.week_no).where(ranked.c.rn == 1))
+    }
+
+    execs: Dict[int, Any] = {}
+    for row in db.execute(
+        select(
+            WeeklyExecution.week_number,
+            WeeklyExecution.coverage_percent,
+            WeeklyExecution.coverage_status,
+            WeeklyExecution.missing_topics,
+        ).where(WeeklyExecution.course_id == course_id, WeeklyExecution.week_number.between(1, weeks))
+    ):
+        execs.setdefault(row.week_number, row)
+
+    completeness: Dict[Any, Optional[float]] = {}
+    if latest_upload:
+        crn = func.row_number().over(
+            partition_by=CompletenessRun.upload_id, order_by=CompletenessRun.created_at.desc()
+        ).label("rn")
+        runs = (
+            select(CompletenessRun.upload_id, CompletenessRun.result_json, crn)
+            .where(CompletenessRun.upload_id.in_(list(latest_upload.values())))
+            .subquery()
+        )
+        for uid, result in db.execute(select(runs.c.upload_id, runs.c.result_json).where(runs.c.rn == 1)):
+            score = result.get("score_percent") if isinstance(result, dict) else None
+            completeness[uid] = float(score) if score is not None else None
+
+    out_weeks = []
+    weeks_behind = []
+    missing_counter: Counter = Counter()
+
+    for w in range(1, weeks + 1):
+        uid = latest_upload.get(w)
+        exe = execs.get(w)
+
+        coverage_percent = float(exe.coverage_percent or 0) if exe else 0.0
+        coverage_status = exe.coverage_status if exe else ("skipped" if not uid else "behind")
+        completeness_percent = completeness.get(uid) if uid else None
+
+        if coverage_status == "behind":
+            weeks_behind.append(w)
+
+        # aggregate missing topics
+        if exe and exe.missing_topics:
+            for line in exe.missing_topics.split("\n"):
+                t = line.strip().lower()
+                if t:
+                    missing_counter[t] += 1
+
+        out_weeks.append({
+            "week_no": w,
+            "has_upload": bool(uid),
+            "upload_id": str(uid) if uid else None,
+            "coverage_percent": round(coverage_percent, 2),
+            "coverage_status": coverage_status,
+            "completeness_percent": round(completeness_percent, 2) if completeness_percent is not None else None,
+        })
+
+    return {
+        "course_id": course_id,
+        "weeks": out_weeks,
+        "weeks_behind": weeks_behind,
+        "top_missing_topics": [{"topic": k, "count": v} for k, v in missing_counter.most_common(20)],
+    }
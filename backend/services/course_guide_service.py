@@ -10,23 +10,16 @@ from sqlalchemy.orm import Session
 from models.course import Course
 from models.course_execution import WeeklyPlan
  # adjust name if your file is weekly_plans.py
-
-UPLOAD_ROOT = Path("uploads") / "course_guides"
+from services.storage import blob_sha_of, release_blob, save_fileobj
 
 def _safe_filename(name: str) -> str:
     name = name.replace("\\", "/").split("/")[-1]
     return re.sub(r"[^a-zA-Z0-9._-]", "_", name)
 
-def save_upload(course_id: str, file: UploadFile) -> str:
-    UPLOAD_ROOT.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    fname = f"{course_id}_{ts}_{_safe_filename(file.filename or 'course_guide')}"
-    fpath = UPLOAD_ROOT / fname
-
-    with open(fpath, "wb") as f:
-        f.write(file.file.read())
-
-    return str(fpath)
+def save_upload(course_id: str, file: UploadFile, db: Optional[Session] = None) -> str:
+    # content-addressed: re-uploading the same guide reuses the stored blob
+    saved = save_fileobj(_safe_filename(file.filename or "course_guide"), file.file, db=db)
+    return saved["local_path"]
 
 def extract_text_best_effort(file_path: str) -> str:
     """
@@ -113,6 +106,8 @@ def set_course_guide_metadata(db: Session, course: Course, file_path: str, extra
     Store guide path + extracted text in Course row for quick access.
     Uses existing flexible fields to avoid new tables for now.
     """
+    if hasattr(course, "course_guide_path"):
+        release_blob(db, blob_sha_of(course.course_guide_path))  # the replaced guide's reference
     course.course_guide_path = file_path if hasattr(course, "course_guide_path") else None
     course.course_guide_text = extracted_text[:20000] if hasattr(course, "course_guide_text") else None
     db.commit()
@@ -0,0 +1,161 @@
+"""
+Vector cache for `embed_texts`, keyed by (model, sha256(text)).
+
+Vectors are stored as raw float16 (default) or float32 bytes.
+
+Backends (EMBED_CACHE_BACKEND):
+  sqlite   (default) local file at EMBED_CACHE_PATH
+  postgres `embedding_cache` table in the app database
+  off      no caching
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+EMBED_CACHE_BACKEND = os.getenv("EMBED_CACHE_BACKEND", "sqlite").lower()
+EMBED_CACHE_PATH = Path(os.getenv("EMBED_CACHE_PATH", "storage/cache/embeddings.sqlite3"))
+EMBED_CACHE_DTYPE = os.getenv("EMBED_CACHE_DTYPE", "float16").lower()  # float16 | float32
+
+
+def encode_vector(vec) -> Tuple[bytes, int, str]:
+    dtype = "float32" if EMBED_CACHE_DTYPE == "float32" else "float16"
+    arr = np.asarray(vec, dtype="<f4").astype("<f2" if dtype == "float16" else "<f4")
+    return arr.tobytes(), int(arr.shape[0]), dtype
+
+
+def decode_vector(data: bytes, dtype: str) -> np.ndarray:
+    return np.frombuffer(data, dtype="<f2" if dtype == "float16" else "<f4").astype(np.float32)
+
+
+def as_stored(vec) -> np.ndarray:
+    """`vec` at the precision a cache hit returns it (float32 values of EMBED_CACHE_DTYPE)."""
+    data, _, dtype = encode_vector(vec)
+    return decode_vector(data, dtype)
+
+
+# ----------------------- sqlite backend -----------------------
+
+class SQLiteEmbeddingCache:
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as c:
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                " model TEXT NOT NULL, text_hash TEXT NOT NULL,"
+                " dim INTEGER NOT NULL, dtype TEXT NOT NULL, vector BLOB NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (model, text_hash))"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        out: Dict[str, np.ndarray] = {}
+        c = self._conn()
+        # stay well under SQLITE_MAX_VARIABLE_NUMBER
+        for i in range(0, len(hashes), 500):
+            part = hashes[i:i + 500]
+            marks = ",".join("?" * len(part))
+            rows = c.execute(
+                f"SELECT text_hash, dtype, vector FROM embedding_cache WHERE model = ? AND text_hash IN ({marks})",
+                [model, *part],
+            ).fetchall()
+            for h, dtype, blob in rows:
+                out[h] = decode_vector(blob, dtype)
+        return out
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, List[float]]]) -> None:
+        now = time.time()
+        rows = []
+        for h, vec in items:
+            blob, dim, dtype = encode_vector(vec)
+            rows.append((model, h, dim, dtype, blob, now))
+        c = self._conn()
+        with c:
+            c.executemany("INSERT OR REPLACE INTO embedding_cache VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+
+# ----------------------- postgres backend -----------------------
+
+class DBEmbeddingCache:
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        from core.db import SessionLocal
+        from models.embedding_cache import EmbeddingCache
+
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(EmbeddingCache.text_hash, EmbeddingCache.dtype, EmbeddingCache.vector)
+                .filter(EmbeddingCache.model == model, EmbeddingCache.text_hash.in_(hashes))
+                .all()
+            )
+            return {h: decode_vector(bytes(blob), dtype) for h, dtype, blob in rows}
+        finally:
+            db.close()
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, List[float]]]) -> None:
+        from core.db import SessionLocal
+        from models.embedding_cache import EmbeddingCache
+
+        db = SessionLocal()
+        try:
+            for h, vec in items:
+                blob, dim, dtype = encode_vector(vec)
+                db.merge(EmbeddingCache(model=model, text_hash=h, dim=dim, dtype=dtype, vector=blob))
+            db.commit()
+        finally:
+            db.close()
+
+
+# ----------------------- facade -----------------------
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _get_backend():
+    global _backend
+    if EMBED_CACHE_BACKEND == "off":
+        return None
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = DBEmbeddingCache() if EMBED_CACHE_BACKEND == "postgres" else SQLiteEmbeddingCache(EMBED_CACHE_PATH)
+    return _backend
+
+
+def lookup(model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+    """Return cached vectors for the given hashes (missing ones are absent)."""
+    backend = _get_backend()
+    if not backend or not hashes:
+        return {}
+    try:
+        return backend.get_many(model, list(dict.fromkeys(hashes)))
+    except Exception:
+        return {}
+
+
+def store(model: str, items: List[Tuple[str, List[float]]]) -> None:
+    backend = _get_backend()
+    if not backend or not items:
+        return
+    try:
+        backend.put_many(model, items)
+    except Exception:
+        pass
@@ -0,0 +1,255 @@
+"""
+Persisted MiniLM embeddings of feedback comments, shared by ingestion,
+the topic model, similarity search and offline analysis (analyze_feedback.py).
+
+Layout under FEEDBACK_EMBED_ROOT/<sentence model>/:
+  vectors.f16    append-only float16 matrix (rows x dim) of unit-normalized
+                 vectors, read via np.memmap
+  index.sqlite3  comment key -> row number
+  meta.json      {"dim": ..., "model": ...}
+
+A comment key is sha256 of the normalized comment (normalize_comment);
+student_feedback.comment_key stores it per row, so search hits map straight
+back to feedback rows. Each distinct comment is encoded once per sentence
+model, whichever path sees it first.
+
+Appends take an exclusive file lock, so the API and workers can add rows
+concurrently; readers never lock and simply see the rows that existed when
+their memmap was (re)opened.
+"""
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.student_feedback import StudentFeedback
+from services.model_registry import SENTENCE_MODEL, get_model
+
+
+FEEDBACK_EMBED_ROOT = Path(os.getenv("FEEDBACK_EMBED_ROOT", "storage/embeddings/feedback"))
+
+_LOOKUP_CHUNK = 500
+_SEARCH_BLOCK = 65536
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_comment(text: str) -> str:
+    """NFKC + collapsed whitespace; the text the models see and the key space."""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def comment_key(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.vec_path = root / "vectors.f16"
+        self.meta_path = root / "meta.json"
+        self.lock_path = root / ".lock"
+        self._local = threading.local()
+        self._mm: Optional[np.memmap] = None
+        self._mm_lock = threading.Lock()
+        with self._conn() as c:
+            c.execute("CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+            c.execute("CREATE INDEX IF NOT EXISTS ix_vectors_row ON vectors (row)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.root / "index.sqlite3"), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.lock_path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @property
+    def dim(self) -> Optional[int]:
+        try:
+            return int(json.loads(self.meta_path.read_text())["dim"])
+        except (FileNotFoundError, KeyError, ValueError):
+            return None
+
+    def _rows_on_disk(self, dim: int) -> int:
+        try:
+            return self.vec_path.stat().st_size // (dim * 2)
+        except FileNotFoundError:
+            return 0
+
+    def matrix(self) -> np.ndarray:
+        """Read-only (rows x dim) float16 view of every stored vector."""
+        dim = self.dim
+        if dim is None:
+            return np.empty((0, 0), dtype=np.float16)
+        rows = self._rows_on_disk(dim)
+        with self._mm_lock:
+            if self._mm is None or self._mm.shape[0] != rows:
+                self._mm = np.memmap(self.vec_path, dtype="<f2", mode="r", shape=(rows, dim)) if rows else None
+            return self._mm if self._mm is not None else np.empty((0, dim), dtype=np.float16)
+
+    def rows_for(self, keys: Iterable[str]) -> Dict[str, int]:
+        keys = list(dict.fromkeys(keys))
+        out: Dict[str, int] = {}
+        c = self._conn()
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            part = keys[i:i + _LOOKUP_CHUNK]
+            out.update(c.execute(
+                f"SELECT key, row FROM vectors WHERE key IN ({','.join('?' * len(part))})", part
+            ).fetchall())
+        return out
+
+    def keys_for_rows(self, rows: List[int]) -> Dict[int, str]:
+        out: Dict[int, str] = {}
+        c = self._conn()
+        for i in range(0, len(rows), _LOOKUP_CHUNK):
+            part = [int(r) for r in rows[i:i + _LOOKUP_CHUNK]]
+            out.update((r, k) for k, r in c.execute(
+                f"SELECT key, row FROM vectors WHERE row IN ({','.join('?' * len(part))})", part
+            ).fetchall())
+        return out
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        rows = self.rows_for(keys)
+        if not rows:
+            return {}
+        mat = self.matrix()
+        return {k: np.asarray(mat[r], dtype=np.float32) for k, r in rows.items() if r < len(mat)}
+
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> int:
+        """Append vectors for keys not stored yet; returns how many were added."""
+        if not vectors:
+            return 0
+        with self._file_lock():
+            have = self.rows_for(vectors.keys())
+            new = [k for k in vectors if k not in have]
+            if not new:
+                return 0
+            block = np.vstack([np.asarray(vectors[k], dtype=np.float32) for k in new])
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            block = (block / norms).astype("<f2")
+
+            dim = self.dim
+            if dim is None:
+                dim = int(block.shape[1])
+                self.meta_path.write_text(json.dumps({"dim": dim, "model": SENTENCE_MODEL}))
+            elif block.shape[1] != dim:
+                raise ValueError(f"Embedding size {block.shape[1]} != stored {dim}")
+
+            start = self._rows_on_disk(dim)
+            with open(self.vec_path, "r+b" if self.vec_path.exists() else "wb") as f:
+                f.seek(start * dim * 2)
+                f.truncate()  # drop a partial row left by an interrupted append
+                f.write(block.tobytes())
+            c = self._conn()
+            with c:
+                c.executemany("INSERT INTO vectors (key, row) VALUES (?, ?)", [(k, start + i) for i, k in enumerate(new)])
+            return len(new)
+
+    def search(self, query: np.ndarray, top_k: int = 20) -> List[Tuple[str, float]]:
+        """Cosine top_k over all stored (unit) vectors, scanning the memmap in blocks."""
+        mat = self.matrix()
+        if not len(mat) or top_k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32).ravel()
+        q = q / (np.linalg.norm(q) or 1.0)
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, len(mat), _SEARCH_BLOCK):
+            scores = np.asarray(mat[start:start + _SEARCH_BLOCK], dtype=np.float32) @ q
+            k = min(top_k, len(scores))
+            idx = np.argpartition(-scores, k - 1)[:k]
+            best_rows = np.concatenate([best_rows, idx + start])
+            best_scores = np.concatenate([best_scores, scores[idx]])
+            if len(best_rows) > top_k:
+                keep = np.argpartition(-best_scores, top_k - 1)[:top_k]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores, kind="stable")
+        keys = self.keys_for_rows(best_rows[order].tolist())
+        return [(keys[int(r)], float(s)) for r, s in zip(best_rows[order], best_scores[order]) if int(r) in keys]
+
+    def __len__(self) -> int:
+        return len(self.matrix())
+
+
+_stores: Dict[str, EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(model: Optional[str] = None) -> EmbeddingStore:
+    model = model or SENTENCE_MODEL
+    store = _stores.get(model)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(model)
+            if store is None:
+                slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model)
+                store = _stores[model] = EmbeddingStore(FEEDBACK_EMBED_ROOT / slug)
+    return store
+
+
+def similar_feedback(
+    db: Session,
+    text: str,
+    limit: int = 20,
+    batch: Optional[int] = None,
+    department: Optional[str] = None,
+) -> List[Dict[str, object]]:
+    """
+    Stored feedback rows whose comments are closest to `text` (cosine over
+    the embedding store). Only the query is encoded.
+    """
+    query = get_model("minilm").encode([normalize_comment(text)], show_progress_bar=False)[0]
+    # over-fetch: the store also holds comments whose rows were replaced or filtered out
+    hits = get_store().search(query, top_k=max(limit * 5, 50))
+    score_of = dict(hits)
+    if not score_of:
+        return []
+
+    q = db.query(StudentFeedback).filter(StudentFeedback.comment_key.in_(list(score_of)))
+    if batch is not None:
+        q = q.filter(StudentFeedback.batch == batch)
+    if department:
+        q = q.filter(StudentFeedback.department == department)
+    rows = sorted(q.all(), key=lambda r: (-score_of[r.comment_key], -r.id))[:limit]
+
+    return [
+        {
+            "id": r.id,
+            "score": round(score_of[r.comment_key], 4),
+            "comments": r.comments,
+            "course_name": r.course_name,
+            "instructor_name": r.instructor_name,
+            "sentiment": r.sentiment,
+            "emotion": r.emotion,
+            "topic": r.topic,
+            "batch": r.batch,
+            "department": r.department,
+        }
+        for r in rows
+    ]
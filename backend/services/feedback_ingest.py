@@ -0,0 +1,479 @@
+# backend/services/feedback_ingest.py
+"""
+Student feedback CSV ingestion: column normalisation, NLP analysis
+(sentiment / emotion / topic) and storage in `student_feedback`.
+
+Shared by the `/feedback/upload-csv` endpoint and the background job worker.
+"""
+import io
+import os
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models.student_feedback import StudentFeedback
+
+from services import comment_cache
+from services.feedback_embeddings import comment_key, get_store, normalize_comment
+from services.feedback_query import invalidate_feedback_caches
+from services.feedback_summary import bump_rollup, clear_rollup, rollup_key
+from services.topic_model import assign_topics
+from services.model_registry import EMOTION_MODEL, SENTIMENT_MODEL, get_model
+
+
+# Batched classification (see _classify_batched)
+FEEDBACK_NLP_BATCH = int(os.getenv("FEEDBACK_NLP_BATCH", "64"))
+FEEDBACK_NLP_MAX_TOKENS = int(os.getenv("FEEDBACK_NLP_MAX_TOKENS", "512"))
+
+# Rows per INSERT batch / commit when storing analyzed feedback
+FEEDBACK_INSERT_CHUNK = int(os.getenv("FEEDBACK_INSERT_CHUNK", "5000"))
+
+# CSV rows per chunk in streaming ingestion (ingest_feedback_csv_file)
+FEEDBACK_CSV_CHUNK_ROWS = int(os.getenv("FEEDBACK_CSV_CHUNK_ROWS", "5000"))
+
+
+# Normalize column names (supports multiple casing)
+RENAME_MAP = {
+    "CourseName": "course_name",
+    "course_name": "course_name",
+    "course": "course_name",
+
+    "InstructorName": "instructor_name",
+    "instructor_name": "instructor_name",
+    "teacher": "instructor_name",
+
+    "Comments": "comments",
+    "Comment": "comments",
+    "comments": "comments",
+
+    "StudentID": "student_id",
+    "student_id": "student_id",
+
+    "Name": "name",
+    "name": "name",
+
+    "FormType": "form_type",
+    "form_type": "form_type",
+
+    "MCQ_Number": "mcq_number",
+    "mcq_number": "mcq_number",
+
+    "Answer": "answer",
+    "answer": "answer",
+
+    "Batch": "batch",
+    "batch": "batch",
+
+    "Department": "department",
+    "department": "department",
+}
+
+# Required columns for analysis + aggregation
+REQUIRED_COLUMNS = ["comments", "course_name", "instructor_name", "batch"]
+
+
+class FeedbackCSVError(ValueError):
+    """Raised for CSV input problems (mapped to HTTP 400 by the router)."""
+
+
+def _classify_batched(
+    pipe,
+    texts: List[str],
+    batch_size: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> List[Tuple[str, float]]:
+    """
+    Top (label, score) per text, in input order, using the pipeline's own
+    tokenizer/model but without its per-call overhead:
+      - truncation by tokens (max_tokens, capped at the model's limit), not chars
+      - texts sorted by token length and batched, so each batch pads to a
+        similar length instead of the longest comment in the file
+      - one forward pass per batch under torch.inference_mode()
+    """
+    import torch
+
+    if not texts:
+        return []
+    batch_size = max(1, batch_size or FEEDBACK_NLP_BATCH)
+    tok, model = pipe.tokenizer, pipe.model
+    max_len = min(max_tokens or FEEDBACK_NLP_MAX_TOKENS, getattr(tok, "model_max_length", 512) or 512)
+
+    lengths = [len(ids) for ids in tok(texts, truncation=True, max_length=max_len)["input_ids"]]
+    order = sorted(range(len(texts)), key=lengths.__getitem__)
+
+    id2label = model.config.id2label
+    out: List[Optional[Tuple[str, float]]] = [None] * len(texts)
+    model.eval()
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            enc = tok(
+                [texts[i] for i in idx],
+                padding="longest",
+                truncation=True,
+                max_length=max_len,
+                return_tensors="pt",
+            ).to(model.device)
+            probs = model(**enc).logits.float().softmax(dim=-1)
+            scores, labels = probs.max(dim=-1)
+            for i, lab, sc in zip(idx, labels.tolist(), scores.tolist()):
+                out[i] = (str(id2label[lab]), float(sc))
+            if progress:
+                progress(len(idx))
+    return out  # type: ignore[return-value]
+
+
+def _normalize_sentiment(label: str, score: float) -> str:
+    """
+    distilbert SST2 returns POSITIVE/NEGATIVE.
+    We add Neutral if confidence is low.
+    """
+    if score < 0.60:
+        return "neutral"
+    return "positive" if label.upper().startswith("POS") else "negative"
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    df.rename(columns={k: v for k, v in RENAME_MAP.items() if k in df.columns}, inplace=True)
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise FeedbackCSVError(f"Missing required columns: {missing}")
+
+    # Defaults for optional columns (keeps system stable even if CSV lacks them)
+    if "department" not in df.columns:
+        df["department"] = None
+    if "student_id" not in df.columns:
+        df["student_id"] = None
+    if "name" not in df.columns:
+        df["name"] = None
+    if "form_type" not in df.columns:
+        df["form_type"] = "Course Evaluation"
+    if "mcq_number" not in df.columns:
+        df["mcq_number"] = 0
+    if "answer" not in df.columns:
+        df["answer"] = None
+
+    # Clean comments
+    df["comments"] = df["comments"].astype(str).str.strip()
+    df = df[df["comments"].str.len() > 0].copy()
+
+    # Ensure numeric types
+    df["batch"] = pd.to_numeric(df["batch"], errors="coerce").fillna(0).astype(int)
+    df["mcq_number"] = pd.to_numeric(df["mcq_number"], errors="coerce").fillna(0).astype(int)
+    return df
+
+
+def _model_tag() -> str:
+    return f"{SENTIMENT_MODEL}|{EMOTION_MODEL}|{FEEDBACK_NLP_MAX_TOKENS}"
+
+
+def embed_comments(texts: List[str], batch_size: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    MiniLM embedding per distinct normalized comment, from the shared
+    float16 store (services/feedback_embeddings.py); only comments not
+    stored yet are encoded, then appended.
+    """
+    store = get_store()
+    keys = {t: comment_key(t) for t in texts}
+    found = store.get_many(keys.values())
+    out = {t: found[k] for t, k in keys.items() if k in found}
+    todo = [t for t in texts if t not in out]
+    if todo:
+        vecs = get_model("minilm").encode(todo, batch_size=batch_size or FEEDBACK_NLP_BATCH, show_progress_bar=False)
+        store.put_many({keys[t]: v for t, v in zip(todo, vecs)})
+        # read back, so fresh vectors are exactly what later runs will get
+        stored = store.get_many(keys[t] for t in todo)
+        out.update((t, stored[keys[t]]) for t in todo)
+    return out
+
+
+def _analyze_distinct(
+    texts: List[str],
+    batch_size: Optional[int],
+    progress: Optional[Callable[[int, Optional[int], Optional[str]], None]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    NLP results per distinct normalized comment. Labels come from the
+    comment cache and vectors from the embedding store; only misses go
+    through the models and are written back.
+    """
+    tag = _model_tag()
+    keys = {t: comment_cache.comment_key(tag, t) for t in texts}
+    cached = comment_cache.lookup_many(keys.values())
+    results = {t: dict(cached[k]) for t, k in keys.items() if k in cached}
+    todo = [t for t in texts if t not in results]
+
+    total, done = len(texts), len(results)
+    if progress:
+        progress(done, total, "analyzing")
+
+    if todo:
+        passes = 0
+
+        def _tick(n: int) -> None:
+            nonlocal passes
+            passes += n
+            if progress:
+                # each new comment goes through two classifiers
+                progress(done + passes // 2, total, "analyzing")
+
+        sent = _classify_batched(get_model("sentiment"), todo, batch_size, progress=_tick)
+        emo = _classify_batched(get_model("emotion"), todo, batch_size, progress=_tick)
+        fresh = {
+            t: {"sentiment_label": s[0], "sentiment_score": s[1], "emotion": e[0]}
+            for t, s, e in zip(todo, sent, emo)
+        }
+        comment_cache.store_many({keys[t]: v for t, v in fresh.items()})
+        results.update({t: dict(v) for t, v in fresh.items()})
+
+    for t, vec in embed_comments(texts, batch_size).items():
+        results[t]["embedding"] = vec
+    return results
+
+
+def analyze_frame(
+    df: pd.DataFrame,
+    progress: Optional[Callable[[int, Optional[int], Optional[str]], None]] = None,
+    batch_size: Optional[int] = None,
+) -> pd.DataFrame:
+    # Survey exports repeat comments a lot ("good", "n/a", copy-paste);
+    # analyze each distinct normalized comment once and fan out to rows.
+    norm = [normalize_comment(c) for c in df["comments"].tolist()]
+    distinct = list(dict.fromkeys(norm))
+    res = _analyze_distinct(distinct, batch_size, progress)
+
+    df["comment_key"] = [comment_key(t) for t in norm]
+    df["sentiment"] = [_normalize_sentiment(res[t]["sentiment_label"], res[t]["sentiment_score"]) for t in norm]
+    df["emotion"] = [res[t]["emotion"] for t in norm]
+
+    # Topics from the persistent model (services/topic_model.py): the
+    # distinct comments update it, then each row gets its nearest centroid
+    if distinct:
+        ids = assign_topics(np.vstack([res[t]["embedding"] for t in distinct]))
+        topic_of = dict(zip(distinct, ids))
+        df["topic"] = [topic_of[t] for t in norm]
+    else:
+        df["topic"] = []
+    return df
+
+
+def _str_or(values: List[Any], default: Optional[str]) -> List[Optional[str]]:
+    return [str(v) if pd.notna(v) else default for v in values]
+
+
+def _int_or_zero(values: List[Any]) -> List[int]:
+    return [int(v) if pd.notna(v) else 0 for v in values]
+
+
+def feedback_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Analyzed frame -> student_feedback insert records (column-wise, no iterrows)."""
+    def col(name: str) -> List[Any]:
+        return df[name].tolist() if name in df.columns else [None] * len(df)
+
+    cols = {
+        "student_id": _str_or(col("student_id"), None),
+        "name": _str_or(col("name"), None),
+        "form_type": _str_or(col("form_type"), "Course Evaluation"),
+        "mcq_number": _int_or_zero(col("mcq_number")),
+        "answer": _str_or(col("answer"), None),
+        "instructor_name": [str(v) for v in col("instructor_name")],
+        "course_name": [str(v) for v in col("course_name")],
+        "comments": [str(v) for v in col("comments")],
+        "comment_key": col("comment_key"),
+        "sentiment": [str(v) for v in col("sentiment")],
+        "emotion": [str(v) for v in col("emotion")],
+        "topic": _int_or_zero(col("topic")),
+        "batch": _int_or_zero(col("batch")),
+        "department": _str_or(col("department"), None),
+    }
+    names = list(cols)
+    return [dict(zip(names, vals)) for vals in zip(*cols.values())]
+
+
+def insert_feedback_records(
+    db: Session,
+    records: List[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+    progress: Optional[Callable[[int, Optional[int], Optional[str]], None]] = None,
+    done: int = 0,
+    total: Optional[int] = None,
+    commit: bool = True,
+) -> int:
+    """
+    Bulk-insert `records` with one Core executemany INSERT per chunk (no
+    ORM objects or unit of work; the driver batches the VALUES), committing
+    each chunk (together with its rollup counts) so no transaction holds
+    more than one chunk. Returns the number of rows inserted.
+
+    commit=False leaves every chunk in the caller's transaction (the caller
+    commits, or rolls back, and calls invalidate_feedback_caches).
+    """
+    chunk_size = max(1, chunk_size or FEEDBACK_INSERT_CHUNK)
+    stmt = insert(StudentFeedback.__table__)
+    inserted = 0
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        db.connection().execute(stmt, chunk)
+        bump_rollup(db, Counter(rollup_key(r) for r in chunk))
+        if commit:
+            db.commit()
+            invalidate_feedback_caches()
+        inserted += len(chunk)
+        if progress:
+            progress(done + inserted, total, "storing")
+    return inserted
+
+
+def ingest_feedback_csv(
+    db: Session,
+    contents: bytes,
+    replace: bool = False,
+    progress: Optional[Callable[[int, Optional[int], Optional[str]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Analyze sentiment/emotion/topics of a feedback CSV and store the rows.
+
+    SAFE behavior:
+      - replace=False (default): append rows (doesn't wipe existing DB);
+        rows are committed FEEDBACK_INSERT_CHUNK at a time, so if a later
+        chunk fails the chunks before it stay stored
+      - replace=True: delete all rows then insert (explicit), in one
+        transaction: a failure leaves the previous rows untouched
+    """
+    try:
+        df = pd.read_csv(io.BytesIO(contents))
+    except Exception as e:
+        raise FeedbackCSVError(f"Invalid CSV file: {e}")
+
+    df = prepare_frame(df)
+    total = int(len(df))
+
+    if progress:
+        progress(0, total, "analyzing")
+    df = analyze_frame(df, progress=progress)
+
+    if progress:
+        progress(0, total, "storing")
+
+    # ✅ SAFE: only wipe if replace=true; wipe + inserts commit together
+    try:
+        if replace:
+            db.query(StudentFeedback).delete()
+            clear_rollup(db)
+        inserted = insert_feedback_records(
+            db, feedback_records(df), progress=progress, total=total, commit=not replace
+        )
+        if replace:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        invalidate_feedback_caches()
+    if progress:
+        progress(inserted, total, "done")
+
+    return {
+        "message": f"✅ {inserted} feedback records analyzed and stored successfully!",
+        "replace": replace,
+        "inserted": inserted,
+    }
+
+
+class _CountingReader:
+    """Binary file wrapper that counts bytes handed to the CSV parser (progress)."""
+
+    def __init__(self, f):
+        self._f = f
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def __iter__(self):
+        return iter(self._f)
+
+
+def ingest_feedback_csv_file(
+    db: Session,
+    path: str,
+    replace: bool = False,
+    progress: Optional[Callable[[int, Optional[int], Optional[str]], None]] = None,
+    chunk_rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Streaming variant of ingest_feedback_csv for large exports on disk: the
+    CSV is read `chunk_rows` rows at a time, and each chunk is prepared,
+    analyzed and inserted before the next is read, so memory stays flat
+    regardless of file size. Progress is reported in bytes of the file.
+
+    replace=False appends, committing FEEDBACK_INSERT_CHUNK rows at a time
+    (chunks already stored stay stored if a later chunk fails).
+    replace=True wipes existing rows once the first chunk has parsed and
+    analyzed, and the wipe and every chunk commit together at the end: a
+    failure anywhere leaves the previous rows untouched.
+    """
+    chunk_rows = max(1, chunk_rows or FEEDBACK_CSV_CHUNK_ROWS)
+    size = os.path.getsize(path)
+    inserted = chunks = 0
+    wiped = not replace
+
+    if progress:
+        progress(0, size, "analyzing")
+
+    try:
+        with open(path, "rb") as f:
+            src = _CountingReader(f)
+            try:
+                reader = pd.read_csv(src, chunksize=chunk_rows)
+            except Exception as e:
+                raise FeedbackCSVError(f"Invalid CSV file: {e}")
+
+            while True:
+                try:
+                    df = next(reader)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    raise FeedbackCSVError(f"Invalid CSV file: {e}")
+
+                chunks += 1
+                df = prepare_frame(df)
+                if len(df):
+                    df = analyze_frame(df)
+
+                if not wiped:
+                    db.query(StudentFeedback).delete()
+                    clear_rollup(db)
+                    wiped = True
+
+                inserted += insert_feedback_records(db, feedback_records(df), commit=not replace)
+                del df
+                if progress:
+                    progress(min(src.bytes_read, size), size, f"stored {inserted} rows ({chunks} chunks)")
+
+        if replace:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        invalidate_feedback_caches()
+
+    if progress:
+        progress(size, size, "done")
+
+    return {
+        "message": f"✅ {inserted} feedback records analyzed and stored successfully!",
+        "replace": replace,
+        "inserted": inserted,
+        "chunks": chunks,
+    }
@@ -0,0 +1,210 @@
+"""
+Filtered, paged reads of student_feedback for GET /feedback/details-v2.
+
+Paging:
+  - keyset: pass the previous page's `next_cursor` (an id); the page is
+    `id < cursor ORDER BY id DESC LIMIT n`, an index range scan that costs
+    O(page size) however deep the reader is.
+  - offset: legacy OFFSET/LIMIT, kept for existing callers.
+
+Counting (`count=`):
+  exact     COUNT(*) with the filters on every request (legacy)
+  estimate  unfiltered on Postgres: pg_class.reltuples (planner estimate);
+            otherwise an exact filtered count cached FEEDBACK_COUNT_TTL_S
+  none      no count
+
+Facets (GET /feedback/facets and the dropdown endpoints): every filter
+value with its row count, from one statement (GROUPING SETS on Postgres,
+UNION ALL of per-column GROUP BYs elsewhere), cached in-process per
+(batch, department). The cache is dropped by `invalidate_feedback_caches()`
+when an ingest commits, and entries are revalidated against MAX(id) (an
+index lookup) so ingests in another process (the worker) are picked up too;
+FEEDBACK_FACETS_TTL_S bounds staleness for anything else (e.g. relabeling).
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, literal, text
+from sqlalchemy.orm import Query, Session
+
+from models.student_feedback import StudentFeedback
+
+
+FEEDBACK_COUNT_TTL_S = float(os.getenv("FEEDBACK_COUNT_TTL_S", "60"))
+FEEDBACK_FACETS_TTL_S = float(os.getenv("FEEDBACK_FACETS_TTL_S", "600"))
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+_count_cache: Dict[Tuple, Tuple[float, int]] = {}
+_count_lock = threading.Lock()
+_COUNT_CACHE_MAX = 1024
+
+# (batch, department) -> (cached_at, max_id, facets)
+_facets_cache: Dict[Tuple, Tuple[float, Optional[int], Dict[str, Any]]] = {}
+_facets_lock = threading.Lock()
+_FACETS_CACHE_MAX = 256
+
+# facet name -> (column, keep value?) ; matches the old DISTINCT endpoints
+_FACETS = {
+    "batches": (StudentFeedback.batch, lambda v: v is not None),
+    "departments": (StudentFeedback.department, bool),
+    "courses": (StudentFeedback.course_name, bool),
+    "instructors": (StudentFeedback.instructor_name, bool),
+    "topics": (StudentFeedback.topic, lambda v: v is not None),
+}
+
+
+def filter_feedback(q: Query, filters: Dict[str, Any]) -> Query:
+    """Apply the details/facets filters (None / empty = not filtered)."""
+    if filters.get("batch") is not None:
+        q = q.filter(StudentFeedback.batch == filters["batch"])
+    if filters.get("department"):
+        q = q.filter(StudentFeedback.department == filters["department"])
+    if filters.get("course"):
+        q = q.filter(StudentFeedback.course_name == filters["course"])
+    if filters.get("instructor"):
+        q = q.filter(StudentFeedback.instructor_name == filters["instructor"])
+    if filters.get("sentiment"):
+        q = q.filter(StudentFeedback.sentiment == filters["sentiment"])
+    if filters.get("topic") is not None:
+        q = q.filter(StudentFeedback.topic == filters["topic"])
+    return q
+
+
+def _active(filters: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((k, v) for k, v in filters.items() if v is not None and v != ""))
+
+
+def _reltuples(db: Session) -> Optional[int]:
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    est = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:t)"),
+        {"t": StudentFeedback.__tablename__},
+    ).scalar()
+    # -1 = never vacuumed/analyzed
+    return int(est) if est is not None and est >= 0 else None
+
+
+def _cached_count(db: Session, filters: Dict[str, Any]) -> int:
+    key = _active(filters)
+    now = time.monotonic()
+    with _count_lock:
+        hit = _count_cache.get(key)
+    if hit is not None and now - hit[0] < FEEDBACK_COUNT_TTL_S:
+        return hit[1]
+
+    n = filter_feedback(db.query(StudentFeedback.id), filters).order_by(None).count()
+    with _count_lock:
+        if len(_count_cache) >= _COUNT_CACHE_MAX:
+            _count_cache.clear()
+        _count_cache[key] = (now, n)
+    return n
+
+
+def count_feedback(db: Session, filters: Dict[str, Any], mode: str = "exact") -> Tuple[Optional[int], bool]:
+    """(total, estimated) for `filters` under `mode`."""
+    if mode == "none":
+        return None, False
+    if mode == "estimate":
+        if not _active(filters):
+            est = _reltuples(db)
+            if est is not None:
+                return est, True
+        return _cached_count(db, filters), True
+    return filter_feedback(db.query(StudentFeedback.id), filters).count(), False
+
+
+def feedback_page(
+    db: Session,
+    filters: Dict[str, Any],
+    limit: int = 50,
+    offset: int = 0,
+    cursor: Optional[int] = None,
+) -> Tuple[list, Optional[int]]:
+    """(rows, next_cursor) newest first; next_cursor is None on the last page."""
+    q = filter_feedback(db.query(StudentFeedback), filters)
+    if cursor is not None:
+        q = q.filter(StudentFeedback.id < cursor)
+    q = q.order_by(StudentFeedback.id.desc())
+    if cursor is None and offset:
+        q = q.offset(offset)
+
+    limit = max(1, limit)
+    rows = q.limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (rows[-1].id if more and rows else None)
+
+
+def invalidate_feedback_caches() -> None:
+    """Drop cached counts and facets; call after student_feedback changes."""
+    with _count_lock:
+        _count_cache.clear()
+    with _facets_lock:
+        _facets_cache.clear()
+
+
+def _facet_rows(db: Session, filters: Dict[str, Any]):
+    """(facet name, value, count) rows from one statement, grouped per column."""
+    cols = [col for col, _ in _FACETS.values()]
+    names = list(_FACETS)
+
+    if db.get_bind().dialect.name == "postgresql":
+        # one scan: GROUPING SETS (batch, department, ...); GROUPING(col) = 0 marks the set a row belongs to
+        q = db.query(*cols, *[func.grouping(c) for c in cols], func.count())
+        rows = filter_feedback(q, filters).group_by(func.grouping_sets(*cols)).all()
+        k = len(cols)
+        for row in rows:
+            i = list(row[k:2 * k]).index(0)
+            yield names[i], row[i], int(row[-1])
+        return
+
+    # elsewhere (SQLite stand-in): UNION ALL of per-column GROUP BYs, each able to use its index
+    parts = [
+        filter_feedback(db.query(literal(i).label("facet"), col.label("value"), func.count().label("n")), filters)
+        .group_by(col)
+        for i, col in enumerate(cols)
+    ]
+    for i, value, n in parts[0].union_all(*parts[1:]).all():
+        yield names[int(i)], value, int(n)
+
+
+def _compute_facets(db: Session, filters: Dict[str, Any]) -> Dict[str, Any]:
+    counts: Dict[str, Dict[Any, int]] = {name: {} for name in _FACETS}
+    total = 0
+    for name, value, n in _facet_rows(db, filters):
+        if name == "batches":
+            total += n  # every row is in exactly one batch group
+        if _FACETS[name][1](value):
+            counts[name][value] = counts[name].get(value, 0) + n
+
+    out: Dict[str, Any] = {
+        name: [{"value": v, "count": c[v]} for v in sorted(c)] for name, c in counts.items()
+    }
+    out["total"] = total
+    return out
+
+
+def feedback_facets(db: Session, batch: Optional[int] = None, department: Optional[str] = None) -> Dict[str, Any]:
+    """Value lists with counts for every filter dropdown (see module docstring)."""
+    filters = {"batch": batch, "department": department or None}
+    key = _active(filters)
+    max_id = db.query(func.max(StudentFeedback.id)).scalar()
+    now = time.monotonic()
+
+    with _facets_lock:
+        hit = _facets_cache.get(key)
+    if hit is not None and hit[1] == max_id and now - hit[0] < FEEDBACK_FACETS_TTL_S:
+        return hit[2]
+
+    facets = _compute_facets(db, filters)
+    with _facets_lock:
+        if len(_facets_cache) >= _FACETS_CACHE_MAX:
+            _facets_cache.clear()
+        _facets_cache[key] = (now, max_id, facets)
+    return facets
@@ -0,0 +1,120 @@
+"""
+Chart aggregates for GET /feedback/summary.
+
+The summary is computed in SQL at one grain, (course, instructor,
+sentiment), and folded into the sentiment / per-course / per-instructor
+maps in Python, so a call costs O(groups) rows instead of loading every
+StudentFeedback object (comment text included).
+
+FEEDBACK_ROLLUP=1 additionally keeps `student_feedback_rollup` (counts per
+batch, department, course, instructor, sentiment) up to date inside the
+ingest transaction, and the summary reads that table instead of
+student_feedback. After switching it on for an existing database, fill it
+once with `python tools/rebuild_feedback_rollup.py`.
+"""
+from __future__ import annotations
+
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.feedback_rollup import FeedbackRollup
+from models.student_feedback import StudentFeedback
+
+
+FEEDBACK_ROLLUP = os.getenv("FEEDBACK_ROLLUP", "0").lower() in ("1", "true", "yes")
+
+# (batch, department, course_name, instructor_name, sentiment)
+RollupKey = Tuple[Optional[int], Optional[str], Optional[str], Optional[str], Optional[str]]
+
+_GROUP_COLS = ("batch", "department", "course_name", "instructor_name", "sentiment")
+
+
+def _fold(rows: Iterable[Tuple[Optional[str], Optional[str], Optional[str], int]]) -> Dict[str, Any]:
+    summary = {"positive": 0, "neutral": 0, "negative": 0}
+    by_course: Dict[str, Dict[str, int]] = {}
+    by_instructor: Dict[str, int] = {}
+    total = 0
+
+    for course, instructor, sentiment, n in rows:
+        n = int(n or 0)
+        s = sentiment or "neutral"
+        summary[s] = summary.get(s, 0) + n
+
+        c = by_course.setdefault(course, {"pos": 0, "neu": 0, "neg": 0})
+        if s == "positive":
+            c["pos"] += n
+        elif s == "neutral":
+            c["neu"] += n
+        else:
+            c["neg"] += n
+
+        by_instructor[instructor] = by_instructor.get(instructor, 0) + n
+        total += n
+
+    return {
+        "sentiment": summary,
+        "courses": by_course,
+        "instructors": by_instructor,
+        "total": total,
+    }
+
+
+def feedback_summary(db: Session, batch: Optional[int] = None, department: Optional[str] = None) -> Dict[str, Any]:
+    src = FeedbackRollup if FEEDBACK_ROLLUP else StudentFeedback
+    count = func.sum(FeedbackRollup.n) if FEEDBACK_ROLLUP else func.count()
+
+    q = db.query(src.course_name, src.instructor_name, src.sentiment, count)
+    if batch is not None:
+        q = q.filter(src.batch == batch)
+    if department:
+        q = q.filter(src.department == department)
+    q = q.group_by(src.course_name, src.instructor_name, src.sentiment)
+
+    return _fold(q.all())
+
+
+def rollup_key(rec: Mapping[str, Any]) -> RollupKey:
+    """Group of one student_feedback insert record (column name -> value)."""
+    return tuple(rec.get(c) for c in _GROUP_COLS)  # type: ignore[return-value]
+
+
+def bump_rollup(db: Session, counts: Counter) -> None:
+    """
+    Add `counts` ({RollupKey: n}) to the rollup table; caller commits, so
+    this runs in the same transaction as the feedback inserts.
+    """
+    if not FEEDBACK_ROLLUP:
+        return
+    for key, n in counts.items():
+        match = [getattr(FeedbackRollup, c).is_not_distinct_from(v) for c, v in zip(_GROUP_COLS, key)]
+        updated = (
+            db.query(FeedbackRollup)
+            .filter(*match)
+            .update({FeedbackRollup.n: FeedbackRollup.n + int(n)}, synchronize_session=False)
+        )
+        if not updated:
+            db.add(FeedbackRollup(**dict(zip(_GROUP_COLS, key)), n=int(n)))
+    db.flush()
+
+
+def clear_rollup(db: Session) -> None:
+    if FEEDBACK_ROLLUP:
+        db.query(FeedbackRollup).delete(synchronize_session=False)
+
+
+def rebuild_rollup(db: Session) -> int:
+    """Recompute the rollup from student_feedback; returns the number of groups."""
+    cols = [getattr(StudentFeedback, c) for c in _GROUP_COLS]
+    rows = db.query(*cols, func.count()).group_by(*cols).all()
+
+    db.query(FeedbackRollup).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        FeedbackRollup,
+        [dict(zip(_GROUP_COLS, r[:-1]), n=int(r[-1])) for r in rows],
+    )
+    db.commit()
+    return len(rows)
@@ -1,31 +1,139 @@
-from services.semantic_compare import semantic_coverage
+"""
+Grading fairness: flag pairs of answers that are semantically near-identical
+but received very different grades.
+
+Every answer is embedded once (embed_texts, cache-backed). Then:
+  exact  full cosine matrix, computed in row blocks: O(n^2) dot products but
+         no per-pair API calls
+  lsh    random-hyperplane signatures split into bands; only answers that
+         share a band bucket are compared, so the work grows ~linearly
+  auto   exact up to FAIRNESS_EXACT_MAX answers, lsh above
+
+Blank answers (empty or whitespace/control characters only) would all get
+the same embedding and match each other at cosine 1.0, so they are left out
+of the comparison and reported in `blank_answers` instead.
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.openrouter_embeddings import embed_texts
+from services.similarity import normalize_rows
+from services.text_sanitize import clean_text
+
+FAIRNESS_EXACT_MAX = int(os.getenv("FAIRNESS_EXACT_MAX", "1500"))
+FAIRNESS_BLOCK_ROWS = int(os.getenv("FAIRNESS_BLOCK_ROWS", "512"))
+FAIRNESS_LSH_BITS = int(os.getenv("FAIRNESS_LSH_BITS", "12"))
+FAIRNESS_LSH_BANDS = int(os.getenv("FAIRNESS_LSH_BANDS", "40"))
+
+
+def _exact_pairs(v: np.ndarray, threshold: float) -> Tuple[List[Tuple[int, int, float]], int]:
+    n = v.shape[0]
+    out = []
+    for start in range(0, n, FAIRNESS_BLOCK_ROWS):
+        block = v[start:start + FAIRNESS_BLOCK_ROWS] @ v.T
+        rows, cols = np.nonzero(block >= threshold)
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            i = start + r
+            if c > i:
+                out.append((i, c, float(block[r, c])))
+    return out, n * (n - 1) // 2
+
+
+def _lsh_candidates(v: np.ndarray, bits: int, bands: int, seed: int = 0) -> np.ndarray:
+    """
+    Random-hyperplane LSH: answers with the same `bits`-bit signature in any
+    band become candidate pairs. Returns unique (i, j) rows with i < j.
+    """
+    n = v.shape[0]
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((v.shape[1], bits * bands)).astype(np.float32)
+    signs = (v @ planes) > 0
+    weights = 1 << np.arange(bits, dtype=np.int64)
+
+    codes = []
+    for b in range(bands):
+        keys = signs[:, b * bits:(b + 1) * bits].astype(np.int64) @ weights
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # pair every member with the ones after it in its bucket, one offset at a time
+        d = 1
+        while d < n:
+            same = sorted_keys[d:] == sorted_keys[:-d]
+            if not same.any():
+                break
+            a, c = order[:-d][same], order[d:][same]
+            codes.append(np.minimum(a, c) * n + np.maximum(a, c))
+            d += 1
+
+    if not codes:
+        return np.empty((0, 2), dtype=np.int64)
+    uniq = np.sort(np.concatenate(codes))
+    uniq = uniq[np.r_[True, uniq[1:] != uniq[:-1]]]
+    return np.stack([uniq // n, uniq % n], axis=1)
+
+
+def _lsh_pairs(v: np.ndarray, threshold: float) -> Tuple[List[Tuple[int, int, float]], int]:
+    pairs = _lsh_candidates(v, FAIRNESS_LSH_BITS, FAIRNESS_LSH_BANDS)
+    out = []
+    # verify candidates with the exact cosine, in chunks to bound memory
+    step = 65536
+    for k in range(0, len(pairs), step):
+        part = pairs[k:k + step]
+        sims = np.einsum("ij,ij->i", v[part[:, 0]], v[part[:, 1]])
+        keep = sims >= threshold
+        out.extend((int(i), int(j), float(s)) for (i, j), s in zip(part[keep], sims[keep]))
+    return out, len(pairs)
+
 
 def run_grading_fairness(
     answers: list[dict],
     grades: list[int],
     threshold: float = 0.8,
-):
-    sims = []
-    for i in range(len(answers)):
-        for j in range(i + 1, len(answers)):
-            sem = semantic_coverage(
-                answers[i]["text"],
-                answers[j]["text"],
-                threshold=threshold,
-            )
-            sims.append({
-                "i": i,
-                "j": j,
-                "similarity": sem["coverage"],
-                "grade_diff": abs(grades[i] - grades[j]),
-            })
-
-    flagged = [x for x in sims if x["similarity"] >= threshold and x["grade_diff"] >= 20]
+    grade_diff_threshold: int = 20,
+    mode: str = "auto",
+    model: Optional[str] = None,
+) -> Dict[str, Any]:
+    n = len(answers)
+    if mode == "auto":
+        mode = "exact" if n <= FAIRNESS_EXACT_MAX else "lsh"
+    if mode not in ("exact", "lsh"):
+        raise ValueError(f"Unknown fairness mode: {mode}")
+
+    texts = [a.get("text") or "" for a in answers]
+    filled = [bool(clean_text(t)) for t in texts]
+    keep = [i for i, ok in enumerate(filled) if ok]
+    blank = [i for i, ok in enumerate(filled) if not ok]
+
+    if len(keep) < 2:
+        return {
+            "fairness_score": 100, "flagged_cases": [], "total_pairs": n * (n - 1) // 2,
+            "compared_pairs": 0, "similar_pairs": 0, "mode": mode, "blank_answers": blank,
+        }
+
+    emb = embed_texts([texts[i] for i in keep], model=model)
+    v = normalize_rows(emb["vectors"])
+
+    similar, compared = (_exact_pairs if mode == "exact" else _lsh_pairs)(v, threshold)
+    # back to positions in `answers`
+    similar = [(keep[i], keep[j], s) for i, j, s in similar]
+
+    flagged = []
+    for i, j, s in sorted(similar):
+        diff = abs(grades[i] - grades[j])
+        if diff >= grade_diff_threshold:
+            flagged.append({"i": i, "j": j, "similarity": round(s, 4), "grade_diff": diff})
 
     fairness_score = max(0, 100 - (len(flagged) * 10))
 
     return {
         "fairness_score": fairness_score,
         "flagged_cases": flagged,
-        "total_pairs": len(sims),
+        "total_pairs": n * (n - 1) // 2,
+        "compared_pairs": compared,
+        "similar_pairs": len(similar),
+        "mode": mode,
+        "blank_answers": blank,
+        "embed_meta": {k: v for k, v in (emb.get("meta") or {}).items() if k != "hashes"},
     }
@@ -1,10 +1,12 @@
 # backend/services/grading_service.py
 import json
-import zipfile
+import os
+import time
 import re
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 
 from sqlalchemy.orm import Session
 
@@ -13,58 +15,28 @@ from models.assessment import Assessment, GradingRun, AssessmentExpectedAnswers
 from models.student import Student
 from models.student_submission import StudentSubmission
 
-from services.upload_adapter import parse_document
+from services.zip_ingest import ingest_zip
+from services.storage import save_blob
 from services.openrouter_client import call_openrouter_json
+from services.text_sanitize import sanitize_text
+from services.upload_service import set_validation
 
 
 ALLOWED_SUB_EXTS = {".pdf", ".docx", ".txt", ".md"}
 MAX_FILES = 200
 MAX_TEXT = 80_000
 
+# grade_all concurrency (LLM calls are I/O bound, so threads are enough)
+GRADING_WORKERS = int(os.getenv("GRADING_WORKERS", "4"))
+GRADING_MAX_IN_FLIGHT = int(os.getenv("GRADING_MAX_IN_FLIGHT", "8"))
+GRADING_COMMIT_EVERY = int(os.getenv("GRADING_COMMIT_EVERY", "10"))
+GRADING_COMMIT_INTERVAL_S = float(os.getenv("GRADING_COMMIT_INTERVAL_S", "5"))
+
 
 def utcnow():
     return datetime.now(timezone.utc)
 
 
-def clean_text(val: Optional[str]) -> str:
-    if not val:
-        return ""
-    if not isinstance(val, str):
-        val = str(val)
-    val = val.replace("\x00", "")
-    out = []
-    for ch in val:
-        o = ord(ch)
-        if ch in ("\n", "\r", "\t"):
-            out.append(ch)
-        elif o >= 32:
-            out.append(ch)
-    return "".join(out).strip()
-
-
-def _safe_extract_zip(zip_path: str, dest_dir: str) -> List[str]:
-    dest = Path(dest_dir)
-    dest.mkdir(parents=True, exist_ok=True)
-
-    out: List[str] = []
-    with zipfile.ZipFile(zip_path, "r") as z:
-        names = z.namelist()
-        if len(names) > MAX_FILES:
-            names = names[:MAX_FILES]
-        for member in names:
-            if member.endswith("/"):
-                continue
-            target = (dest / member).resolve()
-            # zip-slip protection
-            if not str(target).startswith(str(dest.resolve())):
-                continue
-            target.parent.mkdir(parents=True, exist_ok=True)
-            with z.open(member) as src, open(target, "wb") as f:
-                f.write(src.read())
-            out.append(str(target))
-    return out
-
-
 def _infer_reg_no(filename: str) -> str:
     base = Path(filename).stem
 
@@ -119,39 +91,30 @@ def upload_submissions_zip(
     assessment: Assessment,
     zip_bytes: bytes,
     zip_filename: str,
-    storage_root: str = "uploads/submissions",
 ) -> Dict[str, Any]:
-    now = utcnow()
-
-    base_dir = (
-        Path(storage_root)
-        / str(assessment.course_id)
-        / str(assessment.id)
-        / str(int(now.timestamp() * 1000))
-    )
-    base_dir.mkdir(parents=True, exist_ok=True)
-
-    zip_path = base_dir / (zip_filename or "submissions.zip")
-    zip_path.write_bytes(zip_bytes)
-
-    extracted_dir = base_dir / "extracted"
-    files = _safe_extract_zip(str(zip_path), str(extracted_dir))
-
     created = 0
     updated = 0
     skipped = 0
     errors: list[str] = []
 
-    for fp in files:
+    # members are parsed straight from the archive in the worker pool;
+    # DB work below stays in archive order. Each kept member is stored as its
+    # own blob, so re-uploading a ZIP only writes the files that changed.
+    ingested = ingest_zip(
+        zip_bytes, exts=ALLOWED_SUB_EXTS, max_files=MAX_FILES, max_chars=MAX_TEXT, keep_data=True
+    )
+    for sk in ingested["skipped"]:
+        skipped += 1
+        if sk["reason"] != "unsupported_ext":
+            errors.append(f"{Path(sk['name']).name}: skipped ({sk['reason']})")
+
+    for f in ingested["files"]:
         try:
-            fp_path = Path(fp)
-            ext = fp_path.suffix.lower()
-            if ext not in ALLOWED_SUB_EXTS:
-                skipped += 1
-                continue
+            fp_path = Path(f["name"])
+            ext = f["ext"]
 
-            parsed = parse_document(fp) or {}
-            text = clean_text(parsed.get("text") or "")[:MAX_TEXT]
+            parsed = f["parsed"]
+            text = sanitize_text(parsed.get("text"), max_chars=MAX_TEXT)
             if not text.strip():
                 skipped += 1
                 continue
@@ -177,6 +140,7 @@ def upload_submissions_zip(
                     db.add(student)
 
             # Save Upload + UploadText
+            saved = save_blob(fp_path.name, f["data"], db=db)
             up = Upload(
                 course_id=str(assessment.course_id),
                 filename_original=fp_path.name,   # ✅ used by UI
@@ -184,10 +148,14 @@ def upload_submissions_zip(
                 ext=ext.lstrip("."),
                 file_type_guess="student_submission",
                 week_no=None,
-                bytes=fp_path.stat().st_size if fp_path.exists() else 0,
+                bytes=int(f["bytes"] or 0),
+                storage_backend="local",
+                storage_key=saved["key"],
+                blob_sha256=saved["sha256"],
                 parse_log=[],
                 created_at=datetime.utcnow(),
             )
+            set_validation(up, [text])
             db.add(up)
             db.flush()
 
@@ -243,11 +211,11 @@ def upload_submissions_zip(
                 created += 1
 
         except Exception as e:
-            errors.append(f"{Path(fp).name}: {str(e)}")
+            errors.append(f"{Path(f['name']).name}: {str(e)}")
 
     db.commit()
     return {
-        "files_seen": len(files),
+        "files_seen": ingested["seen"],
         "created": created,
         "updated": updated,
         "skipped": skipped,
@@ -267,12 +235,89 @@ def _load_grading_prompt() -> str:
     )
 
 
+def _grading_schema_hint() -> str:
+    return json.dumps(
+        {
+            "total_marks": 0,
+            "feedback": "string",
+            "per_question": [
+                {
+                    "question_no": 1,
+                    "marks_awarded": 0,
+                    "justification": "string",
+                    "missing_points": ["string"],
+                }
+            ],
+        }
+    )
+
+
+def _apply_grade(
+    s: StudentSubmission,
+    gr: GradingRun,
+    created_by: str,
+    parsed: Dict[str, Any],
+    meta: Dict[str, Any],
+) -> None:
+    total = float(parsed.get("total_marks") or 0.0)
+    feedback = str(parsed.get("feedback") or "")
+
+    s.ai_marks = total
+    s.obtained_marks = int(round(total))
+    s.ai_feedback = feedback
+    s.status = "graded"
+    s.grader_id = created_by
+
+    s.evidence_json = {
+        **(s.evidence_json or {}),
+        "grading_run_id": str(gr.id),
+        "model": meta.get("model"),
+        "prompt_version": "v1",
+        "input_hash": meta.get("input_hash"),
+        "cache": meta.get("cache"),
+        "raw_response": meta.get("raw_response"),
+        "parsed": parsed,
+    }
+
+
+def _apply_error(s: StudentSubmission, gr: GradingRun, err: str) -> None:
+    s.status = "error"
+    s.evidence_json = {
+        **(s.evidence_json or {}),
+        "grading_run_id": str(gr.id),
+        "error": err,
+    }
+
+
 def grade_all(
     db: Session,
     assessment: Assessment,
     created_by: str,
     model: Optional[str] = None,
+    workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    commit_every: Optional[int] = None,
+    progress: Optional[Callable[[int, Optional[int], Optional[str]], None]] = None,
+    force: bool = False,
 ) -> Dict[str, Any]:
+    """
+    Grade every submission of an assessment against its expected answers.
+
+    LLM calls are fanned out over a thread pool (they are blocking HTTP
+    requests), with at most `max_in_flight` submitted at once. All DB work
+    stays on the calling thread: finished grades are applied to the session
+    and committed in batches of `commit_every` (or every
+    GRADING_COMMIT_INTERVAL_S seconds), and whatever has completed is
+    committed before an exception propagates, so a crash mid-run keeps the
+    grades already returned.
+
+    `progress(done, total, note)` is called after each commit (used by the
+    background job worker). `force=True` bypasses the LLM response cache.
+    """
+    workers = max(1, int(workers or GRADING_WORKERS))
+    max_in_flight = max(workers, int(max_in_flight or GRADING_MAX_IN_FLIGHT))
+    commit_every = max(1, int(commit_every or GRADING_COMMIT_EVERY))
+
     exp = (
         db.query(AssessmentExpectedAnswers)
         .filter(AssessmentExpectedAnswers.assessment_id == assessment.id)
@@ -294,7 +339,13 @@ def grade_all(
         assessment_id=assessment.id,
         model=model,
         prompt_version="v1",
-        thresholds={"note": "strict but fair"},
+        thresholds={
+            "note": "strict but fair",
+            "workers": workers,
+            "max_in_flight": max_in_flight,
+            "commit_every": commit_every,
+            "force": bool(force),
+        },
         created_by=created_by,
         created_at=utcnow(),
         completed=False,
@@ -304,80 +355,112 @@ def grade_all(
     db.refresh(gr)
 
     system = _load_grading_prompt()
-
-    schema_hint = json.dumps(
-        {
-            "total_marks": 0,
-            "feedback": "string",
-            "per_question": [
-                {
-                    "question_no": 1,
-                    "marks_awarded": 0,
-                    "justification": "string",
-                    "missing_points": ["string"],
-                }
-            ],
+    schema_hint = _grading_schema_hint()
+    expected_json = json.dumps(exp.parsed_json, ensure_ascii=False)
+
+    # one query for all submission texts instead of one per submission
+    upload_ids = [s.upload_id for s in subs if s.upload_id]
+    text_by_upload: Dict[Any, str] = {}
+    if upload_ids:
+        text_by_upload = {
+            uid: (txt or "")
+            for uid, txt in db.query(UploadText.upload_id, UploadText.text)
+            .filter(UploadText.upload_id.in_(upload_ids))
+            .all()
         }
-    )
 
     graded = 0
     failed = 0
 
+    jobs: List[Tuple[StudentSubmission, str]] = []
     for s in subs:
-        try:
-            ut = None
-            if s.upload_id:
-                ut = db.query(UploadText).filter(UploadText.upload_id == s.upload_id).first()
-
-            sub_text = clean_text((ut.text if ut else "") or "")[:MAX_TEXT]
-            if not sub_text.strip():
-                raise ValueError("Submission text is empty (parsing failed).")
-
-            user = (
-                f"ASSESSMENT_TITLE: {assessment.title}\n"
-                f"MAX_MARKS: {assessment.max_marks}\n"
-                f"EXPECTED_ANSWERS_JSON:\n{json.dumps(exp.parsed_json, ensure_ascii=False)}\n\n"
-                f"STUDENT_SUBMISSION_TEXT:\n{sub_text}\n"
-            )
-
-            parsed, meta = call_openrouter_json(
+        sub_text = sanitize_text(text_by_upload.get(s.upload_id), max_chars=MAX_TEXT)
+        if not sub_text.strip():
+            _apply_error(s, gr, "Submission text is empty (parsing failed).")
+            db.add(s)
+            failed += 1
+            continue
+
+        user = (
+            f"ASSESSMENT_TITLE: {assessment.title}\n"
+            f"MAX_MARKS: {assessment.max_marks}\n"
+            f"EXPECTED_ANSWERS_JSON:\n{expected_json}\n\n"
+            f"STUDENT_SUBMISSION_TEXT:\n{sub_text}\n"
+        )
+        jobs.append((s, user))
+
+    if failed:
+        db.commit()
+
+    total_subs = len(subs)
+    if progress:
+        progress(failed, total_subs, "grading")
+
+    pending: Dict[Future, StudentSubmission] = {}
+    queue = iter(jobs)
+    uncommitted = 0
+    last_commit = time.monotonic()
+
+    def _submit_next(pool: ThreadPoolExecutor) -> bool:
+        for s, user in queue:
+            fut = pool.submit(
+                call_openrouter_json,
                 system=system,
                 user=user,
                 schema_hint=schema_hint,
                 model=model,
                 temperature=0.2,
+                prompt_version="v1",
+                use_cache=not force,
             )
-
-            total = float(parsed.get("total_marks") or 0.0)
-            feedback = str(parsed.get("feedback") or "")
-
-            s.ai_marks = total
-            s.obtained_marks = int(round(total))
-            s.ai_feedback = feedback
-            s.status = "graded"
-            s.grader_id = created_by
-
-            s.evidence_json = {
-                **(s.evidence_json or {}),
-                "grading_run_id": str(gr.id),
-                "model": meta.get("model"),
-                "prompt_version": "v1",
-                "input_hash": meta.get("input_hash"),
-                "raw_response": meta.get("raw_response"),
-                "parsed": parsed,
-            }
-
-            db.add(s)
-            graded += 1
-
-        except Exception as e:
-            s.status = "error"
-            s.evidence_json = {**(s.evidence_json or {}), "error": str(e)}
-            db.add(s)
-            failed += 1
+            pending[fut] = s
+            return True
+        return False
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="grade")
+    try:
+        while len(pending) < max_in_flight and _submit_next(pool):
+            pass
+
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for fut in done:
+                s = pending.pop(fut)
+                try:
+                    parsed, meta = fut.result()
+                    _apply_grade(s, gr, created_by, parsed, meta)
+                    graded += 1
+                except Exception as e:
+                    _apply_error(s, gr, str(e))
+                    failed += 1
+                db.add(s)
+                uncommitted += 1
+                _submit_next(pool)
+
+            if uncommitted >= commit_every or (
+                uncommitted and time.monotonic() - last_commit >= GRADING_COMMIT_INTERVAL_S
+            ):
+                db.commit()
+                uncommitted = 0
+                last_commit = time.monotonic()
+                if progress:
+                    progress(graded + failed, total_subs, "grading")
+    finally:
+        # cancel anything not started yet; keep what already finished
+        for fut in pending:
+            fut.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+        if uncommitted:
+            try:
+                db.commit()
+            except Exception:
+                db.rollback()
 
     gr.completed = True
     db.add(gr)
     db.commit()
 
+    if progress:
+        progress(graded + failed, total_subs, "done")
+
     return {"graded": graded, "failed": failed, "grading_run_id": str(gr.id)}
@@ -0,0 +1,67 @@
+"""
+Job kinds understood by the worker. Each handler gets (db, payload, progress)
+and returns a JSON-serialisable result stored on the job row.
+
+Imports are done inside the handlers so a worker only loads what the claimed
+job needs (the feedback pipeline pulls in the NLP models).
+"""
+import uuid
+from pathlib import Path
+from typing import Any, Dict
+
+from sqlalchemy.orm import Session
+
+from services.job_queue import ProgressFn
+
+
+def _run_grade_all(db: Session, payload: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    from models.assessment import Assessment
+    from services.grading_service import grade_all
+
+    a = db.get(Assessment, uuid.UUID(payload["assessment_id"]))
+    if not a:
+        raise ValueError("Assessment not found")
+    return grade_all(
+        db,
+        a,
+        created_by=payload.get("created_by") or "",
+        progress=progress,
+        force=bool(payload.get("force")),
+    )
+
+
+def _run_weekly_zip(db: Session, payload: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    from services.weekly_zip_upload_service import handle_weekly_zip_upload
+
+    zip_path = Path(payload["file_path"])
+    week_no = int(payload["week_no"])
+
+    out = handle_weekly_zip_upload(
+        db=db,
+        course_id=payload["course_id"],
+        week_no=week_no,
+        user_id=payload.get("user_id") or "",
+        zip_file_bytes=zip_path.read_bytes(),
+        zip_filename=payload.get("filename") or zip_path.name,
+        progress=progress,
+    )
+    # completeness is recorded once inside handle_weekly_zip_upload
+    return out
+
+
+def _run_feedback_csv(db: Session, payload: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    from services.feedback_ingest import ingest_feedback_csv, ingest_feedback_csv_file
+
+    if payload.get("stream"):
+        return ingest_feedback_csv_file(
+            db, payload["file_path"], replace=bool(payload.get("replace")), progress=progress
+        )
+    contents = Path(payload["file_path"]).read_bytes()
+    return ingest_feedback_csv(db, contents, replace=bool(payload.get("replace")), progress=progress)
+
+
+JOB_HANDLERS = {
+    "grade_all": _run_grade_all,
+    "weekly_zip": _run_weekly_zip,
+    "feedback_csv": _run_feedback_csv,
+}
@@ -0,0 +1,250 @@
+"""
+Durable job queue on top of the `background_jobs` table.
+
+The API process only enqueues rows; separate worker processes (`python worker.py`)
+claim them, run the registered handler and store progress/result on the row.
+Postgres claims with FOR UPDATE SKIP LOCKED; on SQLite (local stand-in) the
+conditional UPDATE below is what keeps two workers from taking the same job.
+
+While a handler runs, a heartbeat thread refreshes `heartbeat_at` every
+JOB_HEARTBEAT_S, so a handler that reports no progress for a long stretch
+(one slow LLM call, embedding a large upload) is not taken for dead by
+requeue_stale. Every write from the running worker is conditional on the
+row still being running and locked by it: if the job was requeued or failed
+meanwhile, the late result is dropped instead of overwriting that state.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import socket
+import threading
+import traceback
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from core.db import SessionLocal
+from models.job import BackgroundJob
+
+
+JOB_SPOOL_ROOT = Path(os.getenv("JOB_SPOOL_ROOT", "uploads/jobs"))
+JOB_STALE_AFTER_S = int(os.getenv("JOB_STALE_AFTER_S", "900"))
+JOB_HEARTBEAT_S = float(os.getenv("JOB_HEARTBEAT_S", str(max(1, JOB_STALE_AFTER_S // 10))))
+
+# progress(done, total, note)
+ProgressFn = Callable[[int, Optional[int], Optional[str]], None]
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ----------------------- enqueue side (API) -----------------------
+
+def enqueue_job(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    created_by: Optional[str] = None,
+    max_attempts: int = 1,
+    job_id: Optional[str] = None,
+) -> BackgroundJob:
+    job = BackgroundJob(
+        kind=kind,
+        status="queued",
+        payload=payload,
+        created_by=created_by,
+        max_attempts=max_attempts,
+        created_at=utcnow(),
+    )
+    if job_id:
+        job.id = job_id
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def spool_upload(job_id: str, filename: str, data: bytes) -> str:
+    """Persist request bytes so a worker in another process can read them."""
+    safe = Path(filename or "upload.bin").name
+    d = JOB_SPOOL_ROOT / job_id
+    d.mkdir(parents=True, exist_ok=True)
+    p = d / safe
+    p.write_bytes(data)
+    return str(p)
+
+
+def spool_upload_file(job_id: str, filename: str, fileobj, chunk_size: int = 1 << 20) -> str:
+    """Like spool_upload, but copies from a file object without holding it in memory."""
+    safe = Path(filename or "upload.bin").name
+    d = JOB_SPOOL_ROOT / job_id
+    d.mkdir(parents=True, exist_ok=True)
+    p = d / safe
+    with open(p, "wb") as out:
+        shutil.copyfileobj(fileobj, out, chunk_size)
+    return str(p)
+
+
+def drop_spool(job_id: str) -> None:
+    shutil.rmtree(JOB_SPOOL_ROOT / job_id, ignore_errors=True)
+
+
+def job_to_dict(job: BackgroundJob, include_result: bool = True) -> Dict[str, Any]:
+    total = job.progress_total
+    done = int(job.progress_done or 0)
+    percent = round(done / total * 100.0, 2) if total else None
+    out = {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": {
+            "done": done,
+            "total": total,
+            "percent": percent,
+            "note": job.progress_note,
+        },
+        "error": job.error,
+        "attempts": int(job.attempts or 0),
+        "created_by": job.created_by,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if include_result:
+        out["result"] = job.result
+    return out
+
+
+# ----------------------- worker side -----------------------
+
+def requeue_stale(db: Session) -> int:
+    """Give jobs whose worker stopped heart-beating another attempt (or fail them)."""
+    cutoff = utcnow() - timedelta(seconds=JOB_STALE_AFTER_S)
+    stale = (
+        db.query(BackgroundJob)
+        .filter(BackgroundJob.status == "running", BackgroundJob.heartbeat_at < cutoff)
+        .all()
+    )
+    for job in stale:
+        if int(job.attempts or 0) < int(job.max_attempts or 1):
+            job.status = "queued"
+            job.locked_by = None
+        else:
+            job.status = "failed"
+            job.error = f"worker {job.locked_by} stopped responding"
+            job.finished_at = utcnow()
+        db.add(job)
+    if stale:
+        db.commit()
+    return len(stale)
+
+
+def claim_next(db: Session, kinds: Optional[list[str]] = None) -> Optional[BackgroundJob]:
+    q = db.query(BackgroundJob.id).filter(BackgroundJob.status == "queued")
+    if kinds:
+        q = q.filter(BackgroundJob.kind.in_(kinds))
+    q = q.order_by(BackgroundJob.created_at.asc())
+    if db.get_bind().dialect.name == "postgresql":
+        q = q.with_for_update(skip_locked=True)
+
+    for (job_id,) in q.limit(5).all():
+        now = utcnow()
+        res = db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == "queued")
+            .values(
+                status="running",
+                locked_by=worker_name(),
+                attempts=BackgroundJob.attempts + 1,
+                started_at=now,
+                heartbeat_at=now,
+            )
+        )
+        db.commit()
+        if res.rowcount == 1:
+            return db.get(BackgroundJob, job_id)
+    db.commit()
+    return None
+
+
+def _set_fields(job_id: str, owner: Optional[str] = None, **values) -> int:
+    # separate short session: job bookkeeping must not ride on the handler's transaction
+    stmt = update(BackgroundJob).where(BackgroundJob.id == job_id)
+    if owner is not None:
+        stmt = stmt.where(BackgroundJob.status == "running", BackgroundJob.locked_by == owner)
+    s = SessionLocal()
+    try:
+        res = s.execute(stmt.values(**values))
+        s.commit()
+        return res.rowcount
+    finally:
+        s.close()
+
+
+def make_progress(job_id: str, owner: Optional[str] = None) -> ProgressFn:
+    def _progress(done: int, total: Optional[int] = None, note: Optional[str] = None) -> None:
+        values: Dict[str, Any] = {"progress_done": int(done), "heartbeat_at": utcnow()}
+        if total is not None:
+            values["progress_total"] = int(total)
+        if note is not None:
+            values["progress_note"] = note
+        try:
+            _set_fields(job_id, owner=owner, **values)
+        except Exception:
+            pass
+
+    return _progress
+
+
+def _heartbeat(job_id: str, owner: str, stop: threading.Event) -> None:
+    while not stop.wait(JOB_HEARTBEAT_S):
+        try:
+            if not _set_fields(job_id, owner=owner, heartbeat_at=utcnow()):
+                return  # requeued or failed by requeue_stale; nothing left to keep alive
+        except Exception:
+            pass
+
+
+def run_job(job: BackgroundJob, handlers: Dict[str, Callable[..., Any]]) -> None:
+    handler = handlers.get(job.kind)
+    owner = worker_name()
+    if handler is None:
+        _set_fields(
+            job.id, owner=owner, status="failed", error=f"no handler for kind '{job.kind}'", finished_at=utcnow()
+        )
+        return
+
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(job.id, owner, stop), daemon=True)
+    beat.start()
+
+    db = SessionLocal()
+    try:
+        result = handler(db, dict(job.payload or {}), make_progress(job.id, owner))
+        # a job requeue_stale gave up on keeps its state; a requeued one keeps its spool
+        if _set_fields(job.id, owner=owner, status="succeeded", result=result, error=None, finished_at=utcnow()):
+            shutil.rmtree(JOB_SPOOL_ROOT / job.id, ignore_errors=True)
+    except Exception as e:
+        db.rollback()
+        retry = int(job.attempts or 0) < int(job.max_attempts or 1)
+        _set_fields(
+            job.id,
+            owner=owner,
+            status="queued" if retry else "failed",
+            locked_by=None,
+            error=f"{e}\n{traceback.format_exc(limit=5)}",
+            finished_at=None if retry else utcnow(),
+        )
+    finally:
+        stop.set()
+        beat.join()
+        db.close()
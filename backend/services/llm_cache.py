@@ -0,0 +1,262 @@
+"""
+Content-addressed cache for `call_openrouter_json` responses.
+
+Key = sha256 over (system prompt, user payload, schema hint, model,
+temperature, prompt version), so any change to the prompt or inputs is a miss.
+
+Backends (LLM_CACHE_BACKEND):
+  sqlite   (default) local file at LLM_CACHE_PATH
+  postgres `llm_response_cache` table in the app database
+  off      no caching
+
+Entries expire after LLM_CACHE_TTL_S; once the cache holds more than
+LLM_CACHE_MAX_ENTRIES rows or LLM_CACHE_MAX_MB of responses, the least
+recently used rows are evicted.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "sqlite").lower()
+LLM_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", "storage/cache/llm_cache.sqlite3"))
+LLM_CACHE_TTL_S = int(os.getenv("LLM_CACHE_TTL_S", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "512"))
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "bypass": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] = _stats.get(name, 0) + n
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        out: Dict[str, Any] = dict(_stats)
+    lookups = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else None
+    out["backend"] = LLM_CACHE_BACKEND
+    return out
+
+
+def cache_key(
+    system: str,
+    user: str,
+    schema_hint: str,
+    model: str,
+    temperature: float,
+    prompt_version: str,
+) -> str:
+    blob = json.dumps(
+        [system or "", user or "", schema_hint or "", model or "", round(float(temperature), 4), prompt_version or ""],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(blob.encode("utf-8", errors="ignore")).hexdigest()
+
+
+# ----------------------- sqlite backend -----------------------
+
+class SQLiteLLMCache:
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as c:
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " cache_key TEXT PRIMARY KEY,"
+                " model TEXT, prompt_version TEXT,"
+                " value TEXT NOT NULL, size_bytes INTEGER NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            c.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache(last_access)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread (grade_all calls us from a thread pool)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        c = self._conn()
+        row = c.execute("SELECT value, created_at FROM llm_cache WHERE cache_key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        now = time.time()
+        if LLM_CACHE_TTL_S and now - row[1] > LLM_CACHE_TTL_S:
+            with c:
+                c.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+            return None
+        with c:
+            c.execute("UPDATE llm_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any], model: str, prompt_version: str) -> None:
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        c = self._conn()
+        with c:
+            c.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, prompt_version, data, len(data), now, now),
+            )
+        self._evict()
+
+    def _evict(self) -> None:
+        c = self._conn()
+        with c:
+            if LLM_CACHE_TTL_S:
+                cur = c.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - LLM_CACHE_TTL_S,))
+                _count("evictions", max(0, cur.rowcount))
+
+            n, size = c.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache").fetchone()
+            max_bytes = int(LLM_CACHE_MAX_MB * 1024 * 1024)
+            if n <= LLM_CACHE_MAX_ENTRIES and size <= max_bytes:
+                return
+
+            # drop least recently used rows until both limits hold again
+            over = 0
+            for key, sz in c.execute("SELECT cache_key, size_bytes FROM llm_cache ORDER BY last_access ASC"):
+                if n - over <= LLM_CACHE_MAX_ENTRIES and size <= max_bytes:
+                    break
+                over += 1
+                size -= sz
+            if over:
+                c.execute(
+                    "DELETE FROM llm_cache WHERE cache_key IN "
+                    "(SELECT cache_key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (over,),
+                )
+                _count("evictions", over)
+
+
+# ----------------------- postgres backend -----------------------
+
+class PostgresLLMCache:
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        from core.db import SessionLocal
+        from models.llm_cache import LLMResponseCache
+
+        db = SessionLocal()
+        try:
+            row = db.get(LLMResponseCache, key)
+            if not row:
+                return None
+            now = datetime.now(timezone.utc)
+            if LLM_CACHE_TTL_S and row.created_at < now - timedelta(seconds=LLM_CACHE_TTL_S):
+                db.delete(row)
+                db.commit()
+                return None
+            row.last_access_at = now
+            row.hits = int(row.hits or 0) + 1
+            db.commit()
+            return {"parsed": row.parsed_json, "raw_response": row.raw_response, "model": row.model}
+        finally:
+            db.close()
+
+    def set(self, key: str, value: Dict[str, Any], model: str, prompt_version: str) -> None:
+        from core.db import SessionLocal
+        from models.llm_cache import LLMResponseCache
+
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            db.merge(
+                LLMResponseCache(
+                    cache_key=key,
+                    model=model,
+                    prompt_version=prompt_version,
+                    parsed_json=value.get("parsed") or {},
+                    raw_response=value.get("raw_response"),
+                    size_bytes=len(value.get("raw_response") or ""),
+                    hits=0,
+                    created_at=now,
+                    last_access_at=now,
+                )
+            )
+            db.commit()
+            self._evict(db)
+        finally:
+            db.close()
+
+    def _evict(self, db) -> None:
+        from sqlalchemy import func
+        from models.llm_cache import LLMResponseCache
+
+        if LLM_CACHE_TTL_S:
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=LLM_CACHE_TTL_S)
+            n = db.query(LLMResponseCache).filter(LLMResponseCache.created_at < cutoff).delete()
+            _count("evictions", n)
+
+        n, size = db.query(func.count(LLMResponseCache.cache_key), func.coalesce(func.sum(LLMResponseCache.size_bytes), 0)).one()
+        max_bytes = int(LLM_CACHE_MAX_MB * 1024 * 1024)
+        if n > LLM_CACHE_MAX_ENTRIES or size > max_bytes:
+            # approximate LRU trim: drop the oldest 10% (at least the overflow)
+            drop = max(n - LLM_CACHE_MAX_ENTRIES, n // 10, 1)
+            keys = [
+                k for (k,) in db.query(LLMResponseCache.cache_key)
+                .order_by(LLMResponseCache.last_access_at.asc())
+                .limit(drop)
+                .all()
+            ]
+            if keys:
+                db.query(LLMResponseCache).filter(LLMResponseCache.cache_key.in_(keys)).delete(synchronize_session=False)
+                _count("evictions", len(keys))
+        db.commit()
+
+
+# ----------------------- facade -----------------------
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _get_backend():
+    global _backend
+    if LLM_CACHE_BACKEND == "off":
+        return None
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = PostgresLLMCache() if LLM_CACHE_BACKEND == "postgres" else SQLiteLLMCache(LLM_CACHE_PATH)
+    return _backend
+
+
+def cache_get(key: str) -> Optional[Dict[str, Any]]:
+    try:
+        backend = _get_backend()
+        val = backend.get(key) if backend else None
+    except Exception:
+        _count("errors")
+        val = None
+    _count("hits" if val is not None else "misses")
+    return val
+
+
+def cache_set(key: str, value: Dict[str, Any], model: str, prompt_version: str) -> None:
+    try:
+        backend = _get_backend()
+        if backend:
+            backend.set(key, value, model, prompt_version)
+            _count("stores")
+    except Exception:
+        _count("errors")
+
+
+def note_bypass() -> None:
+    _count("bypass")
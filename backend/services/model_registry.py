@@ -0,0 +1,145 @@
+"""
+Process-wide registry for local ML models (HF pipelines, SentenceTransformers).
+
+Models load lazily on first `get_model(name)` and are shared: one instance
+per name per process, whichever module asks. Nothing is imported or
+downloaded at app import time, so /health answers immediately.
+
+    MODEL_PRELOAD=sentiment,emotion,minilm   load these in preload_models()
+
+Call `preload_models()` before workers fork (e.g. `gunicorn --preload`, or
+at the top of worker.py) to pay the load once and let forked workers share
+the weights copy-on-write. `model_stats()` (GET /health/models) reports
+load time and memory per model.
+
+Model ids can be overridden with SENTIMENT_MODEL / EMOTION_MODEL /
+SENTENCE_MODEL.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+SENTIMENT_MODEL = os.getenv("SENTIMENT_MODEL", "distilbert-base-uncased-finetuned-sst-2-english")
+EMOTION_MODEL = os.getenv("EMOTION_MODEL", "j-hartmann/emotion-english-distilroberta-base")
+SENTENCE_MODEL = os.getenv("SENTENCE_MODEL", "all-MiniLM-L6-v2")
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "")
+
+
+def _hf_pipeline(task: str, model: str, **kwargs) -> Callable[[], Any]:
+    def load():
+        from transformers import pipeline
+        return pipeline(task, model=model, **kwargs)
+    return load
+
+
+def _sentence_transformer(model: str) -> Callable[[], Any]:
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model)
+    return load
+
+
+# name -> (model id, loader)
+_SPECS: Dict[str, tuple] = {
+    "sentiment": (SENTIMENT_MODEL, _hf_pipeline("sentiment-analysis", SENTIMENT_MODEL)),
+    # return_all_scores is deprecated -> top_k=1
+    "emotion": (EMOTION_MODEL, _hf_pipeline("text-classification", EMOTION_MODEL, top_k=1)),
+    "minilm": (SENTENCE_MODEL, _sentence_transformer(SENTENCE_MODEL)),
+}
+
+_models: Dict[str, Any] = {}
+_stats: Dict[str, Dict[str, Any]] = {}
+_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def register(name: str, model_id: str, loader: Callable[[], Any]) -> None:
+    """Add (or replace, if not loaded yet) a named model."""
+    with _registry_lock:
+        if name in _models:
+            raise ValueError(f"Model already loaded: {name}")
+        _SPECS[name] = (model_id, loader)
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _param_bytes(obj: Any) -> Optional[int]:
+    module = getattr(obj, "model", obj)  # HF pipelines wrap the torch module
+    params = getattr(module, "parameters", None)
+    if not callable(params):
+        return None
+    try:
+        return int(sum(p.numel() * p.element_size() for p in params()))
+    except Exception:
+        return None
+
+
+def _device(obj: Any) -> Optional[str]:
+    dev = getattr(obj, "device", None)
+    return str(dev) if dev is not None else None
+
+
+def get_model(name: str) -> Any:
+    m = _models.get(name)
+    if m is not None:
+        return m
+
+    with _registry_lock:
+        if name not in _SPECS:
+            raise KeyError(f"Unknown model: {name}")
+        lock = _locks.setdefault(name, threading.Lock())
+
+    with lock:
+        m = _models.get(name)
+        if m is not None:
+            return m
+        model_id, loader = _SPECS[name]
+        rss0 = _rss_bytes()
+        t0 = time.perf_counter()
+        m = loader()
+        load_s = time.perf_counter() - t0
+        rss1 = _rss_bytes()
+        pbytes = _param_bytes(m)
+        _stats[name] = {
+            "model_id": model_id,
+            "load_s": round(load_s, 3),
+            "param_mb": round(pbytes / 1e6, 1) if pbytes is not None else None,
+            "rss_delta_mb": round((rss1 - rss0) / 1e6, 1) if rss0 is not None and rss1 is not None else None,
+            "device": _device(m),
+            "pid": os.getpid(),
+            "loaded_at": time.time(),
+        }
+        _models[name] = m
+        return m
+
+
+def preload_models(names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Load `names` (default: MODEL_PRELOAD) now; returns model_stats()."""
+    if names is None:
+        names = [n.strip() for n in MODEL_PRELOAD.split(",") if n.strip()]
+    for n in names:
+        get_model(n)
+    return model_stats()
+
+
+def model_stats() -> Dict[str, Any]:
+    out: Dict[str, Any] = {"pid": os.getpid(), "rss_mb": None, "models": {}}
+    rss = _rss_bytes()
+    if rss is not None:
+        out["rss_mb"] = round(rss / 1e6, 1)
+    for name, (model_id, _) in _SPECS.items():
+        out["models"][name] = dict(_stats[name], loaded=True) if name in _stats else {
+            "model_id": model_id,
+            "loaded": False,
+        }
+    return out
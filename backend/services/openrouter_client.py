@@ -5,6 +5,8 @@ import os, time, json, hashlib, re
 import requests
 from typing import Dict, Any, Optional, Tuple
 
+from services.llm_cache import cache_key, cache_get, cache_set, note_bypass
+
 OPENROUTER_BASE = "https://openrouter.ai/api/v1/chat/completions"
 
 def sha256(text: str) -> str:
@@ -44,13 +46,34 @@ def call_openrouter_json(
     schema_hint: str,
     model: Optional[str] = None,
     temperature: float = 0.2,
+    prompt_version: str = "v1",
+    use_cache: bool = True,
 ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    use_cache=False skips the cache lookup (forced regrade); the fresh
+    response still replaces the cached one.
+    """
+    used_model = model or _get_model()
+    key = cache_key(system, user, schema_hint, used_model, temperature, prompt_version)
+
+    if use_cache:
+        hit = cache_get(key)
+        if hit is not None:
+            return hit["parsed"], {
+                "raw_response": hit.get("raw_response"),
+                "model": hit.get("model") or used_model,
+                "latency_ms": 0,
+                "input_hash": sha256(user),
+                "cache": "hit",
+                "cache_key": key,
+            }
+    else:
+        note_bypass()
+
     api_key = _get_key()
     if not api_key:
         raise RuntimeError("OPENROUTER_API_KEY missing (env not loaded)")
 
-    used_model = model or _get_model()
-
     payload = {
         "model": used_model,
         "temperature": temperature,
@@ -95,5 +118,13 @@ def call_openrouter_json(
         "model": used_model,
         "latency_ms": latency_ms,
         "input_hash": sha256(user),
+        "cache": "miss" if use_cache else "bypass",
+        "cache_key": key,
     }
+    cache_set(
+        key,
+        {"parsed": parsed, "raw_response": content, "model": used_model},
+        model=used_model,
+        prompt_version=prompt_version,
+    )
     return parsed, meta
@@ -8,6 +8,8 @@ import hashlib
 import requests
 from typing import List, Dict, Any, Optional
 
+from services import embedding_cache
+
 OPENROUTER_EMBED_URL = "https://openrouter.ai/api/v1/embeddings"
 
 def sha256(text: str) -> str:
@@ -20,33 +22,16 @@ def _get_embed_model() -> str:
     # ✅ embedding model (NOT chat model)
     return os.getenv("OPENROUTER_EMBED_MODEL", "qwen/qwen3-embedding-4b").strip()
 
-def embed_texts(
-    texts: List[str],
-    model: Optional[str] = None,
-    timeout: int = 120,
-) -> Dict[str, Any]:
-    """
-    Returns:
-      {
-        "vectors": List[List[float]],
-        "meta": {model, latency_ms, hashes}
-      }
-    """
+def _request_embeddings(texts: List[str], model: str, timeout: int) -> List[List[float]]:
     api_key = _get_key()
     if not api_key:
         raise RuntimeError("OPENROUTER_API_KEY missing (env not loaded)")
 
-    used_model = model or _get_embed_model()
-
-    clean = [(t or "").strip() for t in texts]
-    hashes = [sha256(t) for t in clean]
-
     payload = {
-        "model": used_model,
-        "input": clean,
+        "model": model,
+        "input": texts,
     }
 
-    t0 = time.time()
     r = requests.post(
         OPENROUTER_EMBED_URL,
         headers={
@@ -58,7 +43,6 @@ def embed_texts(
         data=json.dumps(payload),
         timeout=timeout,
     )
-    latency_ms = int((time.time() - t0) * 1000)
 
     if r.status_code >= 400:
         raise RuntimeError(f"OpenRouter embeddings error {r.status_code}: {r.text[:800]}")
@@ -68,15 +52,64 @@ def embed_texts(
     # OpenAI-compatible: data["data"] is list with {"embedding": [...]}
     items = data.get("data") or []
     vectors = [it.get("embedding") for it in items]
-    if not vectors or any(v is None for v in vectors):
+    if not vectors or len(vectors) != len(texts) or any(v is None for v in vectors):
         raise RuntimeError(f"Embeddings response malformed: {str(data)[:800]}")
+    return vectors
+
+
+def embed_texts(
+    texts: List[str],
+    model: Optional[str] = None,
+    timeout: int = 120,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """
+    Returns:
+      {
+        "vectors": List[List[float]],
+        "meta": {model, latency_ms, hashes, cache_hits, cache_misses, cache_hit_rate}
+      }
+
+    Vectors are looked up in the embedding cache by (model, sha256(text));
+    only misses (deduplicated) are sent to the API and the results are
+    merged back in input order. Misses are rounded to the cache's storage
+    precision (EMBED_CACHE_DTYPE) before they are returned, so a text gets
+    the same vector whether or not it was cached.
+    """
+    used_model = model or _get_embed_model()
+
+    clean = [(t or "").strip() for t in texts]
+    hashes = [sha256(t) for t in clean]
+
+    cached = embedding_cache.lookup(used_model, hashes) if use_cache else {}
+
+    # unique misses, first occurrence wins
+    miss_idx: Dict[str, int] = {}
+    for i, h in enumerate(hashes):
+        if h not in cached and h not in miss_idx:
+            miss_idx[h] = i
+
+    t0 = time.time()
+    fresh: Dict[str, List[float]] = {}
+    if miss_idx:
+        miss_hashes = list(miss_idx)
+        got = _request_embeddings([clean[miss_idx[h]] for h in miss_hashes], used_model, timeout)
+        fresh = {h: embedding_cache.as_stored(v).tolist() for h, v in zip(miss_hashes, got)}
+        embedding_cache.store(used_model, list(fresh.items()))
+    latency_ms = int((time.time() - t0) * 1000)
+
+    vectors = [fresh[h] if h in fresh else cached[h].tolist() for h in hashes]
 
+    hits = sum(1 for h in hashes if h in cached)
     return {
         "vectors": vectors,
         "meta": {
             "model": used_model,
             "latency_ms": latency_ms,
             "hashes": hashes,
+            "cache_hits": hits,
+            "cache_misses": len(hashes) - hits,
+            "cache_hit_rate": round(hits / len(hashes), 4) if hashes else None,
+            "api_inputs": len(fresh),
         },
     }
-  
\ No newline at end of file
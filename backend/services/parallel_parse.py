@@ -0,0 +1,250 @@
+"""
+Parallel document parsing for ZIP/folder ingestion.
+
+`parse_many(items)` returns one `parse_document`-shaped dict per item, in
+input order. An item is a file path or a `(filename, bytes)` pair (e.g. a
+ZIP member); items may come from a generator and are only pulled when a
+worker is free, so at most a few members' bytes are held at once.
+Parse-cache hits are served in the calling process; misses are handed to a
+small pool of worker processes so PyMuPDF/python-docx use more than one core.
+
+Each worker runs one file at a time under
+  - PARSE_TIMEOUT_S    wall-clock limit per file (SIGALRM in the worker,
+                       and the parent kills the worker if it does not answer
+                       within PARSE_TIMEOUT_S + PARSE_KILL_GRACE_S)
+  - PARSE_MAX_MEMORY_MB  RLIMIT_AS address-space cap (0 = no cap)
+so one pathological PDF yields an error entry instead of stalling the batch.
+
+PARSE_WORKERS=0 parses inline in the calling process (no limits).
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from services import upload_parser
+
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSE_TIMEOUT_S = int(os.getenv("PARSE_TIMEOUT_S", "60"))
+PARSE_KILL_GRACE_S = float(os.getenv("PARSE_KILL_GRACE_S", "5"))
+PARSE_MAX_MEMORY_MB = int(os.getenv("PARSE_MAX_MEMORY_MB", "2048"))
+PARSE_START_METHOD = os.getenv("PARSE_START_METHOD", "forkserver")
+
+ProgressFn = Callable[[int, Optional[int], Optional[str]], None]
+Item = Union[str, Tuple[str, bytes]]
+
+
+class _ParseTimeout(BaseException):
+    # BaseException so parse_uncached's `except Exception` does not swallow it
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _ParseTimeout()
+
+
+def _worker(conn, timeout_s: int, max_memory_mb: int) -> None:
+    if max_memory_mb > 0:
+        try:
+            import resource
+            limit = max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+    signal.signal(signal.SIGALRM, _on_alarm)
+
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        if msg is None:
+            break
+        idx, name, data, budget = msg
+        ext = os.path.splitext(name)[1].lower().lstrip(".")
+        signal.alarm(max(1, timeout_s))
+        try:
+            out = upload_parser.parse_uncached(name, data, **budget)
+        except _ParseTimeout:
+            out = {"ext": ext, "error": f"parse timed out after {timeout_s}s"}
+        finally:
+            signal.alarm(0)
+        if out.get("error") == "MemoryError":
+            out["error"] = f"parse exceeded {max_memory_mb} MB memory limit"
+        conn.send((idx, out))
+
+
+def _context():
+    try:
+        ctx = mp.get_context(PARSE_START_METHOD)
+    except ValueError:
+        ctx = mp.get_context("spawn")
+    if ctx.get_start_method() == "forkserver":
+        ctx.set_forkserver_preload(["services.upload_parser"])
+    return ctx
+
+
+class _Slot:
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(
+            target=_worker,
+            args=(child, PARSE_TIMEOUT_S, PARSE_MAX_MEMORY_MB),
+            daemon=True,
+        )
+        self.proc.start()
+        child.close()
+        self.task: Optional[int] = None
+        self.started = 0.0
+
+    def kill(self) -> None:
+        try:
+            self.proc.kill()
+            self.proc.join(1)
+        except Exception:
+            pass
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.proc.join(2)
+        if self.proc.is_alive():
+            self.proc.kill()
+        self.conn.close()
+
+
+def _split(item: Item) -> Tuple[str, Optional[bytes]]:
+    if isinstance(item, tuple):
+        return str(item[0]), item[1]
+    return str(item), None
+
+
+def parse_many(
+    items: Iterable[Item],
+    workers: Optional[int] = None,
+    progress: Optional[ProgressFn] = None,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    sample: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """max_chars/max_pages/sample: PDF extraction budget, see upload_parser.parse_document."""
+    budget = {"max_chars": max_chars, "max_pages": max_pages, "sample": sample}
+    total = len(items) if hasattr(items, "__len__") else None  # type: ignore[arg-type]
+    source = iter(items)
+    results: List[Optional[Dict[str, Any]]] = []
+    names: List[str] = []
+    hashes: List[Optional[str]] = []
+    done = 0
+
+    def _finish(i: int, out: Dict[str, Any]) -> None:
+        nonlocal done
+        results[i] = out
+        upload_parser.cache_store(hashes[i], names[i], out, **budget)
+        done += 1
+        if progress:
+            progress(done, total, f"parsed {os.path.basename(names[i])}")
+
+    def _next_miss() -> Optional[Tuple[int, str, Optional[bytes]]]:
+        """Pull items until one needs a real parse; cache hits are filled in on the way."""
+        nonlocal done
+        for item in source:
+            name, data = _split(item)
+            i = len(results)
+            results.append(None)
+            names.append(name)
+            hashes.append(None)
+            if os.path.splitext(name)[1].lower() not in upload_parser.PARSEABLE_EXTS:
+                # nothing to extract; no point shipping it to a worker
+                results[i] = upload_parser.parse_uncached(name, b"", **budget)
+                done += 1
+                continue
+            hashes[i], cached = upload_parser.cache_lookup(name, data, **budget)
+            if cached is not None:
+                results[i] = cached
+                done += 1
+                continue
+            return i, name, data
+        return None
+
+    workers = PARSE_WORKERS if workers is None else workers
+
+    if workers <= 0:
+        while (task := _next_miss()) is not None:
+            i, name, data = task
+            _finish(i, upload_parser.parse_uncached(name, data, **budget))
+        return results  # type: ignore[return-value]
+
+    ctx = None
+    slots: List[_Slot] = []
+    hard_limit = PARSE_TIMEOUT_S + PARSE_KILL_GRACE_S
+    exhausted = False
+
+    try:
+        while True:
+            # hand work to idle workers, starting them lazily (all-cache-hit batches spawn nothing)
+            while not exhausted:
+                idle = next((s for s in slots if s.task is None), None)
+                if idle is None and len(slots) >= workers:
+                    break
+                task = _next_miss()
+                if task is None:
+                    exhausted = True
+                    break
+                if ctx is None:
+                    ctx = _context()
+                if idle is None:
+                    idle = _Slot(ctx)
+                    slots.append(idle)
+                i, name, data = task
+                try:
+                    idle.conn.send((i, name, data, budget))
+                except (BrokenPipeError, OSError):
+                    # worker died between tasks; replace it and retry
+                    idle.kill()
+                    k = slots.index(idle)
+                    slots[k] = idle = _Slot(ctx)
+                    idle.conn.send((i, name, data, budget))
+                idle.task, idle.started = i, time.monotonic()
+
+            busy = [s for s in slots if s.task is not None]
+            if not busy:
+                break
+
+            now = time.monotonic()
+            wait_s = max(0.05, min(hard_limit - (now - s.started) for s in busy))
+            ready = wait([s.conn for s in busy], timeout=wait_s)
+
+            for k, s in enumerate(slots):
+                if s.task is None:
+                    continue
+                i = s.task
+                ext = os.path.splitext(names[i])[1].lower().lstrip(".")
+                if s.conn in ready:
+                    try:
+                        _, out = s.conn.recv()
+                    except (EOFError, OSError):
+                        # killed by the kernel (e.g. native crash or memory cap)
+                        s.kill()
+                        slots[k] = _Slot(ctx)
+                        out = {"ext": ext, "error": "parser process crashed"}
+                    else:
+                        s.task = None
+                    _finish(i, out)
+                elif time.monotonic() - s.started > hard_limit:
+                    # stuck in native code where SIGALRM cannot interrupt it
+                    s.kill()
+                    slots[k] = _Slot(ctx)
+                    _finish(i, {"ext": ext, "error": f"parse timed out after {PARSE_TIMEOUT_S}s"})
+    finally:
+        for s in slots:
+            s.stop()
+
+    return results  # type: ignore[return-value]
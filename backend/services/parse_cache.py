@@ -0,0 +1,122 @@
+"""
+Parsed-text cache for `upload_parser.parse_document`, keyed by
+(sha256(file bytes), extension, PARSER_VERSION).
+
+Re-uploading the same PDF/ZIP member skips PyMuPDF/python-docx entirely.
+Bumping `upload_parser.PARSER_VERSION` invalidates every older entry.
+
+Backends (PARSE_CACHE_BACKEND):
+  sqlite   (default) local file at PARSE_CACHE_PATH
+  off      no caching
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+PARSE_CACHE_BACKEND = os.getenv("PARSE_CACHE_BACKEND", "sqlite").lower()
+PARSE_CACHE_PATH = Path(os.getenv("PARSE_CACHE_PATH", "storage/cache/parse_cache.sqlite3"))
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] = _stats.get(name, 0) + n
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        out: Dict[str, Any] = dict(_stats)
+    lookups = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else None
+    out["backend"] = PARSE_CACHE_BACKEND
+    return out
+
+
+class SQLiteParseCache:
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as c:
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache ("
+                " content_hash TEXT NOT NULL, ext TEXT NOT NULL, parser_version TEXT NOT NULL,"
+                " value BLOB NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (content_hash, ext, parser_version))"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, content_hash: str, ext: str, version: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT value FROM parse_cache WHERE content_hash = ? AND ext = ? AND parser_version = ?",
+            (content_hash, ext, version),
+        ).fetchone()
+        if not row:
+            return None
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def set(self, content_hash: str, ext: str, version: str, value: Dict[str, Any]) -> None:
+        # parsed text compresses ~4-5x; keeps big PDFs cheap to hold on disk
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"), 6)
+        c = self._conn()
+        with c:
+            c.execute(
+                "INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?, ?)",
+                (content_hash, ext, version, blob, time.time()),
+            )
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _get_backend():
+    global _backend
+    if PARSE_CACHE_BACKEND == "off":
+        return None
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = SQLiteParseCache(PARSE_CACHE_PATH)
+    return _backend
+
+
+def lookup(content_hash: str, ext: str, version: str) -> Optional[Dict[str, Any]]:
+    try:
+        backend = _get_backend()
+        if not backend:
+            return None
+        val = backend.get(content_hash, ext, version)
+    except Exception:
+        _count("errors")
+        val = None
+    _count("hits" if val is not None else "misses")
+    return val
+
+
+def store(content_hash: str, ext: str, version: str, value: Dict[str, Any]) -> None:
+    try:
+        backend = _get_backend()
+        if backend:
+            backend.set(content_hash, ext, version, value)
+            _count("stores")
+    except Exception:
+        _count("errors")
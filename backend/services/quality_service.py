@@ -3,10 +3,7 @@ from typing import List, Dict
 from sqlalchemy.orm import Session
 from models.quality import QualityScore
 from datetime import datetime
-from sentence_transformers import SentenceTransformer, util
-
-# Load model globally
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from services.model_registry import get_model
 
 def compute_quality_scores(course_id: str, clos: List[str], assessments: List[str], feedback: List[str], db: Session) -> Dict:
     """
@@ -26,6 +23,9 @@ def compute_quality_scores(course_id: str, clos: List[str], assessments: List[st
     # ---------- Alignment ----------
     alignment = 0.0
     if clos and assessments:
+        from sentence_transformers import util
+
+        model = get_model("minilm")
         clo_embeddings = model.encode(clos, convert_to_tensor=True)
         assessment_embeddings = model.encode(assessments, convert_to_tensor=True)
         sim_matrix = util.cos_sim(clo_embeddings, assessment_embeddings)
@@ -1,8 +1,8 @@
-import math
 import re
 from typing import List, Dict, Any
 
 from services.openrouter_embeddings import embed_texts
+from services.similarity import best_match
 
 STOPWORDS = {
     "the","a","an","and","or","to","of","in","on","for","with","at","by","from","as",
@@ -74,14 +74,6 @@ def extract_delivered_chunks(delivered_text: str, max_chunks: int = 60, chunk_ch
 
     return chunks[:max_chunks]
 
-def _cos(a: List[float], b: List[float]) -> float:
-    dot = sum(x*y for x, y in zip(a, b))
-    na = sum(x*x for x in a)
-    nb = sum(y*y for y in b)
-    if na <= 0 or nb <= 0:
-        return 0.0
-    return dot / (math.sqrt(na) * math.sqrt(nb))
-
 def semantic_coverage(
     plan_text: str,
     delivered_text: str,
@@ -101,16 +93,13 @@ def semantic_coverage(
     plan_emb = embed_texts(plan_phrases)
     chunk_emb = embed_texts(delivered_chunks)
 
-    pv, cv = plan_emb["vectors"], chunk_emb["vectors"]
+    # one normalised matmul instead of a Python loop per (phrase, chunk) pair
+    best_idx, best_scores = best_match(plan_emb["vectors"], chunk_emb["vectors"])
 
     matched, missing, top_scores = [], [], []
 
     for i, phrase in enumerate(plan_phrases):
-        best, best_j = -1.0, -1
-        for j in range(len(delivered_chunks)):
-            s = _cos(pv[i], cv[j])
-            if s > best:
-                best, best_j = s, j
+        best, best_j = float(best_scores[i]), int(best_idx[i])
 
         top_scores.append({
             "phrase": phrase,
@@ -0,0 +1,42 @@
+"""
+Vectorised cosine-similarity kernel shared by semantic coverage, CLO
+alignment and the grading fairness audit.
+
+Rows are L2-normalised once, the full similarity matrix is a single matmul,
+and the best match is read off per row.
+"""
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+VectorsLike = Union[np.ndarray, Sequence[Sequence[float]]]
+
+
+def as_matrix(vectors: VectorsLike) -> np.ndarray:
+    m = np.asarray(vectors, dtype=np.float32)
+    if m.ndim == 1:
+        m = m.reshape(1, -1)
+    return m
+
+
+def normalize_rows(vectors: VectorsLike) -> np.ndarray:
+    """Unit-length rows; zero vectors stay zero (cosine 0 with everything)."""
+    m = as_matrix(vectors)
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def cosine_matrix(a: VectorsLike, b: VectorsLike) -> np.ndarray:
+    """(len(a), len(b)) matrix of cosine similarities."""
+    return normalize_rows(a) @ normalize_rows(b).T
+
+
+def best_match(a: VectorsLike, b: VectorsLike) -> Tuple[np.ndarray, np.ndarray]:
+    """For every row of `a`: index of the most similar row of `b` and its score."""
+    sims = cosine_matrix(a, b)
+    if sims.shape[1] == 0:
+        n = sims.shape[0]
+        return np.full(n, -1, dtype=np.int64), np.full(n, -1.0, dtype=np.float32)
+    idx = sims.argmax(axis=1)
+    return idx, sims[np.arange(sims.shape[0]), idx]
@@ -1,35 +1,78 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import re
+import uuid
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO, Optional
 
 
 # NOTE: This module is intentionally small and dependency-free for "local" storage.
 # It also supports optional Google Drive storage (service account), with a safe
 # fallback to local if Drive isn't configured or fails.
+#
+# Local files are content-addressed: bytes live once under
+#   LOCAL_ROOT/blobs/<sha[:2]>/<sha[2:4]>/<sha256><ext>
+# and every save adds a reference to the `storage_blobs` row for that hash.
+# Saving bytes that are already stored writes no file, only the reference
+# (plus whatever metadata row the caller creates), so every row that stores
+# a blob sha/key owns one reference and must `release_blob` it when the row
+# is deleted or re-pointed. tools/storage_gc.py deletes blobs whose
+# references have all been released.
 
 
 STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()  # local | gdrive
 LOCAL_ROOT = Path(os.getenv("LOCAL_STORAGE_ROOT", "storage")).resolve()
 LOCAL_ROOT.mkdir(parents=True, exist_ok=True)
+BLOB_ROOT = LOCAL_ROOT / "blobs"
+
+_EXT_RE = re.compile(r"^\.[a-z0-9]{1,10}$")
+_BLOB_NAME_RE = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]{1,10})?$")
 
 
 def _ts() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
 
 
-def save_bytes(namespace: str, filename: str, data: bytes) -> Dict[str, Any]:
+def _blob_ext(filename: str) -> str:
+    # kept on the blob name so tools that sniff by suffix (parsers, mimetypes) still work
+    ext = Path(filename or "").suffix.lower()
+    return ext if _EXT_RE.match(ext) else ""
+
+
+def blob_key(sha256: str, ext: str = "") -> str:
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def local_path(key: str) -> Path:
+    """Absolute path for a local storage key (blob keys and legacy cwd-relative paths)."""
+    p = Path(key)
+    if p.is_absolute():
+        return p
+    under_root = LOCAL_ROOT / p
+    if under_root.exists() or key.startswith("blobs/"):
+        return under_root
+    return p.resolve()
+
+
+def save_bytes(namespace: str, filename: str, data: bytes, db=None) -> Dict[str, Any]:
     """Persist bytes and return storage metadata.
 
     Returns:
       {
         "backend": "local"|"gdrive",
-        "key": "relative/path" or "drive_file_id",
+        "key": "blobs/ab/cd/<sha256>.ext" or "drive_file_id",
         "url": "web view url" or None,
-        "local_path": "/abs/path" (only for local)
+        "local_path": "/abs/path" (only for local),
+        "sha256": content hash (only for local),
+        "bytes": size,
+        "deduped": True when the blob already existed (only for local)
       }
+
+    `db`: the caller's session; the blob reference is added to it and commits
+    with the caller's rows. Without one the reference is committed right away.
     """
 
     if STORAGE_BACKEND == "gdrive":
@@ -37,18 +80,219 @@ def save_bytes(namespace: str, filename: str, data: bytes) -> Dict[str, Any]:
             return _save_gdrive(namespace, filename, data)
         except Exception:
             # fallback to local for reliability
-            return _save_local(namespace, filename, data)
+            return _save_local(namespace, filename, data, db=db)
 
-    return _save_local(namespace, filename, data)
+    return _save_local(namespace, filename, data, db=db)
 
 
-def _save_local(namespace: str, filename: str, data: bytes) -> Dict[str, Any]:
-    safe = filename.replace("/", "_").replace("\\", "_")
-    rel = Path(namespace) / f"{_ts()}_{safe}"
-    abs_path = (LOCAL_ROOT / rel).resolve()
-    abs_path.parent.mkdir(parents=True, exist_ok=True)
-    abs_path.write_bytes(data)
-    return {"backend": "local", "key": str(rel), "url": None, "local_path": str(abs_path)}
+def _save_local(namespace: str, filename: str, data: bytes, db=None) -> Dict[str, Any]:
+    # namespace only matters for Drive naming; local files are addressed by content
+    return save_blob(filename, data, db=db)
+
+
+def save_blob(filename: str, data: bytes, db=None) -> Dict[str, Any]:
+    """Content-addressed local save (always local, regardless of STORAGE_BACKEND)."""
+    sha = hashlib.sha256(data).hexdigest()
+    ext = _blob_ext(filename)
+    path = BLOB_ROOT / blob_key(sha, ext)[len("blobs/"):]
+
+    deduped = path.exists()
+    if deduped:
+        _touch(path)
+    else:
+        tmp = _tmp_path()
+        tmp.write_bytes(data)
+        _publish(tmp, path)
+
+    _add_ref(db, sha, len(data))
+    return _local_meta(sha, ext, path, len(data), deduped)
+
+
+def save_fileobj(filename: str, fileobj: BinaryIO, db=None, chunk_size: int = 1024 * 1024) -> Dict[str, Any]:
+    """Like save_blob, but streams from a file object (hashing while writing) instead of holding it in memory."""
+    h = hashlib.sha256()
+    size = 0
+    tmp = _tmp_path()
+    try:
+        with tmp.open("wb") as out:
+            while chunk := fileobj.read(chunk_size):
+                h.update(chunk)
+                size += len(chunk)
+                out.write(chunk)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    sha = h.hexdigest()
+    ext = _blob_ext(filename)
+    path = BLOB_ROOT / blob_key(sha, ext)[len("blobs/"):]
+
+    deduped = path.exists()
+    if deduped:
+        tmp.unlink(missing_ok=True)
+        _touch(path)
+    else:
+        _publish(tmp, path)
+
+    _add_ref(db, sha, size)
+    return _local_meta(sha, ext, path, size, deduped)
+
+
+def blob_sha_of(key_or_path: Optional[str]) -> Optional[str]:
+    """sha256 of a local blob from its storage key or absolute path; None for legacy/Drive locations."""
+    if not key_or_path:
+        return None
+    p = Path(key_or_path)
+    if not (key_or_path.startswith("blobs/") or p.is_relative_to(BLOB_ROOT)):
+        return None
+    m = _BLOB_NAME_RE.match(p.name)
+    return m.group(1) if m else None
+
+
+def release_blob(db, sha256: Optional[str]) -> None:
+    """Drop one reference (e.g. when the row pointing at the blob is deleted)."""
+    if not sha256:
+        return
+    from sqlalchemy import case, update
+    from models.storage_blob import StorageBlob, utcnow
+
+    db.execute(
+        update(StorageBlob)
+        .where(StorageBlob.sha256 == sha256)
+        .values(
+            ref_count=case((StorageBlob.ref_count > 0, StorageBlob.ref_count - 1), else_=0),
+            last_ref_at=utcnow(),
+        )
+    )
+
+
+def gc_blobs(db, grace_s: float = 24 * 3600, dry_run: bool = False) -> Dict[str, Any]:
+    """Delete unreferenced blobs (see tools/storage_gc.py).
+
+    Removed once they are older than `grace_s` (by last reference and file mtime):
+      - blobs whose storage_blobs.ref_count dropped to 0
+      - blob files with no storage_blobs row (their save was rolled back)
+      - leftover temp files from interrupted saves
+    """
+    import time
+    from sqlalchemy import delete, select
+    from models.storage_blob import StorageBlob
+
+    cutoff_ts = time.time() - grace_s
+    cutoff = datetime.fromtimestamp(cutoff_ts, timezone.utc)
+    out = {"released": 0, "orphans": 0, "tmp": 0, "files": 0, "bytes": 0, "dry_run": dry_run}
+
+    def _remove(path: Path) -> bool:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return False
+        if st.st_mtime >= cutoff_ts:
+            return False  # touched by a save inside the grace window
+        if not dry_run:
+            path.unlink(missing_ok=True)
+        out["files"] += 1
+        out["bytes"] += st.st_size
+        return True
+
+    dead = db.execute(
+        select(StorageBlob.sha256).where(StorageBlob.ref_count <= 0, StorageBlob.last_ref_at < cutoff)
+    ).scalars().all()
+    for sha in dead:
+        if not dry_run:
+            # re-check: a save may have re-referenced it since the select
+            res = db.execute(
+                delete(StorageBlob).where(
+                    StorageBlob.sha256 == sha, StorageBlob.ref_count <= 0, StorageBlob.last_ref_at < cutoff
+                )
+            )
+            db.commit()
+            if res.rowcount != 1:
+                continue
+        out["released"] += 1
+        for path in (BLOB_ROOT / sha[:2] / sha[2:4]).glob(f"{sha}*"):
+            _remove(path)
+
+    known = set(db.execute(select(StorageBlob.sha256)).scalars().all())
+    for path in BLOB_ROOT.glob("??/??/*"):
+        if path.name[:64] not in known and _remove(path):
+            out["orphans"] += 1
+
+    for path in (BLOB_ROOT / ".tmp").glob("*"):
+        if _remove(path):
+            out["tmp"] += 1
+
+    return out
+
+
+def _local_meta(sha: str, ext: str, path: Path, size: int, deduped: bool) -> Dict[str, Any]:
+    return {
+        "backend": "local",
+        "key": blob_key(sha, ext),
+        "url": None,
+        "local_path": str(path),
+        "sha256": sha,
+        "bytes": size,
+        "deduped": deduped,
+    }
+
+
+def _tmp_path() -> Path:
+    tmp_dir = BLOB_ROOT / ".tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    return tmp_dir / uuid.uuid4().hex
+
+
+def _publish(tmp: Path, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # atomic; a concurrent save of the same bytes just replaces identical content
+    os.replace(tmp, path)
+
+
+def _touch(path: Path) -> None:
+    # keeps a just-reused blob out of the GC grace window
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _add_ref(db, sha256: str, size: int) -> None:
+    from sqlalchemy import update
+    from models.storage_blob import StorageBlob, utcnow
+
+    own = db is None
+    if own:
+        from core.db import SessionLocal
+        db = SessionLocal()
+    try:
+        now = utcnow()
+        if db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+
+            stmt = insert(StorageBlob).values(
+                sha256=sha256, size=size, ref_count=1, created_at=now, last_ref_at=now
+            )
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[StorageBlob.sha256],
+                    set_={"ref_count": StorageBlob.ref_count + 1, "last_ref_at": now},
+                )
+            )
+        else:
+            res = db.execute(
+                update(StorageBlob)
+                .where(StorageBlob.sha256 == sha256)
+                .values(ref_count=StorageBlob.ref_count + 1, last_ref_at=now)
+            )
+            if res.rowcount == 0:
+                db.add(StorageBlob(sha256=sha256, size=size, ref_count=1, created_at=now, last_ref_at=now))
+                db.flush()
+        if own:
+            db.commit()
+    finally:
+        if own:
+            db.close()
 
 
 def _save_gdrive(namespace: str, filename: str, data: bytes) -> Dict[str, Any]:
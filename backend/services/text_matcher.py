@@ -0,0 +1,43 @@
+"""
+Compiled multi-keyword matcher for completeness rules and upload validation.
+
+A matcher is built once per keyword set (rule-set version): keywords are
+lower-cased and de-duplicated across rules, and each keyword records which
+shorter keywords it contains, so a hit on "final exam" also settles "exam"
+without another scan. `found()` then checks every distinct keyword at most
+once against text that was lower-cased once.
+
+Each check is CPython's substring search (C, two-way/fast-search); on 2 MB
+of text that is several times faster than a single combined regex
+alternation, which has to be driven position by position.
+"""
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, Iterable, Set, Tuple
+
+
+class KeywordMatcher:
+    def __init__(self, keywords: Iterable[str]):
+        uniq = {(k or "").lower() for k in keywords}
+        # longest first, so implied (contained) keywords are settled for free
+        self.keywords: Tuple[str, ...] = tuple(sorted(uniq, key=lambda k: (-len(k), k)))
+        self._implied: Dict[str, FrozenSet[str]] = {
+            k: frozenset(o for o in self.keywords if o != k and o in k) for k in self.keywords
+        }
+
+    def found(self, text_lower: str) -> Set[str]:
+        """Keywords that occur in `text_lower` (caller lower-cases once)."""
+        hits: Set[str] = set()
+        missed: Set[str] = set()
+        for k in self.keywords:
+            if k in hits or k in missed:
+                continue
+            if k in text_lower:
+                hits.add(k)
+                hits |= self._implied[k]
+            else:
+                missed.add(k)
+        return hits
+
+    def __len__(self) -> int:
+        return len(self.keywords)
@@ -1,6 +1,4 @@
 # services/text_processing.py
-import os
-import tempfile
 from typing import Dict, Optional, Union
 from services import adapter  # your adapter import; adapter.parse_document(path) required
 
@@ -10,21 +8,10 @@ def parse_path(path: str) -> Dict:
 
 def parse_bytes(file_bytes: bytes, filename: str) -> Dict:
     """
-    Save bytes to a temp file and call adapter.parse_document on it.
-    Returns the adapter output dict (text, ext, pages etc).
+    Parse raw bytes in memory (no temp file).
+    Returns the parser output dict (text, ext, pages etc).
     """
-    ext = os.path.splitext(filename)[1].lower()
-    with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
-        tmp.write(file_bytes)
-        tmp.flush()
-        tmp_path = tmp.name
-    try:
-        return adapter.parse_document(tmp_path)
-    finally:
-        try:
-            os.unlink(tmp_path)
-        except Exception:
-            pass
+    return adapter.parse_bytes(file_bytes, filename)
 
 def extract_text_from_path_or_bytes(path_or_bytes: Union[str, bytes], filename: Optional[str] = None) -> str:
     """
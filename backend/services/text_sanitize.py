@@ -0,0 +1,52 @@
+"""
+Text sanitisation for extracted document text before it is stored or sent
+to the LLM (grading, assessments, weekly execution uploads).
+
+PostgreSQL TEXT/VARCHAR cannot store NUL bytes (\\x00), and PDF/DOCX
+extraction leaves other C0 control characters behind. `clean_text` drops
+all of them except \\t, \\n and \\r, then strips surrounding whitespace;
+DEL and non-ASCII characters are kept, exactly as the per-character loops
+it replaces did.
+
+The control characters are deleted in one C pass with bytes.translate over
+the UTF-8 encoding: UTF-8 never uses bytes below 0x20 except for those
+characters themselves, so this is exact for any text ("surrogatepass" keeps
+lone surrogates from broken extractions round-tripping). On 100k+ character
+documents it is far cheaper than a Python loop or a regex; see
+tools/bench_clean_text.py.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Optional
+
+# C0 controls except \t (09), \n (0a), \r (0d); includes NUL
+_CONTROL_BYTES = bytes(c for c in range(32) if c not in (9, 10, 13))
+_WS_RE = re.compile(r"\s+")
+
+
+def clean_text(val: Any) -> str:
+    """Drop NUL/control characters (keeping \\t \\n \\r) and strip. None -> ""."""
+    if val is None:
+        return ""
+    if not isinstance(val, str):
+        val = str(val)
+    raw = val.encode("utf-8", "surrogatepass")
+    return raw.translate(None, _CONTROL_BYTES).decode("utf-8", "surrogatepass").strip()
+
+
+def sanitize_text(
+    val: Any,
+    max_chars: Optional[int] = None,
+    collapse_whitespace: bool = False,
+) -> str:
+    """
+    clean_text, then optionally collapse whitespace runs to one space and
+    cut to `max_chars` (same result as `clean_text(val)[:max_chars]`).
+    """
+    t = clean_text(val)
+    if collapse_whitespace:
+        t = _WS_RE.sub(" ", t)
+    if max_chars is not None:
+        t = t[:max_chars]
+    return t
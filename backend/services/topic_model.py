@@ -0,0 +1,243 @@
+"""
+Persistent topic model for student feedback comments.
+
+One MiniBatchKMeans (TOPIC_K clusters) over MiniLM comment embeddings,
+stored at TOPIC_MODEL_PATH and shared by the API and workers:
+
+  - `assign_topics(embeddings)` folds a batch of new comments into the model
+    with `partial_fit` and labels them by nearest centroid (O(k) per comment),
+    so topic ids mean the same thing across uploads.
+  - `fit_topics(batches)` refits from scratch over the stored corpus
+    (tools/fit_feedback_topics.py).
+  - `topic_keywords(db)` describes each topic with c-TF-IDF terms over the
+    stored comments, cached per model version.
+
+Every update bumps `version`. Updates take an exclusive file lock and
+re-read the model from disk first, so concurrent ingests in different
+processes don't lose each other's updates. A model fitted with a different
+SENTENCE_MODEL or embedding size is discarded and started fresh.
+"""
+from __future__ import annotations
+
+import fcntl
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.student_feedback import StudentFeedback
+from services.model_registry import SENTENCE_MODEL
+
+
+TOPIC_K = int(os.getenv("TOPIC_K", "8"))
+TOPIC_MODEL_PATH = Path(os.getenv("TOPIC_MODEL_PATH", "storage/models/feedback_topics.joblib"))
+TOPIC_KEYWORDS_TOP_N = int(os.getenv("TOPIC_KEYWORDS_TOP_N", "10"))
+TOPIC_KEYWORDS_MAX_DOCS = int(os.getenv("TOPIC_KEYWORDS_MAX_DOCS", "50000"))
+
+_lock = threading.Lock()
+_state: Optional[Dict[str, Any]] = None
+_state_mtime: Optional[float] = None
+
+_keywords_cache: "OrderedDict[tuple, Dict[int, List[str]]]" = OrderedDict()
+_KEYWORDS_CACHE_SIZE = 8
+
+
+@contextmanager
+def _file_lock():
+    TOPIC_MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(TOPIC_MODEL_PATH) + ".lock", "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _load() -> Optional[Dict[str, Any]]:
+    """Current model state, re-read when another process has saved a newer one."""
+    global _state, _state_mtime
+    try:
+        mtime = TOPIC_MODEL_PATH.stat().st_mtime
+    except FileNotFoundError:
+        _state, _state_mtime = None, None
+        return None
+    if _state is None or mtime != _state_mtime:
+        import joblib
+
+        state = joblib.load(TOPIC_MODEL_PATH)
+        if state.get("sentence_model") != SENTENCE_MODEL:
+            state = None
+        _state, _state_mtime = state, mtime
+    return _state
+
+
+def _save(state: Dict[str, Any]) -> None:
+    global _state, _state_mtime
+    import joblib
+
+    tmp = TOPIC_MODEL_PATH.with_suffix(TOPIC_MODEL_PATH.suffix + ".tmp")
+    joblib.dump(state, tmp)
+    os.replace(tmp, TOPIC_MODEL_PATH)
+    _state, _state_mtime = state, TOPIC_MODEL_PATH.stat().st_mtime
+
+
+def _new_state() -> Dict[str, Any]:
+    from sklearn.cluster import MiniBatchKMeans
+
+    return {
+        "km": MiniBatchKMeans(n_clusters=TOPIC_K, random_state=42, n_init=3),
+        "version": 0,
+        "seen": 0,
+        "dim": None,
+        "sentence_model": SENTENCE_MODEL,
+        "updated_at": None,
+    }
+
+
+def _partial_fit(state: Dict[str, Any], x: np.ndarray) -> None:
+    state["km"].partial_fit(x)
+    state["dim"] = int(x.shape[1])
+    state["seen"] += int(len(x))
+    state["version"] += 1
+    state["updated_at"] = time.time()
+
+
+def assign_topics(embeddings: np.ndarray, update: bool = True) -> List[int]:
+    """
+    Topic id per embedding row. With `update`, the batch is first folded into
+    the persistent model (partial_fit). Until the model has seen TOPIC_K
+    comments it cannot be initialized, and every comment gets topic 0.
+    """
+    x = np.asarray(embeddings, dtype=np.float32)
+    n = len(x)
+    if not n:
+        return []
+
+    with _lock:
+        if update:
+            with _file_lock():
+                state = _load()
+                if state is not None and state["dim"] != x.shape[1]:
+                    state = None
+                if state is None:
+                    if n < TOPIC_K:
+                        return [0] * n
+                    state = _new_state()
+                _partial_fit(state, x)
+                _save(state)
+        else:
+            state = _load()
+            if state is None or state["dim"] != x.shape[1]:
+                return [0] * n
+        return state["km"].predict(x).tolist()
+
+
+def fit_topics(batches: Iterable[np.ndarray]) -> Dict[str, Any]:
+    """
+    Fit a fresh model over `batches` of embeddings (e.g. the whole stored
+    corpus) and replace the saved one. Batches smaller than TOPIC_K are
+    merged into the next one so the first partial_fit can initialize.
+    """
+    state = _new_state()
+    pending: List[np.ndarray] = []
+    for b in batches:
+        pending.append(np.asarray(b, dtype=np.float32))
+        if sum(len(p) for p in pending) >= TOPIC_K:
+            _partial_fit(state, np.vstack(pending))
+            pending = []
+    if pending and state["seen"]:
+        _partial_fit(state, np.vstack(pending))
+    if not state["seen"]:
+        raise ValueError(f"Need at least {TOPIC_K} comments to fit {TOPIC_K} topics")
+
+    with _lock, _file_lock():
+        prev = _load()
+        state["version"] = (prev["version"] if prev else 0) + 1
+        _save(state)
+    return topic_model_stats()
+
+
+def topic_model_stats() -> Dict[str, Any]:
+    with _lock:
+        state = _load()
+    if state is None:
+        return {"fitted": False, "k": TOPIC_K, "path": str(TOPIC_MODEL_PATH)}
+    return {
+        "fitted": True,
+        "k": int(state["km"].n_clusters),
+        "version": state["version"],
+        "seen": state["seen"],
+        "dim": state["dim"],
+        "sentence_model": state["sentence_model"],
+        "updated_at": state["updated_at"],
+        "path": str(TOPIC_MODEL_PATH),
+    }
+
+
+def ctfidf_keywords(docs_by_topic: Dict[int, List[str]], top_n: int) -> Dict[int, List[str]]:
+    """
+    Class-based TF-IDF: each topic's comments form one document; a term's
+    weight is its in-topic frequency (L1-normalized) times
+    log(1 + avg words per topic / term frequency across topics).
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.preprocessing import normalize
+
+    topics = sorted(t for t, docs in docs_by_topic.items() if docs)
+    if not topics:
+        return {}
+    cv = CountVectorizer(stop_words="english", token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z]+\b")
+    try:
+        counts = cv.fit_transform([" ".join(docs_by_topic[t]) for t in topics])
+    except ValueError:  # only stop words / empty vocabulary
+        return {t: [] for t in topics}
+
+    tf = normalize(counts, norm="l1", axis=1)
+    avg_words = counts.sum() / len(topics)
+    idf = np.log1p(avg_words / np.asarray(counts.sum(axis=0)).ravel())
+    scores = tf.multiply(idf).toarray()
+
+    vocab = cv.get_feature_names_out()
+    out: Dict[int, List[str]] = {}
+    for row, t in zip(scores, topics):
+        nz = np.flatnonzero(row)
+        top = nz[np.argsort(-row[nz], kind="stable")[:top_n]]
+        out[t] = [str(vocab[i]) for i in top]
+    return out
+
+
+def topic_keywords(db: Session, top_n: Optional[int] = None) -> Dict[str, Any]:
+    """c-TF-IDF keywords per topic over the latest stored comments, cached per model version."""
+    top_n = top_n or TOPIC_KEYWORDS_TOP_N
+    stats = topic_model_stats()
+    key = (stats.get("version"), top_n)
+
+    with _lock:
+        hit = _keywords_cache.get(key)
+        if hit is not None:
+            _keywords_cache.move_to_end(key)
+    if hit is None:
+        rows = (
+            db.query(StudentFeedback.topic, StudentFeedback.comments)
+            .order_by(StudentFeedback.id.desc())
+            .limit(TOPIC_KEYWORDS_MAX_DOCS)
+            .all()
+        )
+        docs: Dict[int, List[str]] = {}
+        for topic, comment in rows:
+            if comment:
+                docs.setdefault(int(topic or 0), []).append(comment)
+        hit = ctfidf_keywords(docs, top_n)
+        if stats["fitted"]:  # unfitted has no version to invalidate on
+            with _lock:
+                _keywords_cache[key] = hit
+                while len(_keywords_cache) > _KEYWORDS_CACHE_SIZE:
+                    _keywords_cache.popitem(last=False)
+
+    return {"version": stats.get("version"), "topics": {str(t): words for t, words in sorted(hit.items())}}
@@ -20,10 +20,11 @@ def _try(name: str, path: str):
     fn = getattr(parser, name, None)
     return fn(path) if callable(fn) else None
 
-def parse_document(path: str) -> Dict[str, Any]:
+def parse_document(path: str, **kwargs) -> Dict[str, Any]:
+    """kwargs (e.g. PDF max_chars/max_pages/sample) go to upload_parser.parse_document."""
     fn = getattr(parser, "parse_document", None)
     if callable(fn):
-        return fn(path)
+        return fn(path, **kwargs)
 
     for name in CANDIDATE_PARSE_FUNCS:
         if name == "parse_document":
@@ -38,3 +39,8 @@ def parse_document(path: str) -> Dict[str, Any]:
 
     # Fallback: minimal shape
     return {"ext": os.path.splitext(path)[1].lstrip(".").lower()}
+
+
+def parse_bytes(data: bytes, filename: str, **kwargs) -> Dict[str, Any]:
+    """Parse in-memory file bytes; `filename` supplies the type. No temp file."""
+    return parser.parse_bytes(data, filename, **kwargs)
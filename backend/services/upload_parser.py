@@ -1,42 +1,122 @@
 """Module for parsing uploaded document files (PDF, DOCX)."""
+import hashlib
 import io
 import os
-from typing import Dict, Any, Optional, Tuple, List
+from typing import Dict, Any, Optional, Tuple, List, Union
 from pptx import Presentation
 from pathlib import Path
 
 import fitz  # PyMuPDF
 from docx import Document as DocxDocument
 
-def _parse_pdf(path: str) -> Tuple[Optional[str], Optional[int]]:
+from services import parse_cache
+
+# Bump whenever extraction output changes; older parse-cache entries are then ignored.
+PARSER_VERSION = "2"
+
+# Default PDF budget (0 = unlimited). Callers that truncate anyway pass their own.
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "0"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "0"))
+PDF_SAMPLE = os.getenv("PDF_SAMPLE", "head")  # head | even
+
+PARSEABLE_EXTS = {".pdf", ".docx", ".pptx", ".txt", ".md"}
+
+
+# a path on disk, or the raw bytes of a file (e.g. a ZIP member)
+Source = Union[str, bytes]
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
     with open(path, "rb") as fh:
-        data = fh.read()
-    with fitz.open(stream=data, filetype="pdf") as doc:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _content_hash(src: Source) -> str:
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(src).hexdigest()
+    return file_sha256(src)
+
+
+def _spread_order(indices: List[int]):
+    """Yield `indices` coarse-to-fine: ends first, then midpoints of ever smaller gaps."""
+    n = len(indices)
+    if not n:
+        return
+    seen = set()
+    parts = 1
+    while len(seen) < n:
+        for k in range(parts + 1):
+            i = round(k * (n - 1) / parts)
+            if i not in seen:
+                seen.add(i)
+                yield indices[i]
+        parts *= 2
+
+
+def _parse_pdf(
+    src: Source,
+    max_chars: int = 0,
+    max_pages: int = 0,
+    sample: str = "head",
+) -> Tuple[Optional[str], Optional[int], int]:
+    """
+    Returns (text, page_count, pages_read).
+
+    Stops once `max_chars` characters or `max_pages` pages have been read
+    (0 = no limit). sample="head" reads from the first page; sample="even"
+    spreads the budget across the whole document (text stays in page order).
+    """
+    # by path PyMuPDF reads pages lazily; bytes are used in place (no extra copy)
+    opened = fitz.open(stream=src, filetype="pdf") if isinstance(src, (bytes, bytearray)) else fitz.open(src, filetype="pdf")
+    with opened as doc:
         pages = doc.page_count
-        out = []
-        for i in range(pages):
-            out.append(doc.load_page(i).get_text("text"))
-        txt = "\n".join(out).strip()
-        return (txt if txt else None), pages
+        idx = list(range(pages))
+        if max_pages and pages > max_pages:
+            if sample == "even":
+                step = (pages - 1) / max(1, max_pages - 1)
+                idx = sorted({round(k * step) for k in range(max_pages)})
+            else:
+                idx = idx[:max_pages]
 
-def _parse_docx(path: str) -> Tuple[Optional[str], Optional[int]]:
-    with open(path, "rb") as fh:
-        bio = io.BytesIO(fh.read())
-    doc = DocxDocument(bio)
+        order = _spread_order(idx) if sample == "even" else iter(idx)
+        got: Dict[int, str] = {}
+        chars = 0
+        for i in order:
+            t = doc.load_page(i).get_text("text")
+            got[i] = t
+            chars += len(t)
+            if max_chars and chars >= max_chars:
+                break
+
+        txt = "\n".join(got[i] for i in sorted(got)).strip()
+        return (txt if txt else None), pages, len(got)
+
+
+def _as_file(src: Source):
+    return io.BytesIO(src) if isinstance(src, (bytes, bytearray)) else src
+
+
+def _parse_docx(src: Source) -> Tuple[Optional[str], Optional[int]]:
+    doc = DocxDocument(_as_file(src))
     txt = "\n".join([p.text for p in doc.paragraphs]).strip()
     return (txt if txt else None), None
 
-def _parse_txt(path: str) -> Tuple[Optional[str], Optional[int]]:
+def _parse_txt(src: Source) -> Tuple[Optional[str], Optional[int]]:
     try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        if isinstance(src, (bytes, bytearray)):
+            return bytes(src).decode("utf-8", errors="ignore"), None
+        with open(src, "r", encoding="utf-8", errors="ignore") as f:
             return f.read(), None
     except Exception:
         return None, None
 
 
-def _parse_pptx(path: str) -> Tuple[Optional[str], Optional[int]]:
+def _parse_pptx(src: Source) -> Tuple[Optional[str], Optional[int]]:
     try:
-        prs = Presentation(path)
+        prs = Presentation(_as_file(src))
         out = []
         for slide in prs.slides:
             for shape in slide.shapes:
@@ -47,30 +127,132 @@ def _parse_pptx(path: str) -> Tuple[Optional[str], Optional[int]]:
         return None, None
 
 
-def parse_document(path: str) -> Dict[str, Any]:
-    ext = os.path.splitext(path)[1].lower()
+def _budget(max_chars: Optional[int], max_pages: Optional[int], sample: Optional[str]) -> Tuple[int, int, str]:
+    return (
+        PDF_MAX_CHARS if max_chars is None else int(max_chars),
+        PDF_MAX_PAGES if max_pages is None else int(max_pages),
+        sample or PDF_SAMPLE,
+    )
+
+
+def _cache_version(ext: str, budget: Tuple[int, int, str]) -> str:
+    # a budgeted PDF parse is a different result from a full one
+    if ext == ".pdf":
+        return f"{PARSER_VERSION}|c{budget[0]}|p{budget[1]}|{budget[2]}"
+    return PARSER_VERSION
+
+
+def cache_lookup(
+    name: str,
+    data: Optional[bytes] = None,
+    *,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    sample: Optional[str] = None,
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    (content hash, cached parse result or None) for the file at `name`, or for
+    `data` when given (`name` then only supplies the extension). The hash is
+    None for unparseable/unreadable files.
+    """
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in PARSEABLE_EXTS:
+        return None, None
+    try:
+        content_hash = _content_hash(name if data is None else data)
+    except OSError:
+        return None, None
+    version = _cache_version(ext, _budget(max_chars, max_pages, sample))
+    return content_hash, parse_cache.lookup(content_hash, ext, version)
+
+
+def cache_store(
+    content_hash: Optional[str],
+    name: str,
+    out: Dict[str, Any],
+    *,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    sample: Optional[str] = None,
+) -> None:
+    # failures are not cached so a fixed file/parser gets another go
+    if content_hash and "error" not in out:
+        ext = os.path.splitext(name)[1].lower()
+        parse_cache.store(content_hash, ext, _cache_version(ext, _budget(max_chars, max_pages, sample)), out)
+
+
+def parse_uncached(
+    name: str,
+    data: Optional[bytes] = None,
+    *,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    sample: Optional[str] = None,
+) -> Dict[str, Any]:
+    ext = os.path.splitext(name)[1].lower()
+    src: Source = name if data is None else data
     out: Dict[str, Any] = {"ext": ext.lstrip(".")}
     try:
         if ext == ".pdf":
-            text, pages = _parse_pdf(path)
+            text, pages, pages_read = _parse_pdf(src, *_budget(max_chars, max_pages, sample))
             out["text"] = text
             out["pages"] = pages
+            out["pages_read"] = pages_read
         elif ext == ".docx":
-            text, _ = _parse_docx(path)
+            text, _ = _parse_docx(src)
             out["text"] = text
         elif ext == ".pptx":
-            text, slides = _parse_pptx(path)
+            text, slides = _parse_pptx(src)
             out["text"] = text
             out["slides"] = slides
         elif ext in [".txt", ".md"]:
-            text, _ = _parse_txt(path)
+            text, _ = _parse_txt(src)
             out["text"] = text
         else:
             pass
     except Exception as e:
-        out["error"] = str(e)
+        out["error"] = str(e) or type(e).__name__
+    return out
+
+
+def _parse(name: str, data: Optional[bytes], use_cache: bool, **budget) -> Dict[str, Any]:
+    content_hash = None
+    if use_cache:
+        content_hash, cached = cache_lookup(name, data, **budget)
+        if cached is not None:
+            return cached
+
+    out = parse_uncached(name, data, **budget)
+    cache_store(content_hash, name, out, **budget)
     return out
 
+
+def parse_document(
+    path: str,
+    use_cache: bool = True,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    sample: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Parse one file. For PDFs, `max_chars`/`max_pages`/`sample` bound the
+    extraction (defaults: PDF_MAX_CHARS/PDF_MAX_PAGES/PDF_SAMPLE) and the
+    result carries `pages` (total) and `pages_read`.
+    """
+    return _parse(path, None, use_cache, max_chars=max_chars, max_pages=max_pages, sample=sample)
+
+
+def parse_bytes(
+    data: bytes,
+    filename: str,
+    use_cache: bool = True,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    sample: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Like parse_document, but from in-memory bytes; `filename` supplies the type."""
+    return _parse(filename, data, use_cache, max_chars=max_chars, max_pages=max_pages, sample=sample)
+
 def extract_text_from_file(path: str) -> str:
     p = Path(path)
     ext = p.suffix.lower()
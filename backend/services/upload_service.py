@@ -0,0 +1,76 @@
+"""
+Upload bookkeeping shared by routers/uploads.py and tools.
+
+Validation: the REQUIRED_SECTIONS check is computed once when an Upload row
+is created (course folders, weekly ZIPs, submissions, assessment questions,
+CLO materials all go through `set_validation`) and stored on the row; rows
+from before that are scored by tools/backfill_upload_validation.py.
+
+Deleting: an Upload row owns one reference to its content-addressed blob
+(services/storage.py). Deleting the row releases that reference in the same
+transaction, so tools/storage_gc.py can reclaim the file once no other row
+points at the same bytes. Rows that point at the upload (completeness runs,
+submissions, assessment files, execution audits) are unlinked by their
+ON DELETE SET NULL foreign keys.
+"""
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+from models.uploads import Upload, UploadFileItem
+from services.storage import release_blob
+from services.text_matcher import KeywordMatcher
+
+
+# --- validation spec (simple heuristic you can tune)
+REQUIRED_SECTIONS = [
+    ("course objectives", "course_objectives"),
+    ("clo", "clos"),
+    ("lecture", "lecture_notes"),
+    ("quiz", "quizzes"),
+    ("assignment", "assignments"),
+    ("midterm", "midterm"),
+    ("final exam", "final_exam"),
+    ("attendance", "attendance"),
+    ("grading", "grading_rubric"),
+]
+
+# validation only looks at this much text, so PDFs are not read past it
+VALIDATION_MAX_CHARS = 2_000_000
+
+_SECTION_MATCHER = KeywordMatcher(needle for needle, _ in REQUIRED_SECTIONS)
+
+
+def compute_validation(texts: list[str]) -> tuple[str, dict]:
+    big = "\n".join(t or "" for t in texts)[:VALIDATION_MAX_CHARS].lower()
+    hits = _SECTION_MATCHER.found(big)
+    present = {key: (needle in hits) for needle, key in REQUIRED_SECTIONS}
+
+    total = len(present)
+    found = sum(1 for v in present.values() if v)
+    pct = round(found / total * 100) if total else 0
+    missing = [k for k, v in present.items() if not v]
+    status_str = "complete" if pct >= 80 else ("incomplete" if found else "invalid")
+
+    return status_str, {
+        "completeness_percentage": pct,
+        "missing_items": missing,
+        "found": [k for k, v in present.items() if v],
+    }
+
+
+def set_validation(upload: Upload, texts: list[str]) -> tuple[str, dict]:
+    status_str, details = compute_validation(texts)
+    upload.validation_status = status_str
+    upload.validation_details = details
+    return status_str, details
+
+
+def delete_upload(db: Session, upload: Upload, commit: bool = True) -> None:
+    release_blob(db, upload.blob_sha256)
+    db.query(UploadFileItem).filter(UploadFileItem.upload_id == upload.id).delete(synchronize_session=False)
+    db.delete(upload)  # UploadText goes with it (relationship cascade)
+    if commit:
+        db.commit()
+    else:
+        db.flush()
@@ -1,10 +1,9 @@
 import json
 import re
-import zipfile
 import os
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
@@ -12,11 +11,13 @@ from sqlalchemy import or_
 from models.course import Course
 from models.uploads import Upload, UploadText, UploadFileItem
 from models.course_execution import WeeklyPlan, WeeklyExecution, DeviationLog
-from models.completeness import CompletenessRun
 from models.grading_audit import GradingAudit
 
-from services.upload_adapter import parse_document
+from services.zip_ingest import ingest_zip
+from services.storage import save_blob
 from services.execution_compare import compare_week
+from services.text_sanitize import clean_text, sanitize_text
+from services.upload_service import set_validation
 
 # OPTIONAL (safe imports)
 try:
@@ -38,23 +39,6 @@ PLACEHOLDER_HINTS = {
 
 # ----------------------- helpers -----------------------
 
-def clean_text(val: Optional[str]) -> str:
-    if val is None:
-        return ""
-    if not isinstance(val, str):
-        val = str(val)
-
-    val = val.replace("\x00", "")
-    out = []
-    for ch in val:
-        o = ord(ch)
-        if ch in ("\n", "\r", "\t"):
-            out.append(ch)
-        elif o >= 32:
-            out.append(ch)
-    return "".join(out).strip()
-
-
 def _strip_placeholders(text: str) -> str:
     t = clean_text(text).lower()
     for h in PLACEHOLDER_HINTS:
@@ -62,29 +46,6 @@ def _strip_placeholders(text: str) -> str:
     return re.sub(r"\s+", " ", t).strip()
 
 
-def _safe_extract_zip(zip_path: str, dest_dir: str) -> list[str]:
-    dest = Path(dest_dir)
-    dest.mkdir(parents=True, exist_ok=True)
-
-    extracted: list[str] = []
-    with zipfile.ZipFile(zip_path, "r") as z:
-        names = z.namelist()[:MAX_FILES]
-        for member in names:
-            if member.endswith("/"):
-                continue
-
-            target = (dest / member).resolve()
-            if not str(target).startswith(str(dest.resolve())):
-                continue
-
-            target.parent.mkdir(parents=True, exist_ok=True)
-            with z.open(member) as src, open(target, "wb") as out:
-                out.write(src.read())
-
-            extracted.append(str(target))
-    return extracted
-
-
 def _extract_week_section(text: str, week_no: int) -> str:
     t = clean_text(text)
     if not t:
@@ -155,7 +116,7 @@ def handle_weekly_zip_upload(
     user_id: str,
     zip_file_bytes: bytes,
     zip_filename: str,
-    storage_root: str = "uploads/weekly",
+    progress: Optional[Callable[[int, Optional[int], Optional[str]], None]] = None,
 ) -> Dict[str, Any]:
 
     now = datetime.now(timezone.utc)
@@ -167,43 +128,40 @@ def handle_weekly_zip_upload(
 
     real_course_id = str(course.id)
 
-    # ---------- store zip ----------
-    upload_ts = str(int(now.timestamp() * 1000))
-    base_dir = Path(storage_root) / real_course_id / f"week_{week_no}" / upload_ts
-    base_dir.mkdir(parents=True, exist_ok=True)
-
-    zip_path = base_dir / (zip_filename or f"week_{week_no}.zip")
-    zip_path.write_bytes(zip_file_bytes)
-
-    extracted_dir = base_dir / "extracted"
-    files = _safe_extract_zip(str(zip_path), str(extracted_dir))
-
-    # ---------- parse files ----------
+    # ---------- parse members straight from the archive ----------
     texts: List[str] = []
     manifest: List[Dict[str, Any]] = []
 
-    for fp in files:
-        ext = Path(fp).suffix.lower()
-        if ext not in ALLOWED_EXTS:
-            continue
+    if progress:
+        progress(0, None, "reading ZIP")
+    # only MAX_TEXT_CHARS survive compaction, so don't read whole textbooks;
+    # sample pages across each PDF rather than just its opening chapters
+    ingested = ingest_zip(
+        zip_file_bytes,
+        exts=ALLOWED_EXTS,
+        max_files=MAX_FILES,
+        progress=progress,
+        max_chars=MAX_TEXT_CHARS,
+        sample="even",
+    )
+    files = ingested["files"]
 
-        try:
-            parsed = parse_document(fp) or {}
-            raw = parsed.get("text") or ""
-            txt = clean_text(raw)
-            err = parsed.get("error")
-        except Exception as e:
-            txt = ""
-            err = str(e)
+    for f in files:
+        parsed = f["parsed"]
+        txt = clean_text(parsed.get("text") or "")
 
         if txt:
             texts.append(txt)
 
         manifest.append({
-            "path": fp,
-            "ext": ext,
+            "path": f["name"],
+            "member": f["name"],
+            "ext": f["ext"],
+            "bytes": f["bytes"],
             "chars": len(txt),
-            "error": err,
+            "pages": parsed.get("pages"),
+            "pages_read": parsed.get("pages_read"),
+            "error": parsed.get("error"),
         })
 
     delivered_text = _compact_text_for_matching("\n\n".join(texts))
@@ -245,6 +203,8 @@ def handle_weekly_zip_upload(
         raise ValueError("No weekly plan text available")
 
     # ---------- COVERAGE ----------
+    if progress:
+        progress(len(files), len(files), "comparing with weekly plan")
     coverage_score, missing_terms, plan_terms = compare_week(plan_text, delivered_text)
 
     coverage_percent = float(coverage_score) * 100.0
@@ -275,40 +235,42 @@ def handle_weekly_zip_upload(
         except Exception:
             clo_alignment_result = None
 
+    # ---------- store zip (content-addressed; a re-upload adds only a reference) ----------
+    zip_filename = zip_filename or f"week_{week_no}.zip"
+    saved = save_blob(zip_filename, zip_file_bytes, db=db)
+
     # ---------- save Upload ----------
     up = Upload(
         course_id=real_course_id,
         filename_original=zip_filename,
-        filename_stored=zip_path.name,
+        filename_stored=Path(zip_filename).name,
         ext="zip",
         file_type_guess="weekly_zip",
         week_no=week_no,
         bytes=len(zip_file_bytes),
+        # member files are served out of this archive (nothing is extracted)
+        storage_backend="local",
+        storage_key=saved["key"],
+        blob_sha256=saved["sha256"],
         parse_log=manifest,
         created_at=now.replace(tzinfo=None),
     )
+    set_validation(up, [delivered_text])
     db.add(up)
     db.flush()
 
     # ---------- per-file metadata ----------
     for m in manifest:
-        try:
-            p = m.get("path")
-            if not p:
-                continue
-            fpath = Path(p)
-            db.add(
-                UploadFileItem(
-                    upload_id=up.id,
-                    filename=fpath.name,
-                    ext=fpath.suffix.lstrip("."),
-                    bytes=fpath.stat().st_size if fpath.exists() else 0,
-                    pages=None,
-                    text_chars=int(m.get("chars") or 0),
-                )
+        db.add(
+            UploadFileItem(
+                upload_id=up.id,
+                filename=Path(m["member"]).name,
+                ext=m["ext"].lstrip("."),
+                bytes=int(m.get("bytes") or 0),
+                pages=m.get("pages"),
+                text_chars=int(m.get("chars") or 0),
             )
-        except Exception:
-            pass
+        )
 
     db.add(
         UploadText(
@@ -320,18 +282,10 @@ def handle_weekly_zip_upload(
         )
     )
 
-    # ---------- completeness run (history) ----------
+    # ---------- completeness run (history; one row, committed with the upload) ----------
     try:
-        from services.completeness_service import run_completeness
-        comp = run_completeness(db=db, course_id=real_course_id, upload_id=up.id, week_no=week_no)
-        db.add(
-            CompletenessRun(
-                course_id=real_course_id,
-                upload_id=up.id,
-                week_no=week_no,
-                result_json=comp,
-            )
-        )
+        from services.completeness_service import record_completeness
+        comp = record_completeness(db, real_course_id, up.id, week_no, commit=False)
     except Exception:
         comp = None
 
@@ -351,8 +305,8 @@ def handle_weekly_zip_upload(
     ex.coverage_percent = coverage_percent
     ex.coverage_status = coverage_status
     ex.delivered_topics = delivered_text
-    ex.missing_topics = clean_text("\n".join(missing_terms))[:20000]
-    ex.matched_topics = clean_text("\n".join(matched_terms))[:20000]
+    ex.missing_topics = sanitize_text("\n".join(missing_terms), max_chars=20000)
+    ex.matched_topics = sanitize_text("\n".join(matched_terms), max_chars=20000)
     ex.last_updated_at = now
 
     if hasattr(ex, "audit_json"):
@@ -408,7 +362,7 @@ def handle_weekly_zip_upload(
         "clo_alignment": clo_alignment_result if clo_alignment_result else None,
         "completeness": comp,
         "upload_id": str(up.id),
-        "files_seen": len(files),
+        "files_seen": ingested["seen"],
         "files_used": len([m for m in manifest if m["ext"] in ALLOWED_EXTS]),
         "plan_source": plan_source,
         "plan_text_len": len(plan_text),
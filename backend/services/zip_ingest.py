@@ -0,0 +1,189 @@
+"""
+Shared ZIP ingestion for weekly folders, submissions, course folders and CLO
+material bundles.
+
+Members are read one at a time straight out of the archive (nothing is
+extracted to disk) and parsed from bytes through `parallel_parse.parse_many`.
+OS junk (`__MACOSX/`, `._*`, `.DS_Store`, `Thumbs.db`) is skipped everywhere,
+and the archive is rejected/trimmed against:
+
+  ZIP_MAX_FILES      members considered (after junk/dirs are dropped)
+  ZIP_MAX_MEMBER_MB  uncompressed size of a single member
+  ZIP_MAX_TOTAL_MB   uncompressed size of everything read
+  ZIP_MAX_RATIO      uncompressed/compressed ratio of a single member (>= 1 MB)
+
+Sizes are checked against the headers first and then against the bytes
+actually inflated, so a lying header cannot get past the limits.
+"""
+from __future__ import annotations
+
+import io
+import os
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Union
+
+from services.parallel_parse import parse_many
+from services.upload_parser import PARSEABLE_EXTS
+
+
+ZIP_MAX_FILES = int(os.getenv("ZIP_MAX_FILES", "200"))
+ZIP_MAX_MEMBER_MB = float(os.getenv("ZIP_MAX_MEMBER_MB", "200"))
+ZIP_MAX_TOTAL_MB = float(os.getenv("ZIP_MAX_TOTAL_MB", "1024"))
+ZIP_MAX_RATIO = float(os.getenv("ZIP_MAX_RATIO", "200"))
+
+JUNK_NAMES = {".ds_store", "thumbs.db", "desktop.ini"}
+
+ZipSource = Union[bytes, str, Path]
+ProgressFn = Callable[[int, Optional[int], Optional[str]], None]
+
+
+class ZipIngestError(ValueError):
+    """Archive is unreadable or exceeds the ingestion limits."""
+
+
+def is_junk(name: str) -> bool:
+    p = PurePosixPath(name.replace("\\", "/"))
+    if p.parts and p.parts[0] == "__MACOSX":
+        return True
+    base = p.name
+    return base.startswith("._") or base.lower() in JUNK_NAMES
+
+
+def _open(source: ZipSource) -> zipfile.ZipFile:
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            return zipfile.ZipFile(io.BytesIO(source), "r")
+        return zipfile.ZipFile(str(source), "r")
+    except zipfile.BadZipFile as e:
+        raise ZipIngestError(f"Invalid ZIP file: {e}") from e
+
+
+def _read_capped(zf: zipfile.ZipFile, info: zipfile.ZipInfo, cap: int) -> bytes:
+    buf = bytearray()
+    with zf.open(info) as src:
+        while True:
+            block = src.read(1 << 20)
+            if not block:
+                break
+            buf += block
+            if len(buf) > cap:
+                raise ZipIngestError(f"{info.filename}: inflates past its declared size limit")
+    return bytes(buf)
+
+
+def iter_members(
+    source: ZipSource,
+    exts: Optional[Set[str]] = None,
+    max_files: Optional[int] = ZIP_MAX_FILES,
+    report: Optional[Dict[str, Any]] = None,
+    read_exts: Optional[Set[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield {"name", "filename", "ext", "bytes", "data"} per usable member, in
+    archive order. `exts` filters by extension (lower-case, with dot).
+    Members whose extension is not in `read_exts` (default: `exts`, or all
+    when `exts` is None) are yielded with data=b"" and never inflated.
+    Skipped members are appended to report["skipped"] with a reason.
+    """
+    report = report if report is not None else {}
+    skipped = report.setdefault("skipped", [])
+    report.setdefault("seen", 0)
+    member_cap = int(ZIP_MAX_MEMBER_MB * 1024 * 1024)
+    total_cap = int(ZIP_MAX_TOTAL_MB * 1024 * 1024)
+    total = 0
+    count = 0
+    read_exts = read_exts if read_exts is not None else exts
+
+    with _open(source) as zf:
+        for info in zf.infolist():
+            name = info.filename
+            if info.is_dir() or is_junk(name):
+                continue
+            if max_files and count >= max_files:
+                skipped.append({"name": name, "reason": "max_files"})
+                continue
+            count += 1
+            report["seen"] = count
+
+            ext = PurePosixPath(name).suffix.lower()
+            if exts is not None and ext not in exts:
+                skipped.append({"name": name, "reason": "unsupported_ext"})
+                continue
+
+            if info.file_size > member_cap:
+                skipped.append({"name": name, "reason": "too_large", "bytes": info.file_size})
+                continue
+            # small members legitimately compress very well (blank text, XML)
+            if info.file_size >= (1 << 20) and info.file_size / max(1, info.compress_size) > ZIP_MAX_RATIO:
+                skipped.append({"name": name, "reason": "compression_ratio"})
+                continue
+
+            data = b""
+            if read_exts is None or ext in read_exts:
+                if total + info.file_size > total_cap:
+                    raise ZipIngestError(f"ZIP expands past {ZIP_MAX_TOTAL_MB:g} MB")
+                data = _read_capped(zf, info, min(member_cap, info.file_size))
+                total += len(data)
+
+            yield {
+                "name": name,
+                "filename": PurePosixPath(name).name,
+                "ext": ext,
+                "bytes": info.file_size,
+                "data": data,
+            }
+
+
+def ingest_zip(
+    source: ZipSource,
+    exts: Optional[Set[str]] = None,
+    max_files: Optional[int] = ZIP_MAX_FILES,
+    progress: Optional[ProgressFn] = None,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    sample: Optional[str] = None,
+    keep_data: bool = False,
+) -> Dict[str, Any]:
+    """
+    Parse every usable member of a ZIP. Returns
+      {"files": [{"name", "filename", "ext", "bytes", "parsed"}, ...],  # archive order
+       "skipped": [{"name", "reason"}, ...],
+       "seen": <members considered>}
+    max_chars/max_pages/sample are the PDF budget (see upload_parser).
+    keep_data=True also keeps each member's bytes as "data" (e.g. to store it).
+    """
+    report: Dict[str, Any] = {"skipped": [], "seen": 0}
+    metas: List[Dict[str, Any]] = []
+
+    def _items():
+        read_exts = (exts if exts is not None else PARSEABLE_EXTS) & PARSEABLE_EXTS
+        for m in iter_members(source, exts, max_files, report, read_exts=read_exts):
+            data = m["data"] if keep_data else m.pop("data")
+            metas.append(m)
+            yield m["name"], data
+
+    try:
+        parsed = parse_many(
+            _items(),
+            progress=progress,
+            max_chars=max_chars,
+            max_pages=max_pages,
+            sample=sample,
+        )
+    except zipfile.BadZipFile as e:
+        raise ZipIngestError(f"Invalid ZIP file: {e}") from e
+
+    for m, p in zip(metas, parsed):
+        m["parsed"] = p or {}
+    return {"files": metas, "skipped": report["skipped"], "seen": report["seen"]}
+
+
+def read_member(source: ZipSource, name: str) -> bytes:
+    """Bytes of one member (used to serve files out of a stored ZIP)."""
+    with _open(source) as zf:
+        try:
+            info = zf.getinfo(name)
+        except KeyError:
+            raise FileNotFoundError(name)
+        return _read_capped(zf, info, int(ZIP_MAX_MEMBER_MB * 1024 * 1024))
@@ -0,0 +1,22 @@
+-- =========================
+-- Content-addressed storage (services/storage.py)
+-- =========================
+CREATE TABLE IF NOT EXISTS storage_blobs (
+  sha256 varchar(64) PRIMARY KEY,
+  size bigint NOT NULL DEFAULT 0,
+  ref_count integer NOT NULL DEFAULT 0,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  last_ref_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_storage_blobs_last_ref_at ON storage_blobs (last_ref_at);
+
+-- Rows that point at a blob
+ALTER TABLE uploads ADD COLUMN IF NOT EXISTS blob_sha256 varchar(64);
+CREATE INDEX IF NOT EXISTS ix_uploads_blob_sha256 ON uploads (blob_sha256);
+
+ALTER TABLE file_uploads ADD COLUMN IF NOT EXISTS storage_key text;
+ALTER TABLE file_uploads ADD COLUMN IF NOT EXISTS blob_sha256 varchar(64);
+CREATE INDEX IF NOT EXISTS ix_file_uploads_blob_sha256 ON file_uploads (blob_sha256);
+
+ALTER TABLE course_clos ADD COLUMN IF NOT EXISTS blob_sha256 varchar(64);
+CREATE INDEX IF NOT EXISTS ix_course_clos_blob_sha256 ON course_clos (blob_sha256);
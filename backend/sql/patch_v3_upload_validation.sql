@@ -0,0 +1,6 @@
+-- =========================
+-- Upload validation stored at upload time (routers/uploads.py)
+-- Rows left NULL are scored once by GET /upload/{course_id}/list.
+-- =========================
+ALTER TABLE uploads ADD COLUMN IF NOT EXISTS validation_status varchar(16);
+ALTER TABLE uploads ADD COLUMN IF NOT EXISTS validation_details jsonb;
@@ -0,0 +1,15 @@
+-- =========================
+-- Feedback summary rollup (services/feedback_summary.py, FEEDBACK_ROLLUP=1)
+-- Fill once afterwards: python tools/rebuild_feedback_rollup.py
+-- =========================
+CREATE TABLE IF NOT EXISTS student_feedback_rollup (
+  id serial PRIMARY KEY,
+  batch integer,
+  department varchar(20),
+  course_name text,
+  instructor_name text,
+  sentiment varchar(20),
+  n integer NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_student_feedback_rollup_group
+  ON student_feedback_rollup (batch, department, course_name, instructor_name, sentiment);
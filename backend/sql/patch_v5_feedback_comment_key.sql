@@ -0,0 +1,6 @@
+-- =========================
+-- Feedback comment embeddings (services/feedback_embeddings.py)
+-- Existing rows get their key from: python tools/backfill_feedback_embeddings.py
+-- =========================
+ALTER TABLE student_feedback ADD COLUMN IF NOT EXISTS comment_key varchar(64);
+CREATE INDEX IF NOT EXISTS ix_student_feedback_comment_key ON student_feedback (comment_key);
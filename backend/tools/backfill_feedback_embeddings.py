@@ -0,0 +1,58 @@
+"""
+Give feedback rows stored before sql/patch_v5_feedback_comment_key.sql their
+comment_key, and make sure every comment has a stored embedding
+(services/feedback_embeddings.py) for similarity search and topics.
+
+    python tools/backfill_feedback_embeddings.py [--batch 5000]
+
+Safe to re-run; comments already in the store are not re-encoded.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import bindparam, update
+
+from core.db import SessionLocal
+from models.student_feedback import StudentFeedback
+from services.feedback_embeddings import comment_key, get_store, normalize_comment
+from services.feedback_ingest import embed_comments
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch", type=int, default=5000)
+    args = ap.parse_args()
+
+    table = StudentFeedback.__table__
+    stmt = update(table).where(table.c.id == bindparam("_id")).values(comment_key=bindparam("_key"))
+
+    db = SessionLocal()
+    updated, last = 0, 0
+    try:
+        while True:
+            rows = (
+                db.query(StudentFeedback.id, StudentFeedback.comments)
+                .filter(StudentFeedback.comment_key.is_(None), StudentFeedback.id > last)
+                .order_by(StudentFeedback.id)
+                .limit(args.batch)
+                .all()
+            )
+            if not rows:
+                break
+            last = rows[-1][0]
+            texts = [normalize_comment(c or "") for _, c in rows]
+            embed_comments(list(dict.fromkeys(t for t in texts if t)))
+            db.connection().execute(stmt, [{"_id": i, "_key": comment_key(t)} for (i, _), t in zip(rows, texts)])
+            db.commit()
+            updated += len(rows)
+            print(f"  {updated} rows keyed")
+    finally:
+        db.close()
+    print(f"done: {updated} rows keyed, {len(get_store())} vectors stored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Score uploads stored before sql/patch_v3_upload_validation.sql: fill
+uploads.validation_status / validation_details from the stored text, the
+same check services/upload_service.set_validation runs when an Upload row is
+created. GET /upload/{id}/list scores rows this has not reached yet on every
+request (without storing the result).
+
+    python tools/backfill_upload_validation.py [--batch 200] [--dry-run]
+
+Texts are read one batch at a time; safe to re-run (only null rows are
+touched).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.db import SessionLocal
+from models.uploads import Upload, UploadText
+from services.upload_service import compute_validation
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch", type=int, default=200)
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    scored, last = 0, None
+    counts = {}
+    try:
+        while True:
+            q = db.query(Upload).filter(Upload.validation_status.is_(None))
+            if last is not None:
+                q = q.filter(Upload.id > last)
+            rows = q.order_by(Upload.id).limit(args.batch).all()
+            if not rows:
+                break
+            last = rows[-1].id
+
+            text_map = dict(
+                db.query(UploadText.upload_id, UploadText.text)
+                .filter(UploadText.upload_id.in_([r.id for r in rows]))
+                .all()
+            )
+            for r in rows:
+                txt = text_map.get(r.id)
+                r.validation_status, r.validation_details = compute_validation([txt] if txt else [])
+                counts[r.validation_status] = counts.get(r.validation_status, 0) + 1
+
+            if args.dry_run:
+                db.rollback()
+            else:
+                db.commit()
+            db.expunge_all()
+            scored += len(rows)
+            print(f"  {scored} uploads scored")
+    finally:
+        db.close()
+
+    verb = "would score" if args.dry_run else "scored"
+    print(f"done: {verb} {scored} uploads {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark + equivalence check for services.text_sanitize.clean_text against
+the per-character loop it replaced (grading_service, assessment_service,
+weekly_zip_upload_service, routers/execution_zip).
+
+    python tools/bench_clean_text.py [--chars 120000] [--repeat 20] [--trials 3000]
+
+Also times the other single-pass candidates (a compiled regex, str.translate).
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.text_sanitize import clean_text, sanitize_text
+
+_TRANSLATE = dict.fromkeys(c for c in range(32) if c not in (9, 10, 13))
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]+")
+
+
+def _legacy(val):
+    if val is None:
+        return ""
+    if not isinstance(val, str):
+        val = str(val)
+    val = val.replace("\x00", "")
+    out = []
+    for ch in val:
+        o = ord(ch)
+        if ch in ("\n", "\r", "\t"):
+            out.append(ch)
+        elif o >= 32:
+            out.append(ch)
+    return "".join(out).strip()
+
+
+def _translate(val):
+    return val.translate(_TRANSLATE).strip()
+
+
+def _regex(val):
+    return _CONTROL_RE.sub("", val).strip()
+
+
+ALPHABET = (
+    [chr(c) for c in range(0, 40)]  # every C0 control, space and some punctuation
+    + list("abcdefghij KLMNOP \n\n\t")
+    + ["\x7f", "\x85", "\xa0", " ", "　", "é", "ß", "字", "\U0001f642", "﻿", "\ud800", "\udfff"]
+)
+
+
+def _random_text(rng, n, control_rate):
+    plain = "lorem ipsum dolor sit amet, consectetur adipiscing elit.\n"
+    out = []
+    while len(out) < n:
+        if rng.random() < control_rate:
+            out.append(rng.choice(ALPHABET))
+        else:
+            out.append(plain[len(out) % len(plain)])
+    return "".join(out)
+
+
+def _ms(fn, repeat):
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t) / repeat * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chars", type=int, default=120_000)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--trials", type=int, default=3000)
+    args = ap.parse_args()
+    rng = random.Random(0)
+
+    # ---- equivalence ----
+    cases = [None, "", "   ", "\x00", "\x00\x00 a \x00", "\t\n\r", "a\x0bb\x0cc", "\x1f\x7f\x80", 0, 12.5, "x" * 10]
+    cases += ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 200))) for _ in range(args.trials)]
+    cases += [_random_text(rng, rng.randint(0, 5000), rng.choice([0.0, 0.01, 0.3])) for _ in range(200)]
+    for c in cases:
+        assert clean_text(c) == _legacy(c), repr(c)[:200]
+        if isinstance(c, str):
+            assert _translate(c) == _legacy(c) == _regex(c), repr(c)[:200]
+            assert sanitize_text(c, max_chars=50) == _legacy(c)[:50], repr(c)[:200]
+    print(f"equivalence: {len(cases)} inputs identical to the legacy loop")
+
+    # ---- speed ----
+    print(f"{'':<20} {'legacy':>9} {'clean_text':>17} {'regex':>17} {'str.translate':>17}  (ms, {args.chars:,} chars)")
+    for label, rate in (("no control chars", 0.0), ("0.1% control/unicode", 0.001), ("5% control/unicode", 0.05)):
+        doc = _random_text(rng, args.chars, rate)
+        legacy = _ms(lambda: _legacy(doc), max(1, args.repeat // 4))
+        cols = [_ms(lambda: fn(doc), args.repeat) for fn in (clean_text, _regex, _translate)]
+        print(f"{label:<20} {legacy:9.2f}" + "".join(f" {t:8.3f} ({legacy / t:4.0f}x)" for t in cols))
+
+
+if __name__ == "__main__":
+    main()
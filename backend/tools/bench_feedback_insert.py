@@ -0,0 +1,123 @@
+"""
+Insert benchmark for analyzed feedback rows: the old iterrows + db.add
+loop with one commit vs services.feedback_ingest.insert_feedback_records
+(executemany INSERT per chunk, commit per chunk).
+
+    python tools/bench_feedback_insert.py [--rows 10000 100000] [--chunk 1000 5000]
+                                          [--url postgresql://...]
+
+Defaults to a throwaway SQLite file; pass --url to measure against a real
+Postgres (the student_feedback table there is truncated per run). Also
+checks that both paths store identical rows.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.base import Base
+from models.student_feedback import StudentFeedback
+from services.feedback_ingest import feedback_records, insert_feedback_records, prepare_frame
+
+COLS = [c.name for c in StudentFeedback.__table__.columns if c.name != "id"]
+
+
+def _frame(rows, rng):
+    comments = ["good teacher", "assignments were too long", "n/a", "lectures were clear and well paced " * 3]
+    df = pd.DataFrame({
+        "StudentID": [rng.choice([f"S{i}", None]) for i in range(rows)],
+        "Name": [rng.choice(["Ali", "Sara", None]) for _ in range(rows)],
+        "Comments": [rng.choice(comments) for _ in range(rows)],
+        "CourseName": [f"Course {rng.randint(1, 40)}" for _ in range(rows)],
+        "InstructorName": [f"Instructor {rng.randint(1, 25)}" for _ in range(rows)],
+        "Batch": [rng.choice([2022, 2023, "x"]) for _ in range(rows)],
+        "Department": [rng.choice(["CS", "SE", None]) for _ in range(rows)],
+        "MCQ_Number": [rng.choice([1, 2, None]) for _ in range(rows)],
+    })
+    df = prepare_frame(df)
+    df["sentiment"] = [rng.choice(["positive", "neutral", "negative"]) for _ in range(len(df))]
+    df["emotion"] = [rng.choice(["joy", "anger", "neutral"]) for _ in range(len(df))]
+    df["topic"] = [rng.randint(0, 7) for _ in range(len(df))]
+    return df
+
+
+def _legacy(db, df):
+    for _, row in df.iterrows():
+        db.add(StudentFeedback(
+            student_id=str(row.get("student_id")) if pd.notna(row.get("student_id")) else None,
+            name=str(row.get("name")) if pd.notna(row.get("name")) else None,
+            form_type=str(row.get("form_type")) if pd.notna(row.get("form_type")) else "Course Evaluation",
+            mcq_number=int(row.get("mcq_number", 0)) if pd.notna(row.get("mcq_number")) else 0,
+            answer=str(row.get("answer")) if pd.notna(row.get("answer")) else None,
+            instructor_name=str(row.get("instructor_name")),
+            course_name=str(row.get("course_name")),
+            comments=str(row.get("comments")),
+            sentiment=str(row.get("sentiment")),
+            emotion=str(row.get("emotion")),
+            topic=int(row.get("topic", 0)) if pd.notna(row.get("topic")) else 0,
+            batch=int(row.get("batch", 0)) if pd.notna(row.get("batch")) else 0,
+            department=str(row.get("department")) if pd.notna(row.get("department")) else None,
+        ))
+    db.commit()
+
+
+def _stored(db):
+    cols = [getattr(StudentFeedback, c) for c in COLS]
+    return [tuple(r) for r in db.query(*cols).order_by(StudentFeedback.id).all()]
+
+
+def _reset(db):
+    db.query(StudentFeedback).delete()
+    db.commit()
+    db.expunge_all()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--chunk", type=int, nargs="+", default=[1000, 5000])
+    ap.add_argument("--url", default=None)
+    args = ap.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[StudentFeedback.__table__])
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(0)
+
+    sample = _frame(500, rng)
+    _reset(db)
+    _legacy(db, sample)
+    ref = _stored(db)
+    _reset(db)
+    insert_feedback_records(db, feedback_records(sample), chunk_size=64)
+    assert _stored(db) == ref, "bulk insert stored different rows"
+    print(f"equivalence: {len(ref)} rows identical ({engine.dialect.name})")
+
+    for n in args.rows:
+        df = _frame(n, rng)
+        _reset(db)
+        t = time.perf_counter()
+        _legacy(db, df)
+        legacy = time.perf_counter() - t
+        print(f"\n{len(df)} rows   legacy iterrows + db.add      {legacy:7.2f} s  {len(df) / legacy:9.0f} rows/s")
+        for c in args.chunk:
+            _reset(db)
+            t = time.perf_counter()
+            insert_feedback_records(db, feedback_records(df), chunk_size=c)
+            dt = time.perf_counter() - t
+            print(f"{len(df)} rows   bulk insert (chunk={c:<6})     {dt:7.2f} s  {len(df) / dt:9.0f} rows/s  {legacy / dt:5.1f}x")
+    _reset(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Throughput benchmark: per-comment pipeline calls vs batched inference
+(services.feedback_ingest._classify_batched) over the QEC sample survey.
+
+    python tools/bench_feedback_nlp.py [--csv ../public/feedback/student-qec-reviews.csv]
+                                       [--rows 2000] [--batch 16 64 128]
+
+Reports comments/s for sentiment + emotion and how often the batched labels
+agree with the legacy `pipe(c[:512])` path (differences come only from
+token- vs character-level truncation of very long comments).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from services.feedback_ingest import _classify_batched, _normalize_sentiment, prepare_frame
+from services.model_registry import get_model
+
+DEFAULT_CSV = os.path.join(os.path.dirname(__file__), "..", "..", "public", "feedback", "student-qec-reviews.csv")
+
+
+def _legacy(comments):
+    sentiment_pipe, emotion_pipe = get_model("sentiment"), get_model("emotion")
+    sent, emo = [], []
+    for c in comments:
+        s = sentiment_pipe(c[:512])[0]
+        sent.append(_normalize_sentiment(str(s["label"]), float(s["score"])))
+        res = emotion_pipe(c[:512])
+        item = res[0][0] if isinstance(res[0], list) else res[0]
+        emo.append(item.get("label", "unknown"))
+    return sent, emo
+
+
+def _batched(comments, batch):
+    sent = [_normalize_sentiment(l, s) for l, s in _classify_batched(get_model("sentiment"), comments, batch)]
+    emo = [l for l, _ in _classify_batched(get_model("emotion"), comments, batch)]
+    return sent, emo
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", default=DEFAULT_CSV)
+    ap.add_argument("--rows", type=int, default=2000, help="0 = all rows")
+    ap.add_argument("--batch", type=int, nargs="+", default=[16, 64, 128])
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args()
+
+    df = pd.read_csv(args.csv)
+    # the sample survey leaves course/instructor/batch blank; fill so prepare_frame accepts it
+    for col, val in (("CourseName", "n/a"), ("InstructorName", "n/a"), ("Batch", 0)):
+        if col not in df.columns:
+            df[col] = val
+        df[col] = df[col].fillna(val)
+    comments = prepare_frame(df)["comments"].tolist()
+    if args.rows:
+        comments = (comments * (args.rows // max(1, len(comments)) + 1))[:args.rows]
+    print(f"{len(comments)} comments from {os.path.basename(args.csv)}")
+
+    # warm-up (weights to device, kernels)
+    _batched(comments[:32], 32)
+
+    ref = None
+    if not args.skip_legacy:
+        t = time.perf_counter()
+        ref = _legacy(comments)
+        dt = time.perf_counter() - t
+        print(f"legacy per-comment      {dt:8.2f} s   {len(comments) / dt:8.1f} comments/s")
+
+    for b in args.batch:
+        t = time.perf_counter()
+        got = _batched(comments, b)
+        dt = time.perf_counter() - t
+        line = f"batched (batch={b:<4})     {dt:8.2f} s   {len(comments) / dt:8.1f} comments/s"
+        if ref is not None:
+            agree_s = sum(a == b_ for a, b_ in zip(ref[0], got[0])) / len(comments)
+            agree_e = sum(a == b_ for a, b_ in zip(ref[1], got[1])) / len(comments)
+            line += f"   agreement sentiment {agree_s:.2%} emotion {agree_e:.2%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
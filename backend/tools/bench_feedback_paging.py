@@ -0,0 +1,105 @@
+"""
+Deep-paging benchmark for GET /feedback/details-v2: OFFSET/LIMIT + COUNT(*)
+per page vs keyset (cursor) pages with count=estimate.
+
+    python tools/bench_feedback_paging.py [--rows 300000] [--pages 0 100 1000 5000]
+                                          [--url postgresql://...]
+
+Defaults to a throwaway SQLite file. Also checks that walking every page by
+cursor returns exactly the rows OFFSET paging does.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from core.base import Base
+from models.student_feedback import StudentFeedback
+from services.feedback_query import count_feedback, feedback_page, filter_feedback
+
+PAGE = 50
+
+
+def _seed(db, rows, rng):
+    table = StudentFeedback.__table__
+    for start in range(0, rows, 10000):
+        db.connection().execute(insert(table), [
+            {
+                "course_name": f"Course {rng.randint(1, 40)}", "instructor_name": f"Instructor {rng.randint(1, 25)}",
+                "comments": "lectures were clear and well paced", "sentiment": rng.choice(["positive", "neutral", "negative"]),
+                "batch": rng.choice([2022, 2023, 2024]), "department": rng.choice(["CS", "SE", "AI"]), "topic": 0,
+            }
+            for _ in range(min(10000, rows - start))
+        ])
+        db.commit()
+
+
+def _legacy_page(db, filters, offset):
+    q = filter_feedback(db.query(StudentFeedback), filters)
+    total = q.count()
+    return total, q.order_by(StudentFeedback.id.desc()).offset(offset).limit(PAGE).all()
+
+
+def _ms(fn, repeat=5):
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t) / repeat * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=300_000)
+    ap.add_argument("--pages", type=int, nargs="+", default=[0, 100, 1000, 5000])
+    ap.add_argument("--url", default=None)
+    args = ap.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[StudentFeedback.__table__])
+    db = sessionmaker(bind=engine)()
+    db.query(StudentFeedback).delete()
+    db.commit()
+    _seed(db, args.rows, random.Random(0))
+
+    # equivalence on a filtered walk
+    filters = {"department": "CS", "sentiment": "negative"}
+    by_offset, offset = [], 0
+    while True:
+        _, rows = _legacy_page(db, filters, offset)
+        if not rows:
+            break
+        by_offset += [r.id for r in rows]
+        offset += PAGE
+    by_cursor, cursor = [], None
+    while True:
+        rows, cursor = feedback_page(db, filters, limit=PAGE, cursor=cursor)
+        by_cursor += [r.id for r in rows]
+        if cursor is None:
+            break
+    assert by_cursor == by_offset, "cursor walk differs from offset walk"
+    print(f"{args.rows} rows; equivalence: {len(by_cursor)} filtered rows, same order by cursor and offset")
+
+    for filters in ({}, {"department": "CS"}):
+        print(f"\nfilters={filters or 'none'}   (ms per page of {PAGE})")
+        for page in args.pages:
+            offset = page * PAGE
+            # cursor that lands on the same page
+            ids = [r.id for r in feedback_page(db, filters, limit=offset + 1)[0]] if offset else []
+            cursor = ids[offset - 1] if len(ids) >= offset and offset else None
+            legacy = _ms(lambda: _legacy_page(db, filters, offset))
+            keyset = _ms(lambda: (count_feedback(db, filters, "estimate"), feedback_page(db, filters, PAGE, cursor=cursor)))
+            print(f"  page {page:>6}   offset+count {legacy:9.2f}   cursor+estimate {keyset:9.2f}")
+            db.expunge_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: per-rule `any(needle in text)` loops vs services.text_matcher.
+
+    python tools/bench_rule_matcher.py [--chars 2000000] [--files 80] [--repeat 20]
+
+Covers both users of the matcher: completeness rules (file names + text)
+and upload validation (REQUIRED_SECTIONS over up to 2 MB). Also checks the
+two agree on random texts with and without the keywords present.
+"""
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.completeness_service import DEFAULT_RULES
+from services.text_matcher import KeywordMatcher
+
+REQUIRED_SECTIONS = [
+    "course objectives", "clo", "lecture", "quiz", "assignment",
+    "midterm", "final exam", "attendance", "grading",
+]
+
+
+def _legacy_rules(rules, filenames, big):
+    out = {}
+    for r in rules:
+        pats = [p.lower() for p in r["patterns"]]
+        keys = [k.lower() for k in r["keywords"]]
+        by_name = any(p in fn for fn in filenames for p in pats) if pats else False
+        by_text = any(k in big for k in keys) if keys else False
+        out[r["name"]] = (by_name, by_text)
+    return out
+
+
+def _matched_rules(rules, name_m, text_m, filenames, big):
+    names = name_m.found("\n".join(filenames))
+    text = text_m.found(big)
+    return {
+        r["name"]: (
+            any(p.lower() in names for p in r["patterns"]) if r["patterns"] else False,
+            any(k.lower() in text for k in r["keywords"]) if r["keywords"] else False,
+        )
+        for r in rules
+    }
+
+
+def _regex_sections(rx, big):
+    return {m.group(1) for m in rx.finditer(big)}
+
+
+def _text(rng, n, plant):
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(4000)]
+    parts, size = [], 0
+    while size < n:
+        w = rng.choice(words) if rng.random() > 0.0005 or not plant else rng.choice(plant)
+        parts.append(w)
+        size += len(w) + 1
+    return " ".join(parts)[:n]
+
+
+def _time(fn, repeat):
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t) / repeat * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chars", type=int, default=2_000_000)
+    ap.add_argument("--files", type=int, default=80)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+    rng = random.Random(0)
+
+    keywords = sorted({k for r in DEFAULT_RULES for k in r["keywords"]} | set(REQUIRED_SECTIONS))
+    sparse = _text(rng, args.chars, [])
+    dense = _text(rng, args.chars, keywords)
+    filenames = [f"{_text(rng, 12, [])}_{rng.choice(['week', 'notes', 'misc'])}.pdf" for _ in range(args.files)]
+
+    # ---- equivalence ----
+    name_m = KeywordMatcher(p for r in DEFAULT_RULES for p in r["patterns"])
+    text_m = KeywordMatcher(k for r in DEFAULT_RULES for k in r["keywords"])
+    sect_m = KeywordMatcher(REQUIRED_SECTIONS)
+    for trial in range(200):
+        n = rng.randint(0, 3000)
+        t = _text(rng, n, keywords if trial % 2 else [])
+        fns = [_text(rng, 10, ["quiz", "lab", "slides"] if trial % 3 else []) for _ in range(rng.randint(0, 5))]
+        assert _legacy_rules(DEFAULT_RULES, fns, t) == _matched_rules(DEFAULT_RULES, name_m, text_m, fns, t)
+        assert {s for s in REQUIRED_SECTIONS if s in t} == sect_m.found(t)
+    print("equivalence: 200 random texts OK")
+
+    # ---- speed ----
+    rx = re.compile("(?=(" + "|".join(map(re.escape, REQUIRED_SECTIONS)) + "))")
+    for label, big in (("no keywords", sparse), ("keywords present", dense)):
+        print(f"\n{label}, {len(big):,} chars")
+        legacy = _time(lambda: [s in big for s in REQUIRED_SECTIONS], args.repeat)
+        matcher = _time(lambda: sect_m.found(big), args.repeat)
+        regex = _time(lambda: _regex_sections(rx, big), max(1, args.repeat // 5))
+        print(f"  validation   legacy loop {legacy:8.2f} ms   matcher {matcher:8.2f} ms   combined regex {regex:8.2f} ms")
+
+        raw = big.upper()
+        per_row = _time(lambda: sect_m.found(raw[:args.chars].lower()), args.repeat)
+        print(f"  /list before: {per_row:8.2f} ms per row (slice + lower + scan); now reads stored columns")
+
+        head = big[:80_000]
+        legacy = _time(lambda: _legacy_rules(DEFAULT_RULES, filenames, head), args.repeat)
+        matcher = _time(lambda: _matched_rules(DEFAULT_RULES, name_m, text_m, filenames, head), args.repeat)
+        print(f"  completeness legacy loop {legacy:8.2f} ms   matcher {matcher:8.2f} ms   (80k chars, {len(filenames)} files)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: legacy pure-Python cosine loop vs services/similarity.best_match.
+
+    python tools/bench_similarity.py [--phrases 30] [--chunks 60] [--dim 4096] [--repeat 3]
+
+Also checks that both pick the same best index and agree on the score.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from services.similarity import best_match
+
+
+def _legacy_cos(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    na = sum(x * x for x in a)
+    nb = sum(y * y for y in b)
+    if na <= 0 or nb <= 0:
+        return 0.0
+    return dot / (math.sqrt(na) * math.sqrt(nb))
+
+
+def _legacy_best(pv, cv):
+    out = []
+    for i in range(len(pv)):
+        best, best_j = -1.0, -1
+        for j in range(len(cv)):
+            s = _legacy_cos(pv[i], cv[j])
+            if s > best:
+                best, best_j = s, j
+        out.append((best_j, best))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--phrases", type=int, default=30)
+    ap.add_argument("--chunks", type=int, default=60)
+    ap.add_argument("--dim", type=int, default=4096)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    pv = rng.standard_normal((args.phrases, args.dim)).astype(np.float32).tolist()
+    cv = rng.standard_normal((args.chunks, args.dim)).astype(np.float32).tolist()
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        legacy = _legacy_best(pv, cv)
+    t_legacy = (time.perf_counter() - t0) / args.repeat
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        idx, scores = best_match(pv, cv)
+    t_numpy = (time.perf_counter() - t0) / args.repeat
+
+    same_idx = all(int(idx[i]) == legacy[i][0] for i in range(len(legacy)))
+    max_err = max(abs(float(scores[i]) - legacy[i][1]) for i in range(len(legacy))) if legacy else 0.0
+
+    print(f"shape: {args.phrases} x {args.chunks} x {args.dim}")
+    print(f"legacy loop : {t_legacy * 1000:9.2f} ms")
+    print(f"numpy kernel: {t_numpy * 1000:9.2f} ms  ({t_legacy / max(t_numpy, 1e-9):.0f}x)")
+    print(f"same argmax : {same_idx}   max |score diff|: {max_err:.2e}")
+
+
+if __name__ == "__main__":
+    main()
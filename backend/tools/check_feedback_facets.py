@@ -0,0 +1,109 @@
+"""
+Equivalence + cost check for GET /feedback/facets.
+
+    python tools/check_feedback_facets.py [--rows 200000]
+
+Seeds a throwaway SQLite database and compares the facets (values and
+counts) with the five old SELECT DISTINCT endpoints, checks that an ingest
+commit (insert_feedback_records) invalidates the cache, and times a page
+load both ways.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from core.base import Base
+from models.student_feedback import StudentFeedback
+from services.feedback_ingest import insert_feedback_records
+from services.feedback_query import feedback_facets, invalidate_feedback_caches
+
+SF = StudentFeedback
+
+
+def _distinct(db, col, keep, batch=None, department=None):
+    q = db.query(col).distinct()
+    if batch is not None:
+        q = q.filter(SF.batch == batch)
+    if department:
+        q = q.filter(SF.department == department)
+    return sorted(r[0] for r in q.all() if keep(r[0]))
+
+
+def _legacy(db, batch=None, department=None):
+    # /batches and /departments took no filters; with filters, facets narrow them like the rest
+    return {
+        "batches": _distinct(db, SF.batch, lambda v: v is not None, batch, department),
+        "departments": _distinct(db, SF.department, bool, batch, department),
+        "courses": _distinct(db, SF.course_name, bool, batch, department),
+        "instructors": _distinct(db, SF.instructor_name, bool, batch, department),
+        "topics": _distinct(db, SF.topic, lambda v: v is not None, batch, department),
+    }
+
+
+def _record(rng):
+    return {
+        "course_name": rng.choice([f"Course {rng.randint(1, 40)}", None, ""]),
+        "instructor_name": f"Instructor {rng.randint(1, 25)}", "comments": "ok",
+        "sentiment": "neutral", "batch": rng.choice([2022, 2023, 2024, None]),
+        "department": rng.choice(["CS", "SE", "AI", None]), "topic": rng.choice([0, 1, 2, 3, None]),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    args = ap.parse_args()
+    rng = random.Random(0)
+
+    engine = create_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "facets.sqlite3"))
+    Base.metadata.create_all(engine, tables=[SF.__table__])
+    db = sessionmaker(bind=engine)()
+    for start in range(0, args.rows, 10000):
+        db.connection().execute(insert(SF.__table__), [_record(rng) for _ in range(min(10000, args.rows - start))])
+        db.commit()
+
+    for f in ({}, {"batch": 2023}, {"department": "CS"}, {"batch": 2022, "department": "AI"}):
+        invalidate_feedback_caches()
+        facets = feedback_facets(db, **f)
+        got = {name: [x["value"] for x in facets[name]] for name in ("batches", "departments", "courses", "instructors", "topics")}
+        assert got == _legacy(db, **f), f"facet values differ for {f}"
+        for x in facets["courses"]:
+            q = db.query(SF).filter(SF.course_name == x["value"])
+            if "batch" in f:
+                q = q.filter(SF.batch == f["batch"])
+            if "department" in f:
+                q = q.filter(SF.department == f["department"])
+            assert q.count() == x["count"], f"count differs for {x}"
+    print(f"{args.rows} rows; facet values and counts match the DISTINCT endpoints")
+
+    before = feedback_facets(db)["total"]
+    insert_feedback_records(db, [dict(_record(rng), course_name="Brand New Course")])
+    after = feedback_facets(db)
+    assert after["total"] == before + 1 and any(x["value"] == "Brand New Course" for x in after["courses"])
+    print("ingest commit invalidates the cache")
+
+    t = time.perf_counter()
+    _legacy(db)
+    legacy = (time.perf_counter() - t) * 1000
+    invalidate_feedback_caches()
+    t = time.perf_counter()
+    feedback_facets(db)
+    cold = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    for _ in range(100):
+        feedback_facets(db)
+    warm = (time.perf_counter() - t) * 10
+    print(f"page load: 5 DISTINCT queries {legacy:8.1f} ms   facets cold {cold:8.1f} ms   facets cached {warm:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Equivalence + cost check for GET /feedback/summary.
+
+    python tools/check_feedback_summary.py [--rows 200000]
+
+Seeds an in-memory SQLite database and compares the old load-every-row
+summary with services.feedback_summary over student_feedback (GROUP BY)
+and over the rollup table, both maintained incrementally and rebuilt.
+Reports the time per call for each path.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.base import Base
+from models.feedback_rollup import FeedbackRollup
+from models.student_feedback import StudentFeedback
+from services import feedback_summary as fs
+
+
+def _legacy(db, batch=None, department=None):
+    q = db.query(StudentFeedback)
+    if batch is not None:
+        q = q.filter(StudentFeedback.batch == batch)
+    if department:
+        q = q.filter(StudentFeedback.department == department)
+    data = q.all()
+    summary = {"positive": 0, "neutral": 0, "negative": 0}
+    by_course, by_instructor = {}, {}
+    for f in data:
+        s = f.sentiment or "neutral"
+        summary[s] = summary.get(s, 0) + 1
+        by_course.setdefault(f.course_name, {"pos": 0, "neu": 0, "neg": 0})
+        by_course[f.course_name]["pos" if s == "positive" else "neu" if s == "neutral" else "neg"] += 1
+        by_instructor[f.instructor_name] = by_instructor.get(f.instructor_name, 0) + 1
+    return {"sentiment": summary, "courses": by_course, "instructors": by_instructor, "total": len(data)}
+
+
+def _seed(db, rows, rng):
+    # each course is taught by one of two instructors and belongs to one department
+    courses = [(f"Course {i}", [f"Instructor {i % 25}", f"Instructor {(i * 7) % 25}"], ["CS", "SE", "AI", None][i % 4])
+               for i in range(40)] + [(None, ["Instructor 0"], None)]
+    sentiments = ["positive", "neutral", "negative", None]
+    filler = "the lectures were clear but the assignments were long " * 4
+    chunk = []
+    for i in range(rows):
+        course, instructors, dept = rng.choice(courses)
+        e = StudentFeedback(
+            course_name=course, instructor_name=rng.choice(instructors),
+            sentiment=rng.choice(sentiments), batch=rng.choice([2021, 2022, 2023, 2024]),
+            department=dept, comments=filler, emotion="joy", topic=0,
+        )
+        chunk.append(e)
+        if len(chunk) == 5000 or i == rows - 1:
+            db.add_all(chunk)
+            fs.bump_rollup(db, Counter(fs.rollup_key(vars(x)) for x in chunk))
+            db.commit()
+            chunk = []
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    args = ap.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[StudentFeedback.__table__, FeedbackRollup.__table__])
+    db = sessionmaker(bind=engine)()
+    fs.FEEDBACK_ROLLUP = True
+    _seed(db, args.rows, random.Random(0))
+    print(f"{args.rows} feedback rows, {db.query(FeedbackRollup).count()} rollup groups")
+
+    filters = [dict(), dict(batch=2023), dict(department="CS"), dict(batch=2022, department="AI"), dict(batch=1999)]
+    for f in filters:
+        ref = _legacy(db, **f)
+        fs.FEEDBACK_ROLLUP = False
+        assert fs.feedback_summary(db, **f) == ref, f"GROUP BY mismatch for {f}"
+        fs.FEEDBACK_ROLLUP = True
+        assert fs.feedback_summary(db, **f) == ref, f"incremental rollup mismatch for {f}"
+    groups = fs.rebuild_rollup(db)
+    for f in filters:
+        assert fs.feedback_summary(db, **f) == _legacy(db, **f), f"rebuilt rollup mismatch for {f}"
+    print(f"equivalence OK for {len(filters)} filters (rebuilt rollup: {groups} groups)")
+
+    def _run(rollup):
+        fs.FEEDBACK_ROLLUP = rollup
+        return fs.feedback_summary(db)
+
+    for label, fn in (("legacy q.all()", lambda: _legacy(db)), ("GROUP BY", lambda: _run(False)), ("rollup table", lambda: _run(True))):
+        db.expunge_all()
+        t = time.perf_counter()
+        fn()
+        print(f"  {label:<16} {(time.perf_counter() - t) * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
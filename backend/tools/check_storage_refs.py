@@ -0,0 +1,106 @@
+"""
+Reference-counting check for the content-addressed blob store.
+
+    python tools/check_storage_refs.py
+
+On a throwaway storage root and in-memory SQLite database:
+  - two uploads of the same bytes share one blob (ref_count 2)
+  - deleting one upload (services/upload_service.delete_upload) keeps the
+    file through gc_blobs; deleting the other lets gc_blobs remove it
+  - re-pointing an owner (course guide path) releases the old blob
+"""
+import os
+import sys
+import tempfile
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ["LOCAL_STORAGE_ROOT"] = tempfile.mkdtemp()
+
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from core.base import Base
+from models.storage_blob import StorageBlob
+from models.uploads import Upload, UploadFileItem, UploadText
+from services.storage import BLOB_ROOT, blob_sha_of, gc_blobs, release_blob, save_blob
+from services.upload_service import delete_upload
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_sqlite(element, compiler, **kw):
+    return "JSON"
+
+
+def _upload(db, data: bytes) -> Upload:
+    saved = save_blob("notes.pdf", data, db=db)
+    up = Upload(
+        id=uuid.uuid4(), course_id="c1", filename_original="notes.pdf", filename_stored="notes.pdf",
+        ext="pdf", bytes=len(data), storage_key=saved["key"], blob_sha256=saved["sha256"],
+    )
+    db.add(up)
+    db.flush()
+    db.add(UploadFileItem(upload_id=up.id, filename="notes.pdf", ext="pdf", bytes=len(data)))
+    db.add(UploadText(upload_id=up.id, text="lecture notes"))
+    db.commit()
+    return up
+
+
+def _refs(db, sha: str):
+    db.expire_all()  # ref_count is updated in SQL
+    row = db.get(StorageBlob, sha)
+    return row.ref_count if row is not None else None
+
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        engine, tables=[StorageBlob.__table__, Upload.__table__, UploadFileItem.__table__, UploadText.__table__]
+    )
+    db = sessionmaker(bind=engine, autoflush=False)()
+    ok = True
+
+    def expect(label, cond):
+        nonlocal ok
+        print(f"{'ok  ' if cond else 'FAIL'} {label}")
+        ok = ok and cond
+
+    data = os.urandom(4096)
+    a, b = _upload(db, data), _upload(db, data)
+    sha = a.blob_sha256
+    path = BLOB_ROOT / sha[:2] / sha[2:4] / f"{sha}.pdf"
+    expect("same bytes share one blob", a.blob_sha256 == b.blob_sha256 and _refs(db, sha) == 2)
+
+    delete_upload(db, a)
+    gc_blobs(db, grace_s=0)
+    expect("one owner left: ref_count 1, file kept", _refs(db, sha) == 1 and path.exists())
+
+    delete_upload(db, b)
+    out = gc_blobs(db, grace_s=0)
+    expect("last owner deleted: gc removes blob row and file",
+           _refs(db, sha) is None and not path.exists() and out["released"] == 1)
+    expect("upload rows gone", db.query(Upload).count() == 0 and db.query(UploadFileItem).count() == 0
+           and db.query(UploadText).count() == 0)
+
+    # an owner that stores the path (course guide) and is re-pointed to a new file
+    old = save_blob("guide.pdf", b"old guide", db=db)
+    db.commit()
+    new = save_blob("guide.pdf", b"new guide", db=db)
+    release_blob(db, blob_sha_of(old["local_path"]))
+    db.commit()
+    out = gc_blobs(db, grace_s=0)
+    expect("replaced guide released and collected",
+           not Path(old["local_path"]).exists() and Path(new["local_path"]).exists() and out["released"] == 1)
+    expect("blob_sha_of ignores legacy paths", blob_sha_of("uploads/weekly/x.zip") is None)
+
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
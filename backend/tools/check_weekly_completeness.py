@@ -0,0 +1,107 @@
+"""
+Regression check: the completeness run recorded by a weekly ZIP upload sees
+the upload's own files and text.
+
+    python tools/check_weekly_completeness.py
+
+Seeds an in-memory SQLite database (rules already seeded, as in production),
+uploads a ZIP with slides / lab / quiz members through
+handle_weekly_zip_upload, and compares the stored CompletenessRun and the
+evaluate_completeness result with a fresh evaluation of the committed rows.
+Coverage uses the lexical comparison only so the check runs offline.
+"""
+import io
+import os
+import sys
+import tempfile
+import uuid
+import zipfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LOCAL_STORAGE_ROOT", tempfile.mkdtemp())
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from core.base import Base
+import models.material  # noqa: F401  (Course.materials relationship)
+from models import assessment, course_clo, student, student_submission  # noqa: F401  (GradingAudit relationships)
+from models.course import Course
+from models.course_execution import WeeklyPlan, WeeklyExecution, DeviationLog
+from models.completeness import RequiredArtifact, CompletenessRun
+from models.storage_blob import StorageBlob
+from models.uploads import Upload, UploadFileItem, UploadText
+from services import completeness_service, weekly_zip_upload_service
+from services.execution_compare import _lexical_compare
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_sqlite(element, compiler, **kw):
+    return "JSON"
+
+
+def _zip() -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("week3/Lecture3_slides.txt", "Sorting algorithms: merge sort and quicksort.")
+        z.writestr("week3/Lab3.txt", "Implement merge sort in Python.")
+        z.writestr("week3/Quiz3.txt", "Five questions on sorting.")
+    return buf.getvalue()
+
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[
+        Course.__table__, WeeklyPlan.__table__, WeeklyExecution.__table__, DeviationLog.__table__,
+        Upload.__table__, UploadFileItem.__table__, UploadText.__table__,
+        RequiredArtifact.__table__, CompletenessRun.__table__, StorageBlob.__table__,
+    ])
+    Session = sessionmaker(bind=engine, autoflush=False)  # as core.db.SessionLocal
+
+    db = Session()
+    course = Course(
+        course_code="CS201", course_name="Algorithms", semester="Fall", year="2026",
+        instructor="x", department="CS",
+    )
+    db.add(course)
+    db.flush()
+    db.add(WeeklyPlan(course_id=course.id, week_number=3, planned_topics="Sorting algorithms merge sort quicksort"))
+    completeness_service.ensure_default_rules(db)  # commits
+    course_id = course.id
+    db.close()
+
+    # keep the check offline: lexical coverage only (completeness is what is checked here)
+    weekly_zip_upload_service.compare_week = _lexical_compare
+
+    db = Session()
+    out = weekly_zip_upload_service.handle_weekly_zip_upload(
+        db, course_id, 3, "user-1", _zip(), "week3.zip"
+    )
+    db.close()
+
+    upload_id = uuid.UUID(out["upload_id"])
+    db = Session()
+    run = db.query(CompletenessRun).filter(CompletenessRun.upload_id == upload_id).one()
+    stored = run.result_json["score_percent"]
+    served = completeness_service.evaluate_completeness(db, upload_id, 3)["score_percent"]
+
+    scope = "weekly"
+    rules = completeness_service._load_rules(db, scope)
+    version = completeness_service.rules_version(scope, rules)
+    files = [f.lower() for (f,) in db.query(UploadFileItem.filename).filter(UploadFileItem.upload_id == upload_id)]
+    text = db.query(UploadText.text).filter(UploadText.upload_id == upload_id).scalar() or ""
+    fresh = completeness_service._score(scope, rules, files, text.lower(), version)["score_percent"]
+    db.close()
+
+    print(f"members: {files}")
+    print(f"returned {out['completeness']['score_percent']}  stored {stored}  served {served}  fresh {fresh}")
+    ok = out["completeness"]["score_percent"] == stored == served == fresh == 100.0
+    print("OK" if ok else "FAILED: completeness run did not see the upload's files/text")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Query-count regression check for GET /courses/{id}/weekly-progress.
+
+    python tools/check_weekly_progress_queries.py [--weeks-with-uploads 16] [--uploads-per-week 3]
+
+Seeds an in-memory SQLite database (JSONB rendered as JSON), runs
+services.course_execution.weekly_progress_summary and fails if it issues
+more than MAX_QUERIES statements, writes anything, or disagrees with a
+per-week reference implementation.
+"""
+import argparse
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from core.base import Base
+import models.material  # noqa: F401  (Course.materials relationship)
+from models.course import Course
+from models.course_execution import WeeklyExecution
+from models.completeness import CompletenessRun
+from models.uploads import Upload
+from services.course_execution import weekly_progress_summary
+
+MAX_QUERIES = 3
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_sqlite(element, compiler, **kw):
+    return "JSON"
+
+
+def _seed(db, weeks_with_uploads: int, uploads_per_week: int) -> str:
+    course = Course(
+        course_code="CS101", course_name="Intro", semester="Fall", year="2026",
+        instructor="x", department="CS",
+    )
+    db.add(course)
+    db.flush()
+    t0 = datetime(2026, 1, 1)
+    for w in range(1, weeks_with_uploads + 1):
+        for k in range(uploads_per_week):
+            up = Upload(
+                id=uuid.uuid4(), course_id=course.id, filename_original=f"w{w}_{k}.zip",
+                filename_stored=f"w{w}_{k}.zip", ext="zip", week_no=w, bytes=1,
+                created_at=t0 + timedelta(days=w, hours=k),
+            )
+            db.add(up)
+            for r in range(2):
+                db.add(CompletenessRun(
+                    course_id=course.id, upload_id=up.id, week_no=w,
+                    result_json={"score_percent": 10.0 * w + k + r / 10},
+                    created_at=datetime(2026, 2, 1, tzinfo=timezone.utc) + timedelta(minutes=10 * k + r),
+                ))
+        if w % 3:
+            db.add(WeeklyExecution(
+                course_id=course.id, week_number=w, coverage_percent=50.0 + w,
+                coverage_status="behind" if w % 2 else "on_track",
+                missing_topics="Recursion\nsorting\n" if w % 2 else None,
+            ))
+    db.commit()
+    return course.id
+
+
+def _reference(db, course_id: str, weeks: int = 16):
+    """The old per-week loop, reading the latest stored completeness run instead of re-running it."""
+    out = []
+    for w in range(1, weeks + 1):
+        up = (
+            db.query(Upload).filter(Upload.course_id == course_id, Upload.week_no == w)
+            .order_by(Upload.created_at.desc()).first()
+        )
+        exe = (
+            db.query(WeeklyExecution)
+            .filter(WeeklyExecution.course_id == course_id, WeeklyExecution.week_number == w).first()
+        )
+        run = (
+            db.query(CompletenessRun).filter(CompletenessRun.upload_id == up.id)
+            .order_by(CompletenessRun.created_at.desc()).first()
+        ) if up else None
+        score = run.result_json.get("score_percent") if run else None
+        out.append({
+            "week_no": w,
+            "has_upload": bool(up),
+            "upload_id": str(up.id) if up else None,
+            "coverage_percent": round(float(exe.coverage_percent or 0) if exe else 0.0, 2),
+            "coverage_status": exe.coverage_status if exe else ("skipped" if not up else "behind"),
+            "completeness_percent": round(float(score), 2) if score is not None else None,
+        })
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--weeks-with-uploads", type=int, default=16)
+    ap.add_argument("--uploads-per-week", type=int, default=3)
+    args = ap.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        engine,
+        tables=[Course.__table__, Upload.__table__, WeeklyExecution.__table__, CompletenessRun.__table__],
+    )
+    db = sessionmaker(bind=engine)()
+    course_id = _seed(db, args.weeks_with_uploads, args.uploads_per_week)
+    db.expire_all()
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    out = weekly_progress_summary(db, course_id)
+    event.remove(engine, "before_cursor_execute", _count)
+
+    writes = [s for s in statements if s.lstrip().split(None, 1)[0].upper() in ("INSERT", "UPDATE", "DELETE")]
+    expected = _reference(db, course_id)
+
+    print(f"queries: {len(statements)} (max {MAX_QUERIES})  writes: {len(writes)}")
+    print(f"weeks behind: {out['weeks_behind']}  top missing: {out['top_missing_topics'][:2]}")
+
+    ok = True
+    if len(statements) > MAX_QUERIES:
+        print("FAIL: too many queries")
+        ok = False
+    if writes:
+        print("FAIL: GET path wrote to the database")
+        ok = False
+    if out["weeks"] != expected:
+        print("FAIL: rows differ from the per-week reference")
+        ok = False
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Refit the persistent feedback topic model (services/topic_model.py) on the
+whole stored corpus, and optionally relabel stored rows with it.
+
+    python tools/fit_feedback_topics.py [--batch 5000] [--relabel]
+
+Embeddings come from the shared store (services/feedback_embeddings.py);
+only comments missing from it are encoded. Distinct comments are
+clustered, so repeated "good" rows don't pull a centroid towards them.
+--relabel then writes each row's nearest-centroid topic back to
+student_feedback, so topic ids agree across all uploads, old ones included.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from sqlalchemy import bindparam, update
+
+from core.db import SessionLocal
+from models.student_feedback import StudentFeedback
+from services.feedback_embeddings import normalize_comment
+from services.feedback_ingest import embed_comments
+from services.topic_model import assign_topics, fit_topics
+
+
+def _batches(db, size):
+    """(ids, normalized comments) per `size` stored rows, in id order."""
+    last = 0
+    while True:
+        rows = (
+            db.query(StudentFeedback.id, StudentFeedback.comments)
+            .filter(StudentFeedback.id > last)
+            .order_by(StudentFeedback.id)
+            .limit(size)
+            .all()
+        )
+        if not rows:
+            return
+        last = rows[-1][0]
+        yield [r[0] for r in rows], [normalize_comment(r[1] or "") for r in rows]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch", type=int, default=5000, help="rows per pass over student_feedback")
+    ap.add_argument("--relabel", action="store_true", help="write new topic ids to stored rows")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        seen = set()
+
+        def distinct_embeddings():
+            for _, texts in _batches(db, args.batch):
+                new = [t for t in dict.fromkeys(texts) if t and t not in seen]
+                seen.update(new)
+                if new:
+                    vecs = embed_comments(new)
+                    yield np.vstack([vecs[t] for t in new])
+
+        stats = fit_topics(distinct_embeddings())
+        print(f"fitted {stats['k']} topics on {stats['seen']} distinct comments (version {stats['version']})")
+
+        if args.relabel:
+            stmt = (
+                update(StudentFeedback.__table__)
+                .where(StudentFeedback.__table__.c.id == bindparam("_id"))
+                .values(topic=bindparam("_topic"))
+            )
+            relabeled = 0
+            for ids, texts in _batches(db, args.batch):
+                distinct = list(dict.fromkeys(texts))
+                vecs = embed_comments(distinct)
+                topic_of = dict(zip(distinct, assign_topics(np.vstack([vecs[t] for t in distinct]), update=False)))
+                db.connection().execute(stmt, [{"_id": i, "_topic": topic_of[t]} for i, t in zip(ids, texts)])
+                db.commit()
+                relabeled += len(ids)
+            print(f"relabeled {relabeled} rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
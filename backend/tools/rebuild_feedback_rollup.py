@@ -0,0 +1,31 @@
+"""
+Recompute student_feedback_rollup from student_feedback.
+
+    python tools/rebuild_feedback_rollup.py
+
+Run once after setting FEEDBACK_ROLLUP=1 on a database that already has
+feedback rows (ingest keeps it current from then on), or any time the
+table is suspected to have drifted.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.db import SessionLocal
+from core.schema_guard import ensure_all_tables_once
+from services.feedback_summary import rebuild_rollup
+
+
+def main():
+    ensure_all_tables_once()
+    db = SessionLocal()
+    try:
+        groups = rebuild_rollup(db)
+    finally:
+        db.close()
+    print(f"student_feedback_rollup rebuilt: {groups} groups")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Reclaim unreferenced content-addressed blobs (services/storage.py).
+
+    python tools/storage_gc.py [--grace-hours 24] [--dry-run]
+
+Deletes blobs whose reference count is 0, blob files without a
+storage_blobs row, and stale temp files, once they are older than the grace
+period. Run --dry-run first to see what would go.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.db import SessionLocal
+from services.storage import BLOB_ROOT, gc_blobs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--grace-hours", type=float, default=24.0)
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        out = gc_blobs(db, grace_s=args.grace_hours * 3600, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    verb = "would free" if args.dry_run else "freed"
+    print(f"{BLOB_ROOT}: {verb} {out['files']} files, {out['bytes'] / 1e6:.1f} MB")
+    print(f"  released blobs: {out['released']}  orphans: {out['orphans']}  temp files: {out['tmp']}")
+
+
+if __name__ == "__main__":
+    main()
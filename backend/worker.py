@@ -0,0 +1,59 @@
+# backend/worker.py
+"""
+Background job worker.
+
+    python worker.py                      # run forever
+    python worker.py --kinds grade_all    # only take some job kinds
+    python worker.py --once               # drain the queue and exit
+
+Run as many processes as you want; each claims one job at a time from
+`background_jobs`.
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import os
+import time
+
+from core.db import SessionLocal
+from core.schema_guard import ensure_all_tables_once
+from services.job_queue import claim_next, requeue_stale, run_job, worker_name
+from services.job_handlers import JOB_HANDLERS
+from services.model_registry import preload_models
+
+POLL_INTERVAL_S = float(os.getenv("JOB_POLL_INTERVAL_S", "2"))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--kinds", default="", help="comma-separated job kinds (default: all)")
+    ap.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = ap.parse_args()
+
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()] or list(JOB_HANDLERS)
+
+    ensure_all_tables_once()
+    preload_models()  # MODEL_PRELOAD; otherwise models load on the first job that needs them
+    print(f"worker {worker_name()} polling for {kinds}")
+
+    while True:
+        db = SessionLocal()
+        try:
+            requeue_stale(db)
+            job = claim_next(db, kinds)
+        finally:
+            db.close()
+
+        if job is None:
+            if args.once:
+                return
+            time.sleep(POLL_INTERVAL_S)
+            continue
+
+        print(f"running job {job.id} ({job.kind})")
+        run_job(job, JOB_HANDLERS)
+
+
+if __name__ == "__main__":
+    main()
@@ -193,12 +193,9 @@ export default function StudentFeedback() {
 
   const fetchFilters = async () => {
     try {
-      const [bRes, dRes] = await Promise.all([
-        axios.get(`${API}/feedback/batches`, { headers: authHeaders() }),
-        axios.get(`${API}/feedback/departments`, { headers: authHeaders() }),
-      ]);
-      setBatches(bRes.data || []);
-      setDepartments(dRes.data || []);
+      const res = await axios.get(`${API}/feedback/facets`, { headers: authHeaders() });
+      setBatches((res.data?.batches || []).map((f) => f.value));
+      setDepartments((res.data?.departments || []).map((f) => f.value));
     } catch (err) {
       console.error("Failed to fetch filters", err);
     }
@@ -210,12 +207,12 @@ export default function StudentFeedback() {
       if (batch) params.batch = Number(batch);
       if (department) params.department = department;
 
-      const res = await axios.get(`${API}/feedback/courses`, {
+      const res = await axios.get(`${API}/feedback/facets`, {
         params,
         headers: authHeaders(),
       });
 
-      const list = res.data || [];
+      const list = (res.data?.courses || []).map((f) => f.value);
       setCourses(list);
 
       // reset invalid selected course